@@ -0,0 +1,68 @@
+"""
+AI Engine Configuration
+"""
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """AI Engine settings from environment variables"""
+    
+    # Application
+    ENVIRONMENT: str = "development"
+    LOG_LEVEL: str = "INFO"
+    
+    # Prediction execution
+    # "inline": run predictions in the API process (blocks the event loop)
+    # "process": run predictions in a pool of worker processes
+    PREDICTION_EXECUTION_MODE: str = "process"
+    PREDICTION_WORKERS: int = 0  # 0 = one worker per CPU core
+    PREDICTION_MAX_QUEUE: int = 64  # requests waiting for a free worker
+    PREDICTION_TIMEOUT: float = 25.0  # seconds, below backend AI_ENGINE_TIMEOUT
+    # Adapt the accepted concurrency (between PREDICTION_WORKERS and
+    # workers + PREDICTION_MAX_QUEUE) to observed queueing delay (AIMD)
+    ADMISSION_ADAPTIVE: bool = True
+    ADMISSION_TARGET_QUEUE_DELAY: float = 1.0  # seconds a request may wait for a worker
+    
+    # Pretrained LSTM artifacts (models/lstm-<version>.pt)
+    LSTM_MODEL_DIR: str = "models"
+    LSTM_MODEL_VERSION: str = ""  # empty = latest artifact in LSTM_MODEL_DIR
+    # "eager", "torchscript" or "quantized" (dynamic int8, CPU only)
+    LSTM_INFERENCE_MODE: str = "eager"
+    # Max deviation of the quantized model from the float model, in
+    # normalized units (per-pipe std); above it the float model is served
+    LSTM_QUANTIZATION_TOLERANCE: float = 0.15
+    # Train a small LSTM per pipe on its own history at request time instead
+    # of serving the pretrained artifact; a group's pipes train as one
+    # stacked model of up to LSTM_PER_PIPE_BATCH_SIZE networks
+    LSTM_PER_PIPE_TRAINING: bool = False
+    LSTM_PER_PIPE_BATCH_SIZE: int = 64
+    
+    # Warm-start Prophet refits from each pipe's previous parameters
+    PROPHET_WARM_START_ENABLED: bool = True
+    PROPHET_PARAMS_MAX_ENTRIES: int = 10000
+    PROPHET_PARAMS_DISK_PATH: str = ""  # SQLite file shared by workers; empty = memory only
+    
+    # Cohort curves (material x diameter band x age band) fitted across the
+    # fleet: from pipes seen in requests plus an optional JSON Lines export
+    # (same format as the LSTM training input), refitted periodically
+    COHORT_ENABLED: bool = True
+    COHORT_FLEET_PATH: str = ""
+    COHORT_REFIT_INTERVAL: float = 3600  # seconds
+    COHORT_MAX_PIPES: int = 50000  # pipes remembered for refits
+    
+    # Fleet scenario simulation: threads for Monte Carlo chunks (0 = one per CPU core)
+    SCENARIO_THREADS: int = 0
+    
+    # Prediction response cache
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_MAX_ENTRIES: int = 10000
+    PREDICTION_CACHE_TTL: float = 86400  # seconds
+    PREDICTION_CACHE_DISK_PATH: str = ""  # SQLite file; empty = memory only
+    PREDICTION_CACHE_DISK_MAX_ENTRIES: int = 100000
+    
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
+
+
+settings = Settings()
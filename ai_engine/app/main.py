@@ -2,11 +2,47 @@
 AI Engine FastAPI Application
 ML Prediction Service for Pipeline Lifetime Forecasting
 """
+import asyncio
+import json
 import logging
-from fastapi import FastAPI, HTTPException, status
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.schemas import PredictionRequest, PredictionResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
+from app.schemas import (
+    BatchPredictionItem,
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+    FleetSnapshotRequest,
+    FleetSnapshotResponse,
+    PREDICTION_MODE_COHORT,
+    PREDICTION_MODE_FAST,
+    IncrementalPredictionRequest,
+    IncrementalPredictionResponse,
+    LifetimeRequest,
+    LifetimeResponse,
+    PredictionRequest,
+    PredictionResponse,
+    ReplacementPlanRequest,
+    ReplacementPlanResponse,
+    ScenarioRequest,
+    YearlyPrediction,
+)
+from app.core.config import settings
+from app.services.cache import PredictionCache
+from app.services.cohorts import CohortRegistry
+from app.services.executor import (
+    PredictionExecutor,
+    PredictionTimeoutError,
+    QueueFullError,
+)
 from app.services.predictor import PipeLifetimePredictor
+from app.services.replacement import plan_replacements
+from app.services.scenarios import FleetSnapshot, simulate
 
 # Configure logging
 logging.basicConfig(
@@ -15,12 +51,117 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+MODEL_VERSION = "hybrid-prophet-lstm-v1.0"
+FAST_MODEL_VERSION = "fast-robust-wls-v1"
+COHORT_MODEL_VERSION = "cohort-shrinkage-v1"
+
+# Initialize predictor
+predictor = PipeLifetimePredictor()
+
+# Dispatches predictions inline or to worker processes
+executor = PredictionExecutor(
+    predictor,
+    mode=settings.PREDICTION_EXECUTION_MODE,
+    workers=settings.PREDICTION_WORKERS,
+    max_queue=settings.PREDICTION_MAX_QUEUE,
+    timeout=settings.PREDICTION_TIMEOUT,
+    adaptive=settings.ADMISSION_ADAPTIVE,
+    target_queue_delay=settings.ADMISSION_TARGET_QUEUE_DELAY,
+)
+
+# Content-addressed cache of prediction responses
+cache = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL,
+    disk_path=settings.PREDICTION_CACHE_DISK_PATH or None,
+    disk_max_entries=settings.PREDICTION_CACHE_DISK_MAX_ENTRIES,
+) if settings.PREDICTION_CACHE_ENABLED else None
+
+
+# Fleet pipes and the cohort curves fitted from them
+cohort_registry = CohortRegistry(
+    max_pipes=settings.COHORT_MAX_PIPES,
+) if settings.COHORT_ENABLED else None
+
+
+# Fleet snapshot for scenario simulation, and the threads simulations run on
+fleet_state = {"snapshot": None}
+scenario_threads = settings.SCENARIO_THREADS or os.cpu_count() or 1
+scenario_pool = ThreadPoolExecutor(max_workers=scenario_threads, thread_name_prefix="scenario")
+
+
+# Readiness state: set once heavy libraries are loaded and warm-up has run
+warmup_state = {
+    "ready": False,
+    "started_at": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+async def _warm_up() -> None:
+    """Load heavy libraries and run a synthetic prediction in the background"""
+    warmup_state["started_at"] = time.time()
+    started = time.perf_counter()
+    try:
+        await executor.warm_up()
+    except Exception as e:
+        warmup_state["error"] = str(e)
+        logger.error(f"AI Engine warm-up failed: {str(e)}")
+        return
+    
+    warmup_state["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    warmup_state["ready"] = True
+    logger.info(f"AI Engine ready after {warmup_state['warmup_seconds']}s warm-up")
+
+
+async def _refit_cohorts() -> None:
+    """
+    Refit cohort curves every COHORT_REFIT_INTERVAL seconds.
+    
+    With a fleet export configured it is (re)read and fitted right away;
+    otherwise the first fit waits one interval for traffic to arrive.
+    """
+    loop = asyncio.get_running_loop()
+    fleet_path = settings.COHORT_FLEET_PATH
+    if not fleet_path:
+        await asyncio.sleep(settings.COHORT_REFIT_INTERVAL)
+    
+    while True:
+        try:
+            if fleet_path:
+                pipes = await loop.run_in_executor(None, cohort_registry.load_fleet, fleet_path)
+                logger.info(f"Read {pipes} pipes for cohort fitting from {fleet_path}")
+            await loop.run_in_executor(None, cohort_registry.refit, predictor)
+        except Exception as e:
+            logger.error(f"Cohort refit failed: {str(e)}")
+        await asyncio.sleep(settings.COHORT_REFIT_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start prediction workers, warm-up and cohort refits; stop them on shutdown"""
+    executor.start()
+    # Start listening immediately; warm-up runs in the background
+    warmup_task = asyncio.create_task(_warm_up())
+    cohort_task = asyncio.create_task(_refit_cohorts()) if cohort_registry is not None else None
+    yield
+    warmup_task.cancel()
+    if cohort_task is not None:
+        cohort_task.cancel()
+    scenario_pool.shutdown(wait=False, cancel_futures=True)
+    executor.shutdown()
+    if cache is not None:
+        cache.close()
+
+
 app = FastAPI(
     title="Tutas Ai AI Engine",
     description="ML Prediction Service for Pipeline Lifetime Forecasting",
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -32,9 +173,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize predictor
-predictor = PipeLifetimePredictor()
-
 
 @app.get("/health")
 async def health_check():
@@ -42,12 +180,70 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "ai-engine",
-        "model": "hybrid-prophet-lstm-v1.0",
+        "model": MODEL_VERSION,
+        "lstm_version": predictor.lstm_version,
+        "lstm_inference_mode": predictor.lstm_inference_mode,
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint.
+    
+    Returns 503 until heavy libraries are loaded and the warm-up prediction
+    has completed, so load balancers only route traffic to warm replicas.
+    """
+    if not warmup_state["ready"]:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "status": "warming_up",
+                "error": warmup_state["error"],
+            },
+        )
+    
+    return {
+        "status": "ready",
+        "warmup_seconds": warmup_state["warmup_seconds"],
+        "lstm_version": predictor.lstm_version,
+        "lstm_inference_mode": predictor.lstm_inference_mode,
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for capacity planning"""
+    return {
+        "executor": executor.stats(),
+        "cache": cache.stats() if cache is not None else None,
+        "stages": executor.stage_metrics.to_dict(),
+        "tiers": executor.tier_latency.to_dict(),
+        "cohorts": cohort_registry.stats() if cohort_registry is not None else None,
+    }
+
+
+@app.get("/cohorts")
+async def cohort_curves():
+    """Fitted cohort curves and the state of the cohort registry"""
+    if cohort_registry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cohort curves are disabled (COHORT_ENABLED=false)"
+        )
+    table = cohort_registry.table
+    return {
+        "registry": cohort_registry.stats(),
+        "table": table.to_dict() if table is not None else None,
     }
 
 
 @app.post("/predict", response_model=PredictionResponse, status_code=status.HTTP_200_OK)
-async def predict_lifetime(request: PredictionRequest) -> PredictionResponse:
+async def predict_lifetime(
+    request: PredictionRequest,
+    response: Response,
+    x_debug_profile: Optional[str] = Header(None),
+) -> PredictionResponse:
     """
     Predict pipe lifetime for next 5 years
     
@@ -58,6 +254,20 @@ async def predict_lifetime(request: PredictionRequest) -> PredictionResponse:
     - If 3-4 data points: Uses Prophet only
     - Otherwise: Uses theoretical degradation rates
     
+    With ``mode: "fast"`` a robust weighted linear fit is used instead
+    (no Prophet/LSTM), trading some accuracy for much higher throughput.
+    With ``mode: "cohort"`` that fit is shrunk toward the curve of the
+    pipe's fleet cohort (material, diameter band, age band). Pipes too short
+    for Prophet also use their cohort curve once one is fitted.
+    
+    With ``deadline_ms`` the richest branch whose recent latency fits the
+    budget is used, and a Prophet fit that would overrun it is abandoned in
+    favour of the theoretical rate. ``tier`` in the response names the
+    branch that answered; degraded answers are not cached.
+    
+    Send ``X-Debug-Profile: 1`` to get the branch, history length and
+    per-stage wall/CPU timings back in the ``X-Prediction-Profile`` header.
+    
     Args:
         request: PredictionRequest with pipe characteristics and history
         
@@ -66,31 +276,59 @@ async def predict_lifetime(request: PredictionRequest) -> PredictionResponse:
         
     Raises:
         HTTPException 400: If request validation fails
+        HTTPException 503: If the prediction queue is full (with Retry-After)
+        HTTPException 504: If the prediction times out
     """
+    deadline = _deadline(request)
     try:
         logger.info(f"Prediction request for pipe_id: {request.pipe_id}")
         
-        # Generate predictions
-        predictions = predictor.predict(request)
+        cache_key = _cache_key(request)
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Prediction cache hit for pipe_id: {request.pipe_id}")
+                if x_debug_profile:
+                    _set_profile_header(response, {"cache": "hit"})
+                return PredictionResponse.model_validate(cached)
+        
+        if cohort_registry is not None:
+            cohort_registry.observe([request])
         
-        # Calculate overall confidence score
-        # Higher confidence if we have more historical data
-        history_confidence = min(len(request.history_measurements) / 10.0, 1.0)
-        base_confidence = 0.7
-        confidence_score = base_confidence + (history_confidence * 0.3)
+        # Generate predictions off the event loop
+        outcomes, profiles = await executor.predict_batch([request], [deadline], _cohort_table())
+        if x_debug_profile:
+            _set_profile_header(response, profiles[0].to_dict())
+        if isinstance(outcomes[0], Exception):
+            raise outcomes[0]
+        predictions = outcomes[0]
+        
+        prediction = _build_response(request, predictions, profiles[0].tier)
+        
+        # A degraded answer must not be served to requests without a deadline
+        if cache_key is not None and not profiles[0].degraded:
+            cache.set(cache_key, prediction.model_dump(mode="json"))
         
         logger.info(
             f"Prediction completed for pipe_id: {request.pipe_id}, "
-            f"confidence: {confidence_score:.2f}"
+            f"confidence: {prediction.confidence_score:.2f}"
         )
         
-        return PredictionResponse(
-            pipe_id=request.pipe_id,
-            predictions=predictions,
-            model_version="hybrid-prophet-lstm-v1.0",
-            confidence_score=round(confidence_score, 2),
-        )
+        return prediction
         
+    except QueueFullError as e:
+        logger.warning(f"Prediction rejected for pipe_id: {request.pipe_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except PredictionTimeoutError as e:
+        logger.error(f"Prediction timeout for pipe_id: {request.pipe_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Prediction error for pipe_id: {request.pipe_id}, error: {str(e)}")
         raise HTTPException(
@@ -99,12 +337,419 @@ async def predict_lifetime(request: PredictionRequest) -> PredictionResponse:
         )
 
 
+@app.post(
+    "/predict/batch",
+    response_model=BatchPredictionResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def predict_lifetime_batch(batch: BatchPredictionRequest) -> BatchPredictionResponse:
+    """
+    Predict pipe lifetime for many pipes in one call
+    
+    Requests are grouped by model branch (hybrid, Prophet-only, theoretical)
+    and scored together. Errors are reported per item and never fail the
+    whole batch.
+    
+    Args:
+        batch: BatchPredictionRequest with up to MAX_BATCH_SIZE requests
+        
+    Returns:
+        BatchPredictionResponse with one result per request, in request order
+        
+    Raises:
+        HTTPException 503: If the prediction queue is full (with Retry-After)
+        HTTPException 504: If the batch times out
+    """
+    logger.info(f"Batch prediction request for {len(batch.requests)} pipes")
+    deadlines = [_deadline(request) for request in batch.requests]
+    
+    requests = batch.requests
+    if batch.mode is not None:
+        requests = [request.model_copy(update={"mode": batch.mode}) for request in requests]
+    
+    # Serve what we can from cache, score only the misses
+    cache_keys = [_cache_key(request) for request in requests]
+    responses = {}
+    for idx, key in enumerate(cache_keys):
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            responses[idx] = PredictionResponse.model_validate(cached)
+    
+    pending = [idx for idx in range(len(requests)) if idx not in responses]
+    if cohort_registry is not None:
+        cohort_registry.observe(requests)
+    
+    try:
+        outcomes, profiles = await executor.predict_batch(
+            [requests[idx] for idx in pending],
+            [deadlines[idx] for idx in pending],
+            _cohort_table(),
+        ) if pending else ([], [])
+    except QueueFullError as e:
+        logger.warning(f"Batch prediction rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except PredictionTimeoutError as e:
+        logger.error(f"Batch prediction timeout: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e)
+        )
+    
+    outcome_by_index = dict(zip(pending, outcomes))
+    profile_by_index = dict(zip(pending, profiles))
+    
+    results = []
+    to_cache = []
+    for idx, request in enumerate(requests):
+        if idx in responses:
+            results.append(BatchPredictionItem(
+                pipe_id=request.pipe_id,
+                prediction=responses[idx],
+            ))
+            continue
+        
+        outcome = outcome_by_index[idx]
+        if isinstance(outcome, Exception):
+            logger.error(
+                f"Batch prediction error for pipe_id: {request.pipe_id}, error: {str(outcome)}"
+            )
+            results.append(BatchPredictionItem(
+                pipe_id=request.pipe_id,
+                error=f"Prediction failed: {str(outcome)}",
+            ))
+        else:
+            profile = profile_by_index[idx]
+            response = _build_response(request, outcome, profile.tier)
+            if cache_keys[idx] is not None and not profile.degraded:
+                to_cache.append((cache_keys[idx], response.model_dump(mode="json")))
+            results.append(BatchPredictionItem(
+                pipe_id=request.pipe_id,
+                prediction=response,
+            ))
+    
+    # One disk transaction for the whole batch
+    if to_cache:
+        cache.set_many(to_cache)
+    
+    failed = sum(1 for item in results if item.error is not None)
+    
+    logger.info(
+        f"Batch prediction completed: {len(results) - failed} succeeded, {failed} failed"
+    )
+    
+    return BatchPredictionResponse(
+        results=results,
+        succeeded=len(results) - failed,
+        failed=failed,
+    )
+
+
+@app.post(
+    "/predict/incremental",
+    response_model=IncrementalPredictionResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def predict_incremental(request: IncrementalPredictionRequest) -> IncrementalPredictionResponse:
+    """
+    Update a pipe's degradation tracker and predict the next 5 years
+    
+    A linear-trend Kalman filter keeps thickness, corrosion rate and their
+    covariance per pipe. Send the `state` returned by the previous call with
+    only the new measurements; omit `state` on the first call (optionally
+    with the full history) to bootstrap. Each update is O(1) and needs no
+    model fitting, so it runs directly on the event loop.
+    
+    Args:
+        request: IncrementalPredictionRequest with previous state and new measurements
+        
+    Returns:
+        IncrementalPredictionResponse with yearly predictions and the new state
+        
+    Raises:
+        HTTPException 400: If a measurement is older than the state
+    """
+    try:
+        predictions, state = predictor.predict_incremental(request)
+    except ValueError as e:
+        logger.warning(f"Incremental prediction rejected for pipe_id: {request.pipe_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Incremental prediction error for pipe_id: {request.pipe_id}, error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {str(e)}"
+        )
+    
+    history_confidence = min(state.measurements / 10.0, 1.0)
+    return IncrementalPredictionResponse(
+        pipe_id=request.pipe_id,
+        predictions=predictions,
+        state=state,
+        confidence_score=round(0.7 + history_confidence * 0.3, 2),
+    )
+
+
+@app.post(
+    "/predict/lifetime",
+    response_model=LifetimeResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def predict_lifetime_thresholds(request: LifetimeRequest) -> LifetimeResponse:
+    """
+    Estimate when each pipe reaches warning and critical wall thickness
+    
+    Crossing dates and their intervals are solved in closed form from each
+    pipe's fast-mode linear trend, so horizons of decades cost the same as
+    one year and a whole fleet can be ranked in one call. The vectorized
+    solve runs in a thread to keep the event loop free.
+    
+    Args:
+        request: LifetimeRequest with pipes, horizon and confidence level
+        
+    Returns:
+        LifetimeResponse with one result per pipe, in request order
+        
+    Raises:
+        HTTPException 500: If estimation fails
+    """
+    logger.info(
+        f"Lifetime request for {len(request.requests)} pipes, "
+        f"horizon {request.horizon_years} years"
+    )
+    
+    loop = asyncio.get_running_loop()
+    try:
+        if cohort_registry is not None:
+            await loop.run_in_executor(None, cohort_registry.observe, request.requests)
+        results = await loop.run_in_executor(
+            None,
+            predictor.predict_lifetimes,
+            request.requests,
+            request.horizon_years,
+            request.confidence,
+        )
+    except Exception as e:
+        logger.error(f"Lifetime estimation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {str(e)}"
+        )
+    
+    return LifetimeResponse(
+        results=results,
+        horizon_years=request.horizon_years,
+        confidence=request.confidence,
+        model_version=FAST_MODEL_VERSION,
+    )
+
+
+@app.post(
+    "/fleet/snapshot",
+    response_model=FleetSnapshotResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def load_fleet_snapshot(request: FleetSnapshotRequest) -> FleetSnapshotResponse:
+    """
+    Load the fleet used by scenario simulations, replacing the previous one
+    
+    The pipes are converted to column arrays once (in a thread), so every
+    later simulation works on arrays only.
+    
+    Args:
+        request: FleetSnapshotRequest with every pipe of the fleet
+        
+    Returns:
+        FleetSnapshotResponse summarizing the loaded snapshot
+    """
+    current = fleet_state["snapshot"]
+    version = current.version + 1 if current is not None else 1
+    
+    loop = asyncio.get_running_loop()
+    snapshot = await loop.run_in_executor(None, FleetSnapshot, request.pipes, version)
+    fleet_state["snapshot"] = snapshot
+    
+    logger.info(f"Fleet snapshot v{version} loaded: {len(snapshot)} pipes")
+    return FleetSnapshotResponse(**snapshot.summary())
+
+
+@app.get("/fleet/snapshot", response_model=FleetSnapshotResponse)
+async def fleet_snapshot_summary() -> FleetSnapshotResponse:
+    """Summary of the loaded fleet snapshot"""
+    snapshot = fleet_state["snapshot"]
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No fleet snapshot loaded"
+        )
+    return FleetSnapshotResponse(**snapshot.summary())
+
+
+@app.post("/fleet/scenarios")
+async def simulate_fleet_scenarios(request: ScenarioRequest) -> StreamingResponse:
+    """
+    Simulate what-if corrosion scenarios over the loaded fleet snapshot
+    
+    Vectorized Monte Carlo: every pipe gets ``samples`` draws of thickness
+    and rate per scenario, and the year each draw turns critical is solved
+    in closed form. Results stream as NDJSON while the simulation runs:
+    ``progress`` lines with fleet estimates from the pipes done so far, one
+    ``scenario`` line per scenario with the final curves, then ``done``.
+    
+    Args:
+        request: ScenarioRequest with scenarios, horizon and sample count
+        
+    Returns:
+        StreamingResponse of NDJSON events
+        
+    Raises:
+        HTTPException 409: If no fleet snapshot is loaded
+    """
+    snapshot = fleet_state["snapshot"]
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No fleet snapshot loaded; POST /fleet/snapshot first"
+        )
+    
+    logger.info(
+        f"Scenario simulation: {len(request.scenarios)} scenarios x {len(snapshot)} pipes "
+        f"x {request.samples} samples, horizon {request.horizon_years} years"
+    )
+    events = simulate(
+        snapshot,
+        request,
+        PipeLifetimePredictor.CRITICAL_THICKNESS,
+        scenario_pool,
+        scenario_threads,
+    )
+    # Starlette iterates the generator in a thread, off the event loop
+    lines = (json.dumps(event) + "\n" for event in events)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@app.post(
+    "/plan/replacements",
+    response_model=ReplacementPlanResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def plan_segment_replacements(request: ReplacementPlanRequest) -> ReplacementPlanResponse:
+    """
+    Multi-year replacement plan that minimizes expected failures within an annual budget
+    
+    Segments carry their yearly failure probabilities (the
+    ``failure_probability`` of /predict or /predict/batch predictions) and
+    length; the cost model prices each replacement. The plan is a greedy
+    multi-year knapsack certified by a Lagrangian bound, so the response
+    states how far from optimal it can be. The solve runs in a thread to keep
+    the event loop free.
+    
+    Args:
+        request: ReplacementPlanRequest with segments, cost model, budget and years
+        
+    Returns:
+        ReplacementPlanResponse with the plan, yearly totals, bound, gap and solve time
+        
+    Raises:
+        HTTPException 500: If planning fails
+    """
+    logger.info(
+        f"Replacement plan request for {len(request.segments)} segments, "
+        f"{request.years} years, budget {request.annual_budget:.0f}/year"
+    )
+    
+    loop = asyncio.get_running_loop()
+    try:
+        plan = await loop.run_in_executor(None, plan_replacements, request)
+    except Exception as e:
+        logger.error(f"Replacement planning error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Planning failed: {str(e)}"
+        )
+    
+    logger.info(
+        f"Replacement plan: {len(plan.replacements)} segments, "
+        f"gap {plan.optimality_gap:.4%}, solved in {plan.solve_seconds:.3f}s"
+    )
+    return plan
+
+
+def _cache_key(request: PredictionRequest) -> Optional[str]:
+    """Cache key for a request under the currently served models"""
+    # Until models are loaded the served LSTM version is unknown
+    if cache is None or not predictor.is_loaded:
+        return None
+    # Quantized LSTM output differs slightly from the float model
+    model_key = f"{MODEL_VERSION}+lstm:{predictor.lstm_version}:{predictor.lstm_inference_mode}"
+    # Only answers that can come from a cohort curve change on a refit
+    table = _cohort_table()
+    if table is not None and predictor.may_use_cohorts(request):
+        model_key += f"+cohorts:{table.version}"
+    return PredictionCache.make_key(request, model_key)
+
+
+def _cohort_table():
+    """Cohort table currently served, if any"""
+    return cohort_registry.table if cohort_registry is not None else None
+
+
+def _deadline(request: PredictionRequest) -> Optional[float]:
+    """Absolute ``time.time()`` deadline of a request, counted from now"""
+    if request.deadline_ms is None:
+        return None
+    return time.time() + request.deadline_ms / 1000
+
+
+def _set_profile_header(response: Response, profile: dict) -> None:
+    """Attach a prediction timing profile as a compact JSON header"""
+    response.headers["X-Prediction-Profile"] = json.dumps(profile, separators=(",", ":"))
+
+
+def _build_response(
+    request: PredictionRequest,
+    predictions: List[YearlyPrediction],
+    tier: Optional[str] = None,
+) -> PredictionResponse:
+    """Wrap yearly predictions into a PredictionResponse with confidence score"""
+    # Calculate overall confidence score
+    # Higher confidence if we have more historical data
+    history_confidence = min(len(request.history_measurements) / 10.0, 1.0)
+    base_confidence = 0.7
+    confidence_score = base_confidence + (history_confidence * 0.3)
+    
+    if request.mode in (PREDICTION_MODE_FAST, PREDICTION_MODE_COHORT):
+        return PredictionResponse(
+            pipe_id=request.pipe_id,
+            predictions=predictions,
+            model_version=FAST_MODEL_VERSION if request.mode == PREDICTION_MODE_FAST else COHORT_MODEL_VERSION,
+            tier=tier,
+            confidence_score=round(confidence_score, 2),
+        )
+    
+    return PredictionResponse(
+        pipe_id=request.pipe_id,
+        predictions=predictions,
+        model_version=MODEL_VERSION,
+        lstm_version=predictor.lstm_version,
+        tier=tier,
+        confidence_score=round(confidence_score, 2),
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {
         "message": "Tutas Ai AI Engine",
         "version": "0.1.0",
-        "model": "hybrid-prophet-lstm-v1.0",
+        "model": MODEL_VERSION,
+        "lstm_version": predictor.lstm_version,
         "docs": "/docs",
     }
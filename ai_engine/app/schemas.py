@@ -3,9 +3,18 @@ Pydantic schemas for AI Engine API
 """
 import uuid
 from datetime import date
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, field_validator
 
+# Prediction modes
+# "hybrid": Prophet + LSTM (or the fallback branch selected by history size)
+# "fast": closed-form robust linear fit, vectorized across a batch
+# "cohort": the pipe's linear fit shrunk toward its fleet cohort's curve
+PREDICTION_MODE_HYBRID = "hybrid"
+PREDICTION_MODE_FAST = "fast"
+PREDICTION_MODE_COHORT = "cohort"
+PREDICTION_MODES = [PREDICTION_MODE_HYBRID, PREDICTION_MODE_FAST, PREDICTION_MODE_COHORT]
+
 
 class MeasurementHistory(BaseModel):
     """Historical measurement data point"""
@@ -29,8 +38,28 @@ class PredictionRequest(BaseModel):
         default_factory=list,
         description="Historical measurement data"
     )
+    diameter_mm: Optional[int] = Field(None, gt=0, description="Nominal pipe diameter (mm), selects the cohort")
     soil_type: Optional[str] = Field(None, description="Soil type for environmental factors")
     operating_pressure: Optional[float] = Field(None, gt=0, description="Operating pressure (bar)")
+    mode: str = Field(
+        PREDICTION_MODE_HYBRID,
+        description=(
+            "Prediction mode: 'hybrid' (Prophet + LSTM), 'fast' (vectorized linear fit) "
+            "or 'cohort' (linear fit shrunk toward the pipe's fleet cohort)"
+        )
+    )
+    deadline_ms: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Time budget (ms); a cheaper tier answers if the richest one would not fit"
+    )
+
+    @field_validator('mode')
+    @classmethod
+    def validate_mode(cls, v: str) -> str:
+        if v not in PREDICTION_MODES:
+            raise ValueError(f'Mode must be one of {PREDICTION_MODES}')
+        return v
 
 
 class YearlyPrediction(BaseModel):
@@ -61,4 +90,326 @@ class PredictionResponse(BaseModel):
     pipe_id: uuid.UUID
     predictions: List[YearlyPrediction]
     model_version: str = "hybrid-prophet-lstm-v1.0"
+    lstm_version: Optional[str] = Field(None, description="Pretrained LSTM artifact version")
+    tier: Optional[str] = Field(
+        None,
+        description="Branch that produced the predictions: 'hybrid', 'prophet', 'theoretical', 'fast' or 'cohort'"
+    )
+    confidence_score: float = Field(..., ge=0.0, le=1.0, description="Overall model confidence")
+
+
+# Maximum number of pipes accepted in a single batch request
+MAX_BATCH_SIZE = 1000
+
+
+class BatchPredictionRequest(BaseModel):
+    """Request schema for batch prediction endpoint"""
+    requests: List[PredictionRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="Prediction requests to score in one call"
+    )
+    mode: Optional[str] = Field(
+        None,
+        description="Prediction mode for every request in the batch (overrides per-request mode)"
+    )
+
+    @field_validator('mode')
+    @classmethod
+    def validate_mode(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in PREDICTION_MODES:
+            raise ValueError(f'Mode must be one of {PREDICTION_MODES}')
+        return v
+
+
+class BatchPredictionItem(BaseModel):
+    """Result for a single pipe within a batch"""
+    pipe_id: uuid.UUID
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = Field(None, description="Error message if this item failed")
+
+
+class BatchPredictionResponse(BaseModel):
+    """Response schema for batch prediction endpoint"""
+    results: List[BatchPredictionItem]
+    succeeded: int = Field(..., ge=0, description="Number of successfully scored pipes")
+    failed: int = Field(..., ge=0, description="Number of pipes that failed")
+
+
+class TrackerState(BaseModel):
+    """Incremental tracker state of one pipe, returned and sent back by the client"""
+    thickness: float = Field(..., description="Filtered wall thickness (mm)")
+    corrosion_rate: float = Field(..., description="Filtered corrosion rate (mm/year, positive = loss)")
+    covariance: List[List[float]] = Field(
+        ...,
+        description="2x2 covariance of [thickness, corrosion_rate]"
+    )
+    as_of: date = Field(..., description="Date of the last folded-in measurement")
+    measurements: int = Field(0, ge=0, description="Number of measurements folded in")
+
+    @field_validator('covariance')
+    @classmethod
+    def validate_covariance(cls, v: List[List[float]]) -> List[List[float]]:
+        if len(v) != 2 or any(len(row) != 2 for row in v):
+            raise ValueError('Covariance must be a 2x2 matrix')
+        if v[0][0] < 0 or v[1][1] < 0:
+            raise ValueError('Covariance diagonal must be non-negative')
+        return v
+
+
+class IncrementalPredictionRequest(BaseModel):
+    """Request schema for incremental (state-space) prediction"""
+    pipe_id: uuid.UUID
+    material: str = Field(..., description="Pipe material (e.g., 'steel', 'cast_iron')")
+    age_years: int = Field(..., ge=0, description="Current age of pipe in years")
+    current_wall_thickness: float = Field(..., gt=0, description="Current wall thickness in mm")
+    corrosion_rate_historical: float = Field(
+        ...,
+        ge=0,
+        description="Historical average corrosion rate (mm/year)"
+    )
+    state: Optional[TrackerState] = Field(
+        None,
+        description="State from the previous response; omit to bootstrap"
+    )
+    measurements: List[MeasurementHistory] = Field(
+        default_factory=list,
+        description="Measurements newer than the state (full history when bootstrapping)"
+    )
+
+
+class IncrementalPredictionResponse(BaseModel):
+    """Response schema for incremental prediction endpoint"""
+    pipe_id: uuid.UUID
+    predictions: List[YearlyPrediction]
+    state: TrackerState
+    model_version: str = "kalman-linear-trend-v1"
     confidence_score: float = Field(..., ge=0.0, le=1.0, description="Overall model confidence")
+
+
+# Maximum number of pipes accepted in a single lifetime request
+MAX_LIFETIME_BATCH_SIZE = 20000
+
+
+class LifetimeRequest(BaseModel):
+    """Request schema for threshold-crossing (lifetime) estimation"""
+    requests: List[PredictionRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_LIFETIME_BATCH_SIZE,
+        description="Pipes to estimate; the per-request mode is ignored"
+    )
+    horizon_years: int = Field(
+        100,
+        ge=1,
+        le=200,
+        description="Crossings later than this are reported as beyond the horizon"
+    )
+    confidence: float = Field(
+        0.9,
+        gt=0.0,
+        lt=1.0,
+        description="Two-sided confidence level of the crossing date interval"
+    )
+
+
+class ThresholdCrossing(BaseModel):
+    """Estimated date when wall thickness falls to a threshold"""
+    threshold_mm: float
+    years: Optional[float] = Field(None, ge=0.0, description="Expected years from today (None if beyond horizon)")
+    expected_date: Optional[date] = Field(None, description="Expected crossing date (None if beyond horizon)")
+    earliest_date: Optional[date] = Field(None, description="Lower end of the interval (None if beyond horizon)")
+    latest_date: Optional[date] = Field(None, description="Upper end of the interval (None if beyond horizon)")
+    beyond_horizon: bool = Field(False, description="Expected crossing is later than the horizon")
+
+
+class PipeLifetime(BaseModel):
+    """Threshold crossings for a single pipe"""
+    pipe_id: uuid.UUID
+    corrosion_rate: Optional[float] = Field(None, description="Trend corrosion rate (mm/year, positive = loss)")
+    warning: Optional[ThresholdCrossing] = None
+    critical: Optional[ThresholdCrossing] = None
+    error: Optional[str] = Field(None, description="Error message if this item failed")
+
+
+class LifetimeResponse(BaseModel):
+    """Response schema for lifetime endpoint"""
+    results: List[PipeLifetime]
+    horizon_years: int
+    confidence: float
+    model_version: str = "fast-robust-wls-v1"
+
+
+# Maximum number of pipes in a fleet snapshot, and scenarios per simulation
+MAX_FLEET_SNAPSHOT_SIZE = 500000
+MAX_SCENARIOS = 32
+
+
+class FleetPipe(BaseModel):
+    """One pipe of a fleet snapshot"""
+    pipe_id: uuid.UUID
+    material: str = Field(..., description="Pipe material (e.g., 'steel', 'cast_iron')")
+    age_years: int = Field(..., ge=0, description="Current age of pipe in years")
+    current_wall_thickness: float = Field(..., gt=0, description="Current wall thickness in mm")
+    corrosion_rate: float = Field(..., ge=0, description="Corrosion rate (mm/year, positive = loss)")
+    corrosion_rate_std: Optional[float] = Field(
+        None,
+        ge=0,
+        description="Uncertainty of the rate (mm/year); default is a fixed share of the rate"
+    )
+    length_m: Optional[float] = Field(None, ge=0, description="Pipe length in meters (unknown = 0)")
+
+
+class FleetSnapshotRequest(BaseModel):
+    """Request schema for loading a fleet snapshot"""
+    pipes: List[FleetPipe] = Field(..., min_length=1, max_length=MAX_FLEET_SNAPSHOT_SIZE)
+
+
+class FleetSnapshotResponse(BaseModel):
+    """Summary of the loaded fleet snapshot"""
+    version: int = Field(..., description="Increments with every loaded snapshot")
+    pipes: int
+    total_length_m: float
+    unknown_length_pipes: int = Field(..., description="Pipes without a length (count as 0 m)")
+    materials: Dict[str, int] = Field(..., description="Pipes per material")
+    loaded_at: float = Field(..., description="Load time (Unix seconds)")
+
+
+class Scenario(BaseModel):
+    """Corrosion assumptions of one what-if scenario"""
+    name: str = Field(..., min_length=1, max_length=100)
+    rate_multiplier: float = Field(1.0, gt=0, description="Factor on every pipe's corrosion rate")
+    material_rate_multipliers: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Extra rate factor per material, on top of rate_multiplier"
+    )
+    acceleration: float = Field(
+        0.0,
+        ge=0,
+        description="Corrosion acceleration from today (mm/year^2)"
+    )
+
+    @field_validator('material_rate_multipliers')
+    @classmethod
+    def validate_multipliers(cls, v: Dict[str, float]) -> Dict[str, float]:
+        if any(factor <= 0 for factor in v.values()):
+            raise ValueError('Material rate multipliers must be positive')
+        return {material.lower(): factor for material, factor in v.items()}
+
+
+class ScenarioRequest(BaseModel):
+    """Request schema for fleet scenario simulation"""
+    scenarios: List[Scenario] = Field(..., min_length=1, max_length=MAX_SCENARIOS)
+    horizon_years: int = Field(30, ge=1, le=100, description="Years simulated from today")
+    samples: int = Field(1000, ge=10, le=10000, description="Monte Carlo samples per pipe")
+    interval: float = Field(
+        0.9,
+        gt=0.0,
+        lt=1.0,
+        description="Two-sided probability of the reported bands"
+    )
+    seed: int = Field(0, ge=0, description="Random seed; equal seeds give equal results")
+
+
+# Maximum number of segments in a replacement plan request
+MAX_REPLACEMENT_SEGMENTS = 200000
+
+
+class ReplacementSegment(BaseModel):
+    """A pipe segment that can be replaced"""
+    pipe_id: uuid.UUID
+    length_m: float = Field(..., gt=0, description="Segment length in meters (length_meters)")
+    failure_probabilities: List[float] = Field(
+        ...,
+        min_length=1,
+        max_length=50,
+        description=(
+            "Probability the segment has failed by each year from today, cumulative "
+            "(e.g. the predictions' failure_probability)"
+        )
+    )
+    material: Optional[str] = Field(None, description="Pipe material, selects a material cost rate")
+    replacement_cost: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Known replacement cost; overrides the cost model"
+    )
+
+    @field_validator('failure_probabilities')
+    @classmethod
+    def validate_probabilities(cls, v: List[float]) -> List[float]:
+        if any(p < 0.0 or p > 1.0 for p in v):
+            raise ValueError('Failure probabilities must be between 0 and 1')
+        return v
+
+
+class ReplacementCostModel(BaseModel):
+    """Replacement cost of a segment: fixed_cost + rate per meter * length"""
+    cost_per_meter: float = Field(..., gt=0, description="Default cost per meter")
+    fixed_cost: float = Field(0.0, ge=0, description="Cost per segment (mobilization, permits)")
+    material_cost_per_meter: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Cost per meter by material, overriding cost_per_meter"
+    )
+
+    @field_validator('material_cost_per_meter')
+    @classmethod
+    def validate_material_costs(cls, v: Dict[str, float]) -> Dict[str, float]:
+        if any(cost <= 0 for cost in v.values()):
+            raise ValueError('Material costs per meter must be positive')
+        return {material.lower(): cost for material, cost in v.items()}
+
+
+class ReplacementPlanRequest(BaseModel):
+    """Request schema for budget-constrained replacement planning"""
+    segments: List[ReplacementSegment] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_REPLACEMENT_SEGMENTS,
+    )
+    cost_model: ReplacementCostModel
+    annual_budget: float = Field(..., gt=0, description="Budget available in each plan year")
+    years: int = Field(
+        5,
+        ge=1,
+        le=50,
+        description="Plan years; shorter probability lists repeat their last year"
+    )
+
+
+class PlannedReplacement(BaseModel):
+    """One segment scheduled for replacement"""
+    pipe_id: uuid.UUID
+    year: int = Field(..., ge=1, description="Plan year (1 = the coming year)")
+    cost: float
+    expected_failures_avoided: float = Field(..., description="Expected failures avoided (at most 1)")
+
+
+class ReplacementPlanYear(BaseModel):
+    """Budget use and remaining risk of one plan year"""
+    year: int
+    budget: float
+    spent: float
+    segments: int
+    length_m: float
+    expected_failures: float = Field(..., description="Expected new failures in the year with the plan applied")
+
+
+class ReplacementPlanResponse(BaseModel):
+    """Response schema for replacement planning"""
+    replacements: List[PlannedReplacement]
+    years: List[ReplacementPlanYear]
+    expected_failures_baseline: float = Field(..., description="Expected failures over the plan without replacements")
+    expected_failures_planned: float = Field(..., description="Expected failures over the plan with it")
+    expected_failures_lower_bound: float = Field(
+        ...,
+        description="No plan within the budgets can get below this (Lagrangian bound)"
+    )
+    optimality_gap: float = Field(
+        ...,
+        ge=0.0,
+        description="Share of the best possible avoided failures the plan may miss"
+    )
+    unaffordable_segments: int = Field(..., description="Segments costing more than one year's budget")
+    solve_seconds: float
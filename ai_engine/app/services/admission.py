@@ -0,0 +1,112 @@
+"""
+Admission control - adaptive concurrency limit for the prediction pool
+"""
+import math
+import time
+from typing import Optional
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit adjusted by additive increase / multiplicative decrease.
+
+    The signal is queueing delay: how long a task waited for a worker, i.e.
+    its latency minus the time the worker spent scoring it. Service time
+    varies with the branch (theoretical vs. hybrid), queueing delay only
+    with congestion. While tasks start within ``target_delay`` and at least
+    half the limit is in use, the limit grows by about one per ``limit``
+    completions. When a task waited longer, the limit is multiplied by
+    ``backoff``, at most once per ``target_delay`` so one burst does not
+    collapse it repeatedly. The limit stays within [min_limit, max_limit].
+    """
+
+    def __init__(
+        self,
+        min_limit: int,
+        max_limit: int,
+        initial_limit: Optional[int] = None,
+        target_delay: float = 1.0,
+        backoff: float = 0.8,
+        smoothing: float = 0.2,
+    ):
+        """
+        Initialize limiter
+
+        Args:
+            min_limit: Lowest limit (typically the number of workers)
+            max_limit: Highest limit (workers plus the maximum queue)
+            initial_limit: Starting limit (default: twice min_limit, capped)
+            target_delay: Acceptable queueing delay in seconds
+            backoff: Factor applied to the limit on congestion
+            smoothing: EWMA weight of new delay and service time samples
+        """
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.target_delay = target_delay
+        self.backoff = backoff
+        self.smoothing = smoothing
+
+        initial = initial_limit if initial_limit is not None else 2 * self.min_limit
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._last_decrease = 0.0
+
+        self._queue_delay: Optional[float] = None
+        self._service_time: Optional[float] = None
+        self._samples = 0
+        self._increases = 0
+        self._decreases = 0
+
+    @property
+    def limit(self) -> int:
+        """Tasks allowed in flight (running or queued) at once"""
+        return int(self._limit)
+
+    def on_sample(self, queue_delay: float, service_time: float, in_flight: int) -> None:
+        """
+        Adjust the limit from one completed task.
+
+        Args:
+            queue_delay: Seconds the task waited for a worker
+            service_time: Seconds the worker spent on the task
+            in_flight: Tasks still in flight when it completed
+        """
+        self._samples += 1
+        self._queue_delay = self._ewma(self._queue_delay, queue_delay)
+        self._service_time = self._ewma(self._service_time, service_time)
+
+        now = time.monotonic()
+        if queue_delay > self.target_delay:
+            if now - self._last_decrease >= self.target_delay:
+                self._limit = max(self._limit * self.backoff, self.min_limit)
+                self._last_decrease = now
+                self._decreases += 1
+        elif 2 * (in_flight + 1) >= self._limit and self._limit < self.max_limit:
+            # Only raise a limit that is actually being used
+            self._limit = min(self._limit + 1.0 / self._limit, self.max_limit)
+            self._increases += 1
+
+    def retry_after(self, in_flight: int, workers: int) -> int:
+        """
+        Seconds a rejected client should wait: time for the workers to
+        drain what is in flight at the recent service time (at least 1).
+        """
+        service_time = self._service_time or 1.0
+        return max(math.ceil(in_flight / max(workers, 1) * service_time), 1)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "target_delay_seconds": self.target_delay,
+            "queue_delay_ms": round(self._queue_delay * 1000, 3) if self._queue_delay is not None else None,
+            "service_time_ms": round(self._service_time * 1000, 3) if self._service_time is not None else None,
+            "samples": self._samples,
+            "increases": self._increases,
+            "decreases": self._decreases,
+        }
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        if current is None:
+            return sample
+        return current + self.smoothing * (sample - current)
@@ -0,0 +1,240 @@
+"""
+Prediction Cache - content-addressed cache of prediction responses
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from app.schemas import PredictionRequest
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps of expired and excess rows from the disk tier
+DISK_PRUNE_INTERVAL = 300
+
+
+class PredictionCache:
+    """
+    Two-tier cache for prediction responses.
+
+    Keys are a canonical hash of the PredictionRequest fields plus the model
+    version, so retries and repeated scans of the same pipe with the same
+    history reuse the previous result. The memory tier is a bounded LRU with
+    TTL; the optional disk tier (SQLite) survives restarts and is pruned
+    of expired entries, then of the soonest-expiring ones beyond
+    ``disk_max_entries``, every DISK_PRUNE_INTERVAL seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 86400,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100000,
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum entries held in memory
+            ttl_seconds: Time-to-live of an entry in seconds
+            disk_path: SQLite file for the disk tier (disabled if not set)
+            disk_max_entries: Maximum entries kept on disk
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._disk: Optional[sqlite3.Connection] = None
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._disk_pruned = 0
+        self._last_prune = 0.0
+
+        if disk_path:
+            self._open_disk(disk_path)
+
+    @staticmethod
+    def make_key(request: PredictionRequest, model_version: str) -> str:
+        """
+        Canonical content hash of a request for a given model version.
+
+        History order does not affect the prediction, so measurements are
+        sorted before hashing. The deadline only bounds how long scoring may
+        take and is left out.
+        """
+        payload = request.model_dump(mode="json", exclude={"deadline_ms"})
+        payload["history_measurements"] = sorted(
+            payload["history_measurements"],
+            key=lambda m: (m["date"], m["value"], m["unit"]),
+        )
+        canonical = json.dumps(
+            {"model_version": model_version, "request": payload},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return cached value or None on miss/expiry"""
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self._memory_hits += 1
+                return value
+            del self._entries[key]
+            self._expirations += 1
+
+        if self._disk is not None:
+            disk_entry = self._disk_get(key, now)
+            if disk_entry is not None:
+                expires_at, value = disk_entry
+                self._disk_hits += 1
+                self._memory_set(key, value, expires_at)
+                return value
+
+        self._misses += 1
+        return None
+
+    def set(self, key: str, value: dict) -> None:
+        """Store value in memory and, if enabled, on disk"""
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, dict]]) -> None:
+        """Store several values; the disk tier writes them in one transaction"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        rows = []
+        for key, value in items:
+            self._memory_set(key, value, expires_at)
+            rows.append((key, json.dumps(value), expires_at))
+
+        if self._disk is not None and rows:
+            try:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, value, expires_at) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._disk.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Prediction cache disk write failed: {e}")
+            if now - self._last_prune >= DISK_PRUNE_INTERVAL:
+                self._disk_prune()
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers"""
+        self._entries.clear()
+        if self._disk is not None:
+            self._disk.execute("DELETE FROM predictions")
+            self._disk.commit()
+
+    def close(self) -> None:
+        """Close the disk tier"""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters"""
+        hits = self._memory_hits + self._disk_hits
+        lookups = hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_enabled": self._disk is not None,
+            "disk_max_entries": self.disk_max_entries,
+            "disk_pruned": self._disk_pruned,
+            "hits": hits,
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _memory_set(self, key: str, value: dict, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _open_disk(self, path: str) -> None:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._disk = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+            # WAL: a commit appends to the log instead of rewriting pages,
+            # and fsyncs only at checkpoints with synchronous=NORMAL
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._disk.execute(
+                "CREATE INDEX IF NOT EXISTS predictions_expires_at ON predictions (expires_at)"
+            )
+            self._disk.commit()
+            self._disk_prune()
+            logger.info(f"Prediction cache disk tier enabled at {path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Prediction cache disk tier unavailable ({path}): {e}")
+            self._disk = None
+
+    def _disk_prune(self) -> None:
+        """Drop expired rows, then the soonest-expiring beyond disk_max_entries"""
+        now = time.time()
+        self._last_prune = now
+        try:
+            expired = self._disk.execute(
+                "DELETE FROM predictions WHERE expires_at <= ?", (now,)
+            ).rowcount
+            excess = self._disk.execute(
+                "DELETE FROM predictions WHERE key IN ("
+                "SELECT key FROM predictions ORDER BY expires_at "
+                "LIMIT max((SELECT COUNT(*) FROM predictions) - ?, 0))",
+                (self.disk_max_entries,),
+            ).rowcount
+            self._disk.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Prediction cache disk prune failed: {e}")
+            return
+        self._disk_pruned += expired + excess
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, dict]]:
+        try:
+            row = self._disk.execute(
+                "SELECT value, expires_at FROM predictions WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Prediction cache disk read failed: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at <= now:
+            self._expirations += 1
+            return None
+
+        return expires_at, json.loads(value)
@@ -0,0 +1,355 @@
+"""
+Cohort degradation curves - fleet-wide corrosion rates shared across pipes
+
+Pipes are grouped by material, diameter band and age band. Each cohort gets
+a corrosion-rate curve fitted once across the fleet from every pipe's own
+linear trend (see fast_linear): a random-effects mean rate, its change with
+age, and the spread of true rates between pipes. A pipe is then scored as a
+cheap residual adjustment on its cohort curve: its own trend is shrunk
+toward the cohort rate in proportion to how poorly its history pins the
+rate down, and pipes without a usable trend take the cohort rate itself.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.schemas import PredictionRequest
+
+if TYPE_CHECKING:
+    from app.services.predictor import PipeLifetimePredictor
+
+logger = logging.getLogger(__name__)
+
+# Band label for an unknown diameter, and for cohorts pooled over a dimension
+ANY_BAND = "any"
+
+# Upper band edges; values above the last edge form one open band
+DIAMETER_BANDS_MM = (150, 300, 600)
+AGE_BANDS_YEARS = (10, 25, 50)
+
+# Cohorts with fewer fitted pipes are not used; the pipe falls back to a
+# coarser cohort (any diameter, then any age)
+MIN_COHORT_PIPES = 5
+
+# Floor for a pipe's rate variance ((mm/year)^2): two readings on nearly the
+# same day must not dominate a cohort
+MIN_RATE_VAR = 1e-4
+
+# Below this spread of pipe ages (years^2) a cohort's age slope is not fitted
+MIN_AGE_VAR = 1.0
+
+
+class Observation(NamedTuple):
+    """Compact copy of one pipe's request, kept for cohort refits"""
+    material: str
+    diameter_mm: Optional[int]
+    age_years: int
+    days: np.ndarray  # measurement dates as proleptic ordinals
+    values: np.ndarray  # thickness in mm
+
+
+class CohortCurve(NamedTuple):
+    """
+    Corrosion-rate curve of one cohort (rates in mm/year, positive = loss).
+
+    The expected rate at age ``a`` is ``rate + acceleration * (a - center_age)``.
+    ``rate_var`` is the between-pipe variance of true rates and ``mean_var``
+    the uncertainty of the cohort mean; their sum is the prior variance of a
+    pipe's rate. ``noise_var`` is the typical measurement scatter (mm^2).
+    """
+    pipes: int
+    rate: float
+    acceleration: float
+    center_age: float
+    rate_var: float
+    mean_var: float
+    noise_var: float
+
+    def rate_at(self, age_years: float) -> float:
+        """Expected corrosion rate at an age (never negative)"""
+        return max(self.rate + self.acceleration * (age_years - self.center_age), 0.0)
+
+    def to_dict(self) -> dict:
+        return {
+            "pipes": self.pipes,
+            "rate_mm_per_year": round(self.rate, 5),
+            "acceleration_mm_per_year2": round(self.acceleration, 6),
+            "center_age_years": round(self.center_age, 2),
+            "rate_std": round(float(np.sqrt(self.rate_var)), 5),
+            "rate_mean_se": round(float(np.sqrt(self.mean_var)), 5),
+            "noise_std_mm": round(float(np.sqrt(self.noise_var)), 4),
+        }
+
+
+def _band(value: Optional[float], edges: Tuple[int, ...], unit: str) -> str:
+    if value is None:
+        return ANY_BAND
+    lower = 0
+    for edge in edges:
+        if value <= edge:
+            return f"{lower}-{edge}{unit}"
+        lower = edge
+    return f">{lower}{unit}"
+
+
+def cohort_keys(material: str, diameter_mm: Optional[int], age_years: float) -> List[str]:
+    """Cohort keys of a pipe, from the most specific to the coarsest"""
+    material = material.lower()
+    diameter = _band(diameter_mm, DIAMETER_BANDS_MM, "mm")
+    age = _band(age_years, AGE_BANDS_YEARS, "y")
+
+    keys = [f"{material}/{diameter}/{age}"] if diameter != ANY_BAND else []
+    keys.append(f"{material}/{ANY_BAND}/{age}")
+    keys.append(f"{material}/{ANY_BAND}/{ANY_BAND}")
+    return keys
+
+
+class CohortTable:
+    """Fitted cohort curves, immutable once built (safe to share and pickle)"""
+
+    def __init__(self, curves: Dict[str, CohortCurve], version: int, pipes: int, fitted_at: float):
+        self.curves = curves
+        self.version = version
+        self.pipes = pipes
+        self.fitted_at = fitted_at
+
+    def lookup(
+        self,
+        material: str,
+        diameter_mm: Optional[int],
+        age_years: float,
+    ) -> Optional[Tuple[str, CohortCurve]]:
+        """Most specific cohort curve of a pipe, or None if no cohort is large enough"""
+        for key in cohort_keys(material, diameter_mm, age_years):
+            curve = self.curves.get(key)
+            if curve is not None:
+                return key, curve
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "pipes": self.pipes,
+            "fitted_at": self.fitted_at,
+            "cohorts": {key: curve.to_dict() for key, curve in sorted(self.curves.items())},
+        }
+
+
+def fit_table(
+    observations: List[Observation],
+    rates: np.ndarray,
+    rate_vars: np.ndarray,
+    noise_vars: np.ndarray,
+    version: int,
+) -> CohortTable:
+    """
+    Fit cohort curves from per-pipe corrosion rates.
+
+    Each pipe contributes to its cohort at every level of ``cohort_keys``.
+    Per cohort, the between-pipe variance comes from the DerSimonian-Laird
+    estimator and the rate's dependence on age from a weighted least squares
+    fit with weights 1 / (pipe variance + between-pipe variance).
+
+    Args:
+        observations: Pipes with a fitted trend
+        rates: Corrosion rate per pipe (mm/year, positive = loss)
+        rate_vars: Variance of each pipe's rate estimate
+        noise_vars: Residual variance of each pipe's fit (mm^2)
+        version: Version number of the new table
+
+    Returns:
+        CohortTable with every cohort of at least MIN_COHORT_PIPES pipes
+    """
+    keys = []
+    rows = []
+    for row, observation in enumerate(observations):
+        for key in cohort_keys(observation.material, observation.diameter_mm, observation.age_years):
+            keys.append(key)
+            rows.append(row)
+
+    if not keys:
+        return CohortTable({}, version, 0, time.time())
+
+    rows = np.array(rows)
+    names, inverse = np.unique(np.array(keys), return_inverse=True)
+    count = np.bincount(inverse)
+    rate = rates[rows]
+    var = np.maximum(rate_vars[rows], MIN_RATE_VAR)
+    age = np.array([observations[row].age_years for row in rows], dtype=float)
+
+    def sums(values: np.ndarray) -> np.ndarray:
+        return np.bincount(inverse, weights=values, minlength=len(names))
+
+    # Between-pipe variance (DerSimonian-Laird)
+    w = 1.0 / var
+    sw = sums(w)
+    swr = sums(w * rate)
+    q = sums(w * rate ** 2) - swr ** 2 / sw
+    c = sw - sums(w ** 2) / sw
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tau2 = np.where(c > 0, np.maximum((q - (count - 1)) / c, 0.0), 0.0)
+
+    # Rate at the cohort's mean age and its change with age
+    w = 1.0 / (var + tau2[inverse])
+    s0 = sums(w)
+    center = sums(w * age) / s0
+    mean_rate = sums(w * rate) / s0
+    age_var = sums(w * age ** 2) / s0 - center ** 2
+    covariance = sums(w * age * rate) / s0 - center * mean_rate
+    acceleration = np.where(age_var > MIN_AGE_VAR, covariance / np.maximum(age_var, MIN_AGE_VAR), 0.0)
+
+    # Typical measurement scatter per cohort
+    order = np.argsort(inverse, kind="stable")
+    noise = np.split(noise_vars[rows][order], np.cumsum(count)[:-1])
+
+    curves = {}
+    for idx, name in enumerate(names.tolist()):
+        if count[idx] < MIN_COHORT_PIPES:
+            continue
+        curves[name] = CohortCurve(
+            pipes=int(count[idx]),
+            rate=float(mean_rate[idx]),
+            acceleration=float(acceleration[idx]),
+            center_age=float(center[idx]),
+            rate_var=float(tau2[idx]),
+            mean_var=float(1.0 / s0[idx]),
+            noise_var=float(np.median(noise[idx])),
+        )
+
+    return CohortTable(curves, version, len(observations), time.time())
+
+
+def shrink_trends(
+    slope: np.ndarray,
+    covariance: np.ndarray,
+    fitted: np.ndarray,
+    prior_slope: np.ndarray,
+    prior_var: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combine each pipe's fitted slope with its cohort prior (normal-normal).
+
+    The posterior slope is ``prior + k * (fitted - prior)`` with
+    ``k = prior_var / (prior_var + slope_var)``: a long, clean history keeps
+    its own trend, a short or noisy one moves toward the cohort. The slope's
+    variance and its covariance with the intercept scale by ``k``. Pipes
+    without a fitted trend get the prior slope and variance.
+
+    Args:
+        slope: (pipes,) fitted slopes (mm/year, negative = loss)
+        covariance: (pipes, 2, 2) covariance of (intercept, slope)
+        fitted: (pipes,) whether the pipe has a fitted trend
+        prior_slope: (pipes,) cohort slope at the pipe's age
+        prior_var: (pipes,) prior variance of the pipe's slope
+
+    Returns:
+        Tuple of (posterior slope, posterior covariance)
+    """
+    slope_var = np.where(fitted, covariance[:, 1, 1], 0.0)
+    gain = np.where(fitted, prior_var / np.maximum(prior_var + slope_var, 1e-12), 0.0)
+
+    posterior_slope = np.where(fitted, prior_slope + gain * (slope - prior_slope), prior_slope)
+    posterior = covariance.copy()
+    posterior[:, 0, 1] *= gain
+    posterior[:, 1, 0] *= gain
+    posterior[:, 1, 1] = np.where(fitted, gain * slope_var, prior_var)
+    return posterior_slope, posterior
+
+
+def observation(request: PredictionRequest) -> Observation:
+    """Compact observation of a request (a fraction of the request's memory)"""
+    measurements = request.history_measurements
+    return Observation(
+        material=request.material.lower(),
+        diameter_mm=request.diameter_mm,
+        age_years=request.age_years,
+        days=np.fromiter((m.date.toordinal() for m in measurements), dtype=np.int64, count=len(measurements)),
+        values=np.fromiter((m.value for m in measurements), dtype=np.float64, count=len(measurements)),
+    )
+
+
+class CohortRegistry:
+    """
+    Fleet pipes seen by the engine and the cohort table fitted from them.
+
+    The latest request of every pipe (up to ``max_pipes``, least recently
+    seen evicted first) is kept in compact form. ``refit`` rebuilds the
+    table from all of them; the table in use is swapped atomically.
+    """
+
+    def __init__(self, max_pipes: int = 50000):
+        """
+        Initialize registry
+
+        Args:
+            max_pipes: Maximum number of pipes kept for refits
+        """
+        self.max_pipes = max_pipes
+        self.table: Optional[CohortTable] = None
+        self._observations: "OrderedDict[uuid.UUID, Observation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._refits = 0
+        self._last_refit_seconds: Optional[float] = None
+
+    def observe(self, requests: Iterable[PredictionRequest]) -> None:
+        """Remember the latest history of each pipe"""
+        observations = [(request.pipe_id, observation(request)) for request in requests]
+        with self._lock:
+            for pipe_id, item in observations:
+                self._observations.pop(pipe_id, None)
+                self._observations[pipe_id] = item
+            while len(self._observations) > self.max_pipes:
+                self._observations.popitem(last=False)
+                self._evicted += 1
+
+    def load_fleet(self, path: str) -> int:
+        """
+        Observe every pipe of a JSON Lines fleet export (one PredictionRequest per line).
+
+        Returns:
+            Number of pipes read
+        """
+        requests = []
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    requests.append(PredictionRequest.model_validate_json(line))
+        self.observe(requests)
+        return len(requests)
+
+    def refit(self, predictor: "PipeLifetimePredictor") -> CohortTable:
+        """Fit a new table from every observed pipe and start serving it"""
+        with self._lock:
+            observations = list(self._observations.values())
+        version = self.table.version + 1 if self.table is not None else 1
+
+        started = time.perf_counter()
+        table = predictor.fit_cohorts(observations, version)
+        self._last_refit_seconds = time.perf_counter() - started
+        self._refits += 1
+        self.table = table
+
+        logger.info(
+            f"Cohort table v{table.version} fitted: {len(table.curves)} cohorts from "
+            f"{table.pipes} pipes with a trend ({len(observations)} observed) "
+            f"in {self._last_refit_seconds:.2f}s"
+        )
+        return table
+
+    def stats(self) -> dict:
+        return {
+            "observed_pipes": len(self._observations),
+            "max_pipes": self.max_pipes,
+            "evicted": self._evicted,
+            "refits": self._refits,
+            "last_refit_seconds": round(self._last_refit_seconds, 3) if self._last_refit_seconds is not None else None,
+            "version": self.table.version if self.table is not None else None,
+            "cohorts": len(self.table.curves) if self.table is not None else 0,
+            "fitted_pipes": self.table.pipes if self.table is not None else 0,
+        }
@@ -0,0 +1,356 @@
+"""
+Prediction Executor - runs CPU-bound predictions off the asyncio event loop
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.schemas import PredictionRequest, YearlyPrediction
+from app.services.admission import AIMDLimiter
+from app.services.cohorts import CohortTable
+from app.services.predictor import PipeLifetimePredictor
+from app.services.profiling import STAGE_TOTAL, PredictionProfile, StageMetrics, TierLatency
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODE_INLINE = "inline"
+EXECUTION_MODE_PROCESS = "process"
+
+BatchOutcome = List[Union[List[YearlyPrediction], Exception]]
+ProfiledOutcome = Tuple[BatchOutcome, List[PredictionProfile]]
+
+
+class QueueFullError(Exception):
+    """Raised when the prediction queue is at capacity"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PredictionTimeoutError(Exception):
+    """Raised when a prediction does not finish within the configured timeout"""
+
+
+# Predictor instance owned by each worker process
+_worker_predictor: Optional[PipeLifetimePredictor] = None
+
+
+def _init_worker() -> None:
+    """Create and warm up the worker-local predictor once per worker process"""
+    global _worker_predictor
+    _worker_predictor = PipeLifetimePredictor()
+    _worker_predictor.warm_up()
+
+
+def _worker_ping() -> bool:
+    """No-op task; the first task on a worker waits for its initializer"""
+    return _worker_predictor is not None
+
+
+def _worker_predict_batch(
+    requests: List[PredictionRequest],
+    deadlines: List[Optional[float]],
+    tier_latency: Dict[str, float],
+    cohort_table: Optional[CohortTable],
+) -> ProfiledOutcome:
+    """Score a chunk of requests inside a worker process"""
+    outcomes, profiles = _worker_predictor.predict_batch_profiled(
+        requests, deadlines, tier_latency, cohort_table
+    )
+    # Not every exception (e.g. pydantic ValidationError) survives pickling,
+    # so failures cross the process boundary as plain RuntimeErrors.
+    return [
+        RuntimeError(str(outcome)) if isinstance(outcome, Exception) else outcome
+        for outcome in outcomes
+    ], profiles
+
+
+class PredictionExecutor:
+    """
+    Dispatches PipeLifetimePredictor work according to the execution mode.
+
+    In "process" mode predictions run in a pool of worker processes, so the
+    event loop stays responsive while Prophet/LSTM fits are running. At most
+    ``workers + max_queue`` tasks are accepted at once; further requests are
+    rejected with QueueFullError instead of piling up, which keeps tail latency
+    bounded by the number of cores rather than by the backlog. With adaptive
+    admission the limit moves between ``workers`` and that bound, driven by
+    how long tasks actually wait for a worker (see ``AIMDLimiter``).
+
+    In "inline" mode predictions run directly in the calling process.
+    """
+
+    def __init__(
+        self,
+        predictor: PipeLifetimePredictor,
+        mode: str = EXECUTION_MODE_PROCESS,
+        workers: int = 0,
+        max_queue: int = 64,
+        timeout: float = 25.0,
+        adaptive: bool = True,
+        target_queue_delay: float = 1.0,
+    ):
+        """
+        Initialize executor
+
+        Args:
+            predictor: Predictor used in inline mode
+            mode: "inline" or "process"
+            workers: Number of worker processes (0 = CPU count)
+            max_queue: Number of tasks allowed to wait for a free worker
+            timeout: Per-request timeout in seconds
+            adaptive: Adapt the concurrency limit to observed queueing delay
+            target_queue_delay: Queueing delay (seconds) the adaptive limit aims for
+        """
+        if mode not in (EXECUTION_MODE_INLINE, EXECUTION_MODE_PROCESS):
+            raise ValueError(f"Unknown prediction execution mode: {mode}")
+
+        self.predictor = predictor
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._deadline_fallbacks = 0
+        self.stage_metrics = StageMetrics()
+        # Learned here from every worker's timings and sent along with each chunk
+        self.tier_latency = TierLatency()
+        self.limiter: Optional[AIMDLimiter] = AIMDLimiter(
+            min_limit=self.workers,
+            max_limit=self.capacity,
+            target_delay=target_queue_delay,
+        ) if adaptive else None
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of tasks running or queued at once"""
+        return self.workers + self.max_queue
+
+    @property
+    def limit(self) -> int:
+        """Current number of tasks accepted at once (adaptive or fixed)"""
+        return self.limiter.limit if self.limiter is not None else self.capacity
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of tasks waiting for a free worker"""
+        return max(self._in_flight - self.workers, 0)
+
+    def start(self) -> None:
+        """Start worker processes (no-op in inline mode)"""
+        if self.mode != EXECUTION_MODE_PROCESS or self._pool is not None:
+            return
+
+        # Spawn instead of fork: torch and Stan are not fork-safe once threads exist
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        logger.info(
+            f"Prediction process pool started: {self.workers} workers, "
+            f"max queue {self.max_queue}, timeout {self.timeout}s"
+        )
+
+    async def warm_up(self) -> None:
+        """
+        Start every worker process and wait until each has warmed up.
+
+        In inline mode the predictor is warmed up in a background thread so
+        the event loop keeps serving /health meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.mode == EXECUTION_MODE_INLINE:
+            await loop.run_in_executor(None, self.predictor.warm_up)
+            return
+
+        if self._pool is None:
+            self.start()
+
+        # The main process only needs the artifact version, not a warm model
+        await loop.run_in_executor(None, self.predictor.load_models)
+        await asyncio.gather(*[
+            asyncio.wrap_future(self._pool.submit(_worker_ping), loop=loop)
+            for _ in range(self.workers)
+        ])
+
+    def shutdown(self) -> None:
+        """Stop worker processes, dropping queued tasks"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def predict_batch(
+        self,
+        requests: List[PredictionRequest],
+        deadlines: Optional[List[Optional[float]]] = None,
+        cohort_table: Optional[CohortTable] = None,
+    ) -> ProfiledOutcome:
+        """
+        Score requests without blocking the event loop.
+
+        In process mode the batch is split into one chunk per worker.
+        Stage timings of every request are recorded in ``stage_metrics`` and
+        ``tier_latency``, whose estimates pick the tier of requests with a
+        deadline.
+
+        Args:
+            requests: Prediction requests
+            deadlines: Absolute ``time.time()`` deadline per request (None = no deadline)
+            cohort_table: Cohort curves sent along with every chunk
+
+        Returns:
+            Tuple of (predictions or exceptions, timing profiles), both
+            aligned with ``requests``
+
+        Raises:
+            QueueFullError: If the queue cannot take the batch
+            PredictionTimeoutError: If the batch does not finish in time
+        """
+        deadlines = deadlines or [None] * len(requests)
+        tier_latency = self.tier_latency.snapshot()
+
+        if self.mode == EXECUTION_MODE_INLINE:
+            outcomes, profiles = self.predictor.predict_batch_profiled(
+                requests, deadlines, tier_latency, cohort_table
+            )
+            self._completed += 1
+            return outcomes, self._record(profiles)
+
+        if self._pool is None:
+            self.start()
+
+        chunk_size = max(math.ceil(len(requests) / self.workers), 1)
+        chunks = [
+            (requests[i:i + chunk_size], deadlines[i:i + chunk_size])
+            for i in range(0, len(requests), chunk_size)
+        ]
+
+        if self._in_flight + len(chunks) > self.limit:
+            self._rejected += 1
+            raise QueueFullError(
+                f"Prediction queue is full ({self._in_flight}/{self.limit} in flight, "
+                f"{self.queue_depth} queued)",
+                retry_after=self._retry_after(),
+            )
+
+        futures = [
+            self._submit(chunk, chunk_deadlines, tier_latency, cohort_table)
+            for chunk, chunk_deadlines in chunks
+        ]
+
+        deadline_wait = self._deadline_wait(deadlines)
+        try:
+            chunk_outcomes = await asyncio.wait_for(
+                asyncio.gather(*futures),
+                timeout=min(self.timeout, deadline_wait) if deadline_wait is not None else self.timeout,
+            )
+        except asyncio.TimeoutError:
+            # Queued chunks are cancelled; a chunk already running finishes in
+            # its worker and releases its slot when done.
+            if deadline_wait is not None and deadline_wait < self.timeout:
+                # Every deadline has passed while waiting for a worker, so
+                # answer from the theoretical tier right here
+                self._deadline_fallbacks += 1
+                outcomes, profiles = self.predictor.predict_batch_profiled(
+                    requests, deadlines, tier_latency, cohort_table
+                )
+                return outcomes, self._record(profiles)
+            self._timeouts += 1
+            raise PredictionTimeoutError(
+                f"Prediction did not finish within {self.timeout}s"
+            )
+
+        self._completed += 1
+        return (
+            [outcome for outcomes, _ in chunk_outcomes for outcome in outcomes],
+            self._record([profile for _, profiles in chunk_outcomes for profile in profiles]),
+        )
+
+    def _deadline_wait(self, deadlines: List[Optional[float]]) -> Optional[float]:
+        """Seconds to wait for workers, if every request has a deadline"""
+        if not deadlines or any(deadline is None for deadline in deadlines):
+            return None
+        # Leave the fallback the same reserve a worker keeps after Prophet
+        reserve = self.predictor.DEADLINE_RESERVE_SECONDS
+        return max(max(deadlines) - time.time() - reserve, 0.0)
+
+    def _record(self, profiles: List[PredictionProfile]) -> List[PredictionProfile]:
+        for profile in profiles:
+            self.stage_metrics.observe(profile)
+            self.tier_latency.observe(profile)
+        return profiles
+
+    def _submit(
+        self,
+        chunk: List[PredictionRequest],
+        deadlines: List[Optional[float]],
+        tier_latency: Dict[str, float],
+        cohort_table: Optional[CohortTable],
+    ) -> "asyncio.Future[ProfiledOutcome]":
+        """Submit a chunk to the pool, holding a queue slot until it completes"""
+        loop = asyncio.get_running_loop()
+
+        self._in_flight += 1
+        submitted = time.monotonic()
+        concurrent_future = self._pool.submit(
+            _worker_predict_batch, chunk, deadlines, tier_latency, cohort_table
+        )
+
+        def _release(future: Future) -> None:
+            elapsed = time.monotonic() - submitted
+            try:
+                loop.call_soon_threadsafe(self._release_slot, future, elapsed)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                pass
+
+        concurrent_future.add_done_callback(_release)
+        return asyncio.wrap_future(concurrent_future, loop=loop)
+
+    def _release_slot(self, future: Future, elapsed: float) -> None:
+        self._in_flight -= 1
+
+        if self.limiter is None or future.cancelled() or future.exception() is not None:
+            return
+        # Whatever the worker did not spend scoring was spent waiting for it
+        _, profiles = future.result()
+        service_time = sum(
+            profile.stages[STAGE_TOTAL]["wall"] for profile in profiles if STAGE_TOTAL in profile.stages
+        )
+        self.limiter.on_sample(max(elapsed - service_time, 0.0), service_time, self._in_flight)
+
+    def _retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying"""
+        if self.limiter is None:
+            return 1
+        return self.limiter.retry_after(self._in_flight, self.workers)
+
+    def stats(self) -> dict:
+        """Execution statistics for sizing the pool and queue"""
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.mode == EXECUTION_MODE_PROCESS else 0,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "limit": self.limit,
+            "queue_depth": self.queue_depth,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "deadline_fallbacks": self._deadline_fallbacks,
+            "timeout_seconds": self.timeout,
+            "admission": self.limiter.stats() if self.limiter is not None else None,
+        }
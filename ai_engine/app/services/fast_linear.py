@@ -0,0 +1,242 @@
+"""
+Fast linear degradation fits - closed-form scoring for fleet-scale runs
+
+Every pipe's history is fitted with a recency-weighted, Huber-robust linear
+trend. All pipes are stacked into padded (pipes x measurements) arrays, so a
+whole fleet is fitted with a handful of NumPy reductions and no per-pipe
+model fitting.
+"""
+import warnings
+from typing import List, Tuple
+
+import numpy as np
+
+# Measurements lose half their weight every HALF_LIFE_YEARS, so the fit
+# follows recent (typically faster) corrosion
+HALF_LIFE_YEARS = 5.0
+
+# Huber threshold in robust standard deviations
+HUBER_K = 1.345
+
+# Floor for the residual standard deviation (ultrasonic gauge noise, mm)
+MIN_RESIDUAL_STD = 0.1
+
+# Mean calendar year, for converting between days and years
+DAYS_PER_YEAR = 365.25
+
+
+def stack_histories(
+    histories: List[Tuple[np.ndarray, np.ndarray]],
+    reference_day: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Right-pad per-pipe histories into dense arrays.
+
+    Args:
+        histories: (dates datetime64[D], values) per pipe
+        reference_day: Day number (days since epoch) that becomes t = 0
+
+    Returns:
+        Tuple of (years relative to reference, values, validity mask), each
+        with shape (pipes, longest history)
+    """
+    width = max((len(values) for _, values in histories), default=0)
+    years = np.zeros((len(histories), max(width, 1)))
+    values = np.zeros_like(years)
+    mask = np.zeros_like(years, dtype=bool)
+
+    for row, (dates, vals) in enumerate(histories):
+        n = len(vals)
+        years[row, :n] = (dates.astype(np.int64) - reference_day) / DAYS_PER_YEAR
+        values[row, :n] = vals
+        mask[row, :n] = True
+
+    return years, values, mask
+
+
+def fit_linear_trends(
+    years: np.ndarray,
+    values: np.ndarray,
+    mask: np.ndarray,
+    non_increasing: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Weighted, Huber-robust linear fit of thickness over time for many pipes.
+
+    Args:
+        years: (pipes, n) measurement times in years relative to t = 0
+        values: (pipes, n) thickness values
+        mask: (pipes, n) True for real (non-padding) measurements
+        non_increasing: Fit pipes whose trend rises with a flat trend at the
+            weighted mean of their values instead (wall thickness does not
+            grow, so a rise is measurement noise; extrapolating it would
+            lift the level at t = 0 above the readings)
+
+    Returns:
+        Tuple of (intercept at t = 0, slope per year, 2x2 parameter
+        covariance per pipe with shape (pipes, 2, 2), residual variance,
+        fitted flag). Pipes with fewer than two distinct measurement dates
+        are not fitted.
+    """
+    counts = mask.sum(axis=1)
+    latest = np.where(mask, years, -np.inf).max(axis=1, initial=-np.inf)
+    latest = np.where(counts > 0, latest, 0.0)
+    recency = np.where(mask, 0.5 ** ((latest[:, None] - years) / HALF_LIFE_YEARS), 0.0)
+
+    intercept, slope, det, sums = _weighted_fit(years, values, recency)
+
+    # One Huber reweighting step against outlier readings
+    residuals = np.where(mask, values - (intercept[:, None] + slope[:, None] * years), 0.0)
+    scale = 1.4826 * _masked_median(np.abs(residuals), mask)
+    scale = np.maximum(scale, MIN_RESIDUAL_STD)
+    ratio = np.abs(residuals) / (HUBER_K * scale[:, None])
+    weights = recency * np.minimum(1.0, 1.0 / np.maximum(ratio, 1e-12))
+
+    intercept, slope, det, sums = _weighted_fit(years, values, weights)
+    s0, s1, s2 = sums
+
+    rising = (slope > 0) if non_increasing else np.zeros(len(values), dtype=bool)
+    level = (weights * values).sum(axis=1) / np.maximum(s0, 1e-12)
+    intercept = np.where(rising, level, intercept)
+    slope = np.where(rising, 0.0, slope)
+
+    # Residual variance with weights normalized to the number of points
+    residuals = np.where(mask, values - (intercept[:, None] + slope[:, None] * years), 0.0)
+    normalized = weights * (counts / np.maximum(s0, 1e-12))[:, None]
+    dof = np.maximum(counts - 2, 1)
+    residual_var = np.maximum((normalized * residuals ** 2).sum(axis=1) / dof, MIN_RESIDUAL_STD ** 2)
+
+    # Parameter covariance: residual_var * (X'WX)^-1 with normalized weights
+    factor = counts / np.maximum(s0, 1e-12)
+    n0, n1, n2 = s0 * factor, s1 * factor, s2 * factor
+    ndet = np.where(det > 0, n0 * n2 - n1 ** 2, 1.0)
+    covariance = np.empty((len(values), 2, 2))
+    covariance[:, 0, 0] = residual_var * n2 / ndet
+    covariance[:, 0, 1] = covariance[:, 1, 0] = -residual_var * n1 / ndet
+    covariance[:, 1, 1] = residual_var * n0 / ndet
+    # A flat trend's level is a weighted mean, uncorrelated with the slope
+    covariance[rising, 0, 0] = residual_var[rising] / np.maximum(n0[rising], 1e-12)
+    covariance[rising, 0, 1] = covariance[rising, 1, 0] = 0.0
+
+    fitted = (counts >= 2) & (det > 1e-9 * np.maximum(s0, 1e-12) ** 2)
+    return intercept, slope, covariance, residual_var, fitted
+
+
+def forecast(
+    intercept: np.ndarray,
+    slope: np.ndarray,
+    covariance: np.ndarray,
+    residual_var: np.ndarray,
+    year_offsets: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Analytic forecast at year offsets from t = 0.
+
+    The standard deviation combines trend uncertainty with the residual
+    scatter around the trend (a prediction interval, not just a confidence
+    interval of the mean).
+
+    Returns:
+        Tuple of (expected thickness, standard deviation), each (pipes, offsets)
+    """
+    k = np.asarray(year_offsets, dtype=float)[None, :]
+    mean = intercept[:, None] + slope[:, None] * k
+    variance = (
+        covariance[:, 0, 0][:, None]
+        + 2 * k * covariance[:, 0, 1][:, None]
+        + k ** 2 * covariance[:, 1, 1][:, None]
+        + residual_var[:, None]
+    )
+    return mean, np.sqrt(np.maximum(variance, 0.0))
+
+
+def crossing_times(
+    intercept: np.ndarray,
+    slope: np.ndarray,
+    covariance: np.ndarray,
+    residual_var: np.ndarray,
+    threshold: float,
+    z: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Years from t = 0 until the trend crosses ``threshold``, solved in closed form.
+
+    The expected crossing is where the mean reaches the threshold. The
+    interval comes from the band mean -/+ z * std of ``forecast``: the
+    earliest date is where the lower edge first reaches the threshold, the
+    latest where the upper edge does. Squaring ``mean - threshold = -/+ z * std``
+    gives one quadratic per pipe whose roots are split between the two edges
+    by the sign of ``mean - threshold``.
+
+    Args:
+        intercept, slope, covariance, residual_var: Trend from ``fit_linear_trends``
+            (slope <= 0 for thinning walls)
+        threshold: Wall thickness (mm) to reach
+        z: Standard normal quantile of the interval
+
+    Returns:
+        Tuple of (expected, earliest, latest) years per pipe; 0 if already
+        crossed at t = 0, inf if never crossed
+    """
+    margin = intercept - threshold
+    base_var = covariance[:, 0, 0] + residual_var
+    cross_var = covariance[:, 0, 1]
+    slope_var = covariance[:, 1, 1]
+
+    safe_slope = np.where(slope < 0, slope, -1.0)
+    expected = np.where(slope < 0, margin / -safe_slope, np.inf)
+    expected = np.where(margin <= 0, 0.0, expected)
+
+    # (margin + slope * t)^2 = z^2 * (base_var + 2 * cross_var * t + slope_var * t^2)
+    a = slope ** 2 - z ** 2 * slope_var
+    b = 2 * (margin * slope - z ** 2 * cross_var)
+    c = margin ** 2 - z ** 2 * base_var
+
+    quadratic = np.abs(a) > 1e-12
+    safe_a = np.where(quadratic, a, 1.0)
+    discriminant = b ** 2 - 4 * a * c
+    root = np.sqrt(np.maximum(discriminant, 0.0))
+    real = ~quadratic | (discriminant >= 0)
+
+    safe_b = np.where(b != 0, b, 1.0)
+    linear_root = np.where(b != 0, -c / safe_b, np.inf)
+    roots = np.stack([
+        np.where(quadratic, (-b - root) / (2 * safe_a), linear_root),
+        np.where(quadratic, (-b + root) / (2 * safe_a), np.inf),
+    ], axis=1)
+    roots = np.where(real[:, None] & (roots >= 0), roots, np.inf)
+
+    # Above the threshold only the lower edge can touch it, below only the upper
+    above = margin[:, None] + slope[:, None] * np.where(np.isfinite(roots), roots, 0.0) >= 0
+    earliest = np.where(above, roots, np.inf).min(axis=1)
+    latest = np.where(~above, roots, np.inf).min(axis=1)
+
+    spread = z * np.sqrt(np.maximum(base_var, 0.0))
+    earliest = np.where(margin - spread <= 0, 0.0, earliest)
+    latest = np.where(margin + spread <= 0, 0.0, latest)
+    return expected, earliest, latest
+
+
+def _weighted_fit(years: np.ndarray, values: np.ndarray, weights: np.ndarray) -> tuple:
+    """Closed-form weighted least squares per row; rows with det == 0 get zeros"""
+    s0 = weights.sum(axis=1)
+    s1 = (weights * years).sum(axis=1)
+    s2 = (weights * years ** 2).sum(axis=1)
+    sy = (weights * values).sum(axis=1)
+    sxy = (weights * years * values).sum(axis=1)
+
+    det = s0 * s2 - s1 ** 2
+    safe_det = np.where(det > 0, det, 1.0)
+    slope = np.where(det > 0, (s0 * sxy - s1 * sy) / safe_det, 0.0)
+    intercept = np.where(s0 > 0, (sy - slope * s1) / np.where(s0 > 0, s0, 1.0), 0.0)
+    return intercept, slope, det, (s0, s1, s2)
+
+
+def _masked_median(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Row-wise median over masked entries (0 for empty rows)"""
+    filled = np.where(mask, values, np.nan)
+    with warnings.catch_warnings():
+        # Rows without measurements are all-NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(filled, axis=1)
+    return np.nan_to_num(median)
@@ -0,0 +1,381 @@
+"""
+LSTM model and versioned weight artifacts
+"""
+import logging
+import os
+import warnings
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+# Use last 3 measurements to predict the next one
+SEQUENCE_LENGTH = 3
+
+# Architecture used for serving: 1 input -> 16 hidden -> 1 output
+HIDDEN_SIZE = 16
+NUM_LAYERS = 1
+
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_PREFIX = "lstm-"
+ARTIFACT_SUFFIX = ".pt"
+
+# Inference modes
+# "eager": the float LSTMModel as trained
+# "torchscript": scripted float model (same numerics, less Python overhead)
+# "quantized": scripted model with dynamic int8 LSTM/Linear weights (CPU only)
+INFERENCE_EAGER = "eager"
+INFERENCE_TORCHSCRIPT = "torchscript"
+INFERENCE_QUANTIZED = "quantized"
+INFERENCE_MODES = (INFERENCE_EAGER, INFERENCE_TORCHSCRIPT, INFERENCE_QUANTIZED)
+
+# Seeded normalized windows used to check optimized models against the float model
+VALIDATION_WINDOWS = 256
+VALIDATION_STEPS = 5
+
+
+class LSTMModel(nn.Module):
+    """Simple LSTM for time series prediction"""
+
+    def __init__(self, input_size=1, hidden_size=32, num_layers=2, output_size=1):
+        super(LSTMModel, self).__init__()
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
+        self.fc = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x, lengths: Optional[torch.Tensor] = None):
+        # x shape: (batch, seq_len, input_size)
+        # lengths: valid steps per row when rows are right-padded to seq_len
+        if lengths is None or bool((lengths == x.size(1)).all()):
+            lstm_out, _ = self.lstm(x)
+            # Take the last output
+            last_output = lstm_out[:, -1, :]
+        else:
+            packed = nn.utils.rnn.pack_padded_sequence(
+                x, lengths.cpu(), batch_first=True, enforce_sorted=False
+            )
+            packed_out, _ = self.lstm(packed)
+            lstm_out, _ = nn.utils.rnn.pad_packed_sequence(packed_out, batch_first=True)
+            # Take the last valid output of each row
+            rows = torch.arange(x.size(0), device=x.device)
+            last_output = lstm_out[rows, lengths.to(x.device) - 1, :]
+        output = self.fc(last_output)
+        return output
+
+
+class LSTMArtifact:
+    """Pretrained LSTM weights loaded from a versioned artifact"""
+
+    def __init__(
+        self,
+        model: nn.Module,
+        version: str,
+        metadata: dict,
+        inference_mode: str = INFERENCE_EAGER,
+        max_abs_error: float = 0.0,
+    ):
+        self.model = model
+        self.version = version
+        self.metadata = metadata
+        self.inference_mode = inference_mode
+        # Largest deviation from the float model on the validation rollout
+        self.max_abs_error = max_abs_error
+
+    @property
+    def seq_length(self) -> int:
+        return self.metadata.get("seq_length", SEQUENCE_LENGTH)
+
+
+def normalize_history(values: np.ndarray) -> Tuple[np.ndarray, float, float]:
+    """
+    Normalize a single pipe's thickness history.
+
+    Each pipe is normalized by its own mean and std, both for fleet-wide
+    training and for inference, so one model can serve every pipe.
+
+    Returns:
+        Tuple of (normalized values, mean, std)
+    """
+    mean_val = values.mean()
+    std_val = values.std() + 1e-8
+    return (values - mean_val) / std_val, mean_val, std_val
+
+
+def build_sequences(
+    normalized: np.ndarray,
+    seq_length: int = SEQUENCE_LENGTH,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build (window -> next value) training pairs from a normalized history.
+
+    Returns:
+        Tuple of X with shape (n, seq_length, 1) and y with shape (n, 1)
+    """
+    X = []
+    y = []
+    for i in range(len(normalized) - seq_length):
+        X.append(normalized[i:i+seq_length])
+        y.append(normalized[i+seq_length])
+
+    if not X:
+        return np.empty((0, seq_length, 1)), np.empty((0, 1))
+
+    return (
+        np.array(X, dtype=np.float32).reshape(-1, seq_length, 1),
+        np.array(y, dtype=np.float32).reshape(-1, 1),
+    )
+
+
+def rollout(
+    model: nn.Module,
+    windows: List[np.ndarray],
+    steps: int,
+    device: Optional[torch.device] = None,
+) -> np.ndarray:
+    """
+    Autoregressive forecast for many pipes in one batched forward pass per step.
+
+    Windows of different lengths are right-padded into a single
+    (N, max_len, 1) tensor; the model reads each row only up to its length.
+    After every step each window drops its oldest value and appends the
+    prediction, exactly like the single-pipe rollout.
+
+    Args:
+        model: Model in eval mode
+        windows: Normalized last-window values per pipe
+        steps: Number of future steps to forecast
+        device: Device to run on
+
+    Returns:
+        Normalized predictions with shape (N, steps)
+    """
+    num_rows = len(windows)
+    lengths = torch.tensor([len(w) for w in windows], dtype=torch.long)
+    max_len = int(lengths.max())
+
+    x = torch.zeros(num_rows, max_len)
+    for row, window in enumerate(windows):
+        x[row, :len(window)] = torch.as_tensor(window, dtype=torch.float32)
+    x = x.to(device or "cpu")
+
+    rows = torch.arange(num_rows, device=x.device)
+    last_idx = (lengths - 1).to(x.device)
+    # Index map that shifts every row left by one position
+    shift_idx = (torch.arange(1, max_len + 1).clamp(max=max_len - 1)
+                 .expand(num_rows, -1).to(x.device))
+
+    outputs = torch.empty(num_rows, steps)
+    with torch.no_grad():
+        for step in range(steps):
+            pred = model(x.unsqueeze(-1), lengths)[:, 0]
+            outputs[:, step] = pred.cpu()
+
+            # Slide each window: drop the oldest value, append the prediction
+            x = x.gather(1, shift_idx)
+            x[rows, last_idx] = pred
+
+    return outputs.numpy()
+
+
+def validation_windows(seq_length: int = SEQUENCE_LENGTH, seed: int = 0) -> List[np.ndarray]:
+    """Seeded normalized windows of every length the predictor feeds the model"""
+    rng = np.random.default_rng(seed)
+    return [
+        rng.normal(size=int(rng.integers(2, seq_length + 1))).astype(np.float32)
+        for _ in range(VALIDATION_WINDOWS)
+    ]
+
+
+def optimize_for_inference(
+    model: LSTMModel,
+    mode: str,
+    tolerance: float,
+    seq_length: int = SEQUENCE_LENGTH,
+    device: Optional[torch.device] = None,
+) -> Tuple[nn.Module, str, float]:
+    """
+    Build the serving module for an inference mode.
+
+    TorchScript keeps float numerics. Dynamic int8 quantization of the LSTM
+    and Linear layers is checked against the float model on a seeded
+    validation rollout; if the largest deviation exceeds ``tolerance`` (in
+    normalized units, i.e. per-pipe standard deviations) the float model is
+    served instead.
+
+    Args:
+        model: Float LSTMModel in eval mode
+        mode: One of INFERENCE_MODES
+        tolerance: Maximum absolute deviation allowed for the quantized model
+        seq_length: Window length the model was trained on
+        device: Device the model runs on
+
+    Returns:
+        Tuple of (serving module, effective mode, max absolute deviation)
+    """
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown LSTM inference mode: {mode}")
+
+    if mode == INFERENCE_EAGER:
+        return model, INFERENCE_EAGER, 0.0
+
+    if mode == INFERENCE_QUANTIZED and device is not None and device.type != "cpu":
+        logger.warning(f"Dynamic int8 quantization is CPU-only; serving TorchScript on {device}")
+        mode = INFERENCE_TORCHSCRIPT
+
+    try:
+        candidate = model
+        if mode == INFERENCE_QUANTIZED:
+            with warnings.catch_warnings():
+                # Eager-mode quantization APIs emit deprecation notices
+                warnings.simplefilter("ignore")
+                candidate = torch.ao.quantization.quantize_dynamic(
+                    model, {nn.LSTM, nn.Linear}, dtype=torch.qint8
+                )
+        candidate = torch.jit.script(candidate)
+    except Exception as e:
+        logger.warning(f"LSTM {mode} export failed ({e}); serving the eager model")
+        return model, INFERENCE_EAGER, 0.0
+
+    windows = validation_windows(seq_length)
+    reference = rollout(model, windows, VALIDATION_STEPS, device)
+    optimized = rollout(candidate, windows, VALIDATION_STEPS, device)
+    max_abs_error = float(np.abs(optimized - reference).max())
+
+    if max_abs_error > tolerance:
+        logger.warning(
+            f"LSTM {mode} model deviates by {max_abs_error:.4f} "
+            f"(tolerance {tolerance}); serving the eager model"
+        )
+        return model, INFERENCE_EAGER, 0.0
+
+    return candidate, mode, max_abs_error
+
+
+def artifact_path(model_dir: str, version: str) -> str:
+    """Path of the artifact file for a version"""
+    return os.path.join(model_dir, f"{ARTIFACT_PREFIX}{version}{ARTIFACT_SUFFIX}")
+
+
+def save_artifact(model: LSTMModel, model_dir: str, version: str, training: dict) -> str:
+    """
+    Save trained weights as a versioned artifact.
+
+    Args:
+        model: Trained LSTMModel
+        model_dir: Directory holding artifacts
+        version: Artifact version (e.g. "2024.06.01")
+        training: Training statistics stored alongside the weights
+
+    Returns:
+        Path of the written artifact
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    path = artifact_path(model_dir, version)
+
+    torch.save({
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "metadata": {
+            "input_size": 1,
+            "hidden_size": model.hidden_size,
+            "num_layers": model.num_layers,
+            "seq_length": SEQUENCE_LENGTH,
+            "training": training,
+        },
+        "state_dict": model.state_dict(),
+    }, path)
+
+    return path
+
+
+def list_artifact_versions(model_dir: str) -> List[str]:
+    """Versions of all artifacts in a directory, oldest first"""
+    if not os.path.isdir(model_dir):
+        return []
+
+    versions = [
+        name[len(ARTIFACT_PREFIX):-len(ARTIFACT_SUFFIX)]
+        for name in os.listdir(model_dir)
+        if name.startswith(ARTIFACT_PREFIX) and name.endswith(ARTIFACT_SUFFIX)
+    ]
+    return sorted(versions)
+
+
+def load_artifact(
+    model_dir: str,
+    version: Optional[str] = None,
+    device: Optional[torch.device] = None,
+    inference_mode: str = INFERENCE_EAGER,
+    tolerance: float = 0.15,
+) -> Optional[LSTMArtifact]:
+    """
+    Load a pretrained LSTM artifact for inference.
+
+    Args:
+        model_dir: Directory holding artifacts
+        version: Artifact version to load (latest if not set)
+        device: Device to place the model on
+        inference_mode: One of INFERENCE_MODES (see optimize_for_inference)
+        tolerance: Maximum deviation allowed for the quantized model
+
+    Returns:
+        LSTMArtifact in eval mode, or None if no artifact is available
+    """
+    if not version:
+        versions = list_artifact_versions(model_dir)
+        if not versions:
+            logger.warning(f"No LSTM artifact found in {model_dir}; LSTM branch disabled")
+            return None
+        version = versions[-1]
+
+    path = artifact_path(model_dir, version)
+    if not os.path.exists(path):
+        logger.warning(f"LSTM artifact {path} not found; LSTM branch disabled")
+        return None
+
+    checkpoint = torch.load(path, map_location=device or "cpu", weights_only=True)
+
+    if checkpoint.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        logger.warning(
+            f"Unsupported LSTM artifact format {checkpoint.get('format_version')} "
+            f"in {path}; LSTM branch disabled"
+        )
+        return None
+
+    metadata = checkpoint["metadata"]
+    model = LSTMModel(
+        input_size=metadata["input_size"],
+        hidden_size=metadata["hidden_size"],
+        num_layers=metadata["num_layers"],
+    )
+    model.load_state_dict(checkpoint["state_dict"])
+    if device is not None:
+        model = model.to(device)
+    model.eval()
+
+    serving_model, effective_mode, max_abs_error = optimize_for_inference(
+        model,
+        inference_mode,
+        tolerance,
+        seq_length=metadata.get("seq_length", SEQUENCE_LENGTH),
+        device=device,
+    )
+
+    logger.info(
+        f"Loaded LSTM artifact version {checkpoint['version']} from {path} "
+        f"({effective_mode} inference, max deviation {max_abs_error:.4f})"
+    )
+    return LSTMArtifact(
+        serving_model,
+        checkpoint["version"],
+        metadata,
+        inference_mode=effective_mode,
+        max_abs_error=max_abs_error,
+    )
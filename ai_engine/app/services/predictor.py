@@ -1,37 +1,57 @@
 """
 Pipe Lifetime Predictor - Hybrid Model (Prophet + LSTM)
+
+Heavy libraries (pandas, prophet, torch) are imported lazily by
+``load_models()`` so the service can start listening before they are loaded.
 """
+import logging
 import math
+import threading
+import time
+import uuid
 import numpy as np
-import pandas as pd
-from typing import List, Tuple, Optional, Dict
+from typing import TYPE_CHECKING, List, Tuple, Optional, Dict, Union
 from datetime import date, datetime, timedelta
-from prophet import Prophet
-import torch
-import torch.nn as nn
-from sklearn.metrics import mean_squared_error
 
-from app.schemas import PredictionRequest, YearlyPrediction
+from app.core.config import settings
+from app.schemas import (
+    PREDICTION_MODE_COHORT,
+    PREDICTION_MODE_FAST,
+    IncrementalPredictionRequest,
+    MeasurementHistory,
+    PipeLifetime,
+    PredictionRequest,
+    ThresholdCrossing,
+    TrackerState,
+    YearlyPrediction,
+)
+from app.services import cohorts, fast_linear, kalman
+from app.services.prophet_params import ProphetParamStore, extract_params, warm_start_init
+from app.services.profiling import (
+    STAGE_COHORT,
+    STAGE_ENSEMBLE,
+    STAGE_FAST,
+    STAGE_LOAD,
+    STAGE_LSTM,
+    STAGE_PREPARE,
+    STAGE_PROPHET,
+    STAGE_THEORETICAL,
+    STAGE_TOTAL,
+    PredictionProfile,
+    shared_stage,
+)
+
+if TYPE_CHECKING:
+    from app.services.lstm import LSTMArtifact
 
+logger = logging.getLogger(__name__)
 
-class LSTMModel(nn.Module):
-    """Simple LSTM for time series prediction"""
-    
-    def __init__(self, input_size=1, hidden_size=32, num_layers=2, output_size=1):
-        super(LSTMModel, self).__init__()
-        self.hidden_size = hidden_size
-        self.num_layers = num_layers
-        
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
-        self.fc = nn.Linear(hidden_size, output_size)
-        
-    def forward(self, x):
-        # x shape: (batch, seq_len, input_size)
-        lstm_out, _ = self.lstm(x)
-        # Take the last output
-        last_output = lstm_out[:, -1, :]
-        output = self.fc(last_output)
-        return output
+# Measurement history as (dates datetime64[D], values float64), sorted by date
+History = Tuple[np.ndarray, np.ndarray]
+
+_EMPTY_DATES = np.empty(0, dtype="datetime64[D]")
+_EMPTY_VALUES = np.empty(0, dtype=np.float64)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
 
 class PipeLifetimePredictor:
@@ -56,9 +76,135 @@ class PipeLifetimePredictor:
     PROPHET_WEIGHT = 0.4
     LSTM_WEIGHT = 0.6
     
-    def __init__(self):
-        """Initialize predictor"""
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    # Forecast horizon (years)
+    HORIZON_YEARS = 5
+    
+    # Identifies the Prophet configuration in warm-start keys; bump when
+    # the Prophet settings below change
+    PROPHET_CONFIG_VERSION = "linear-cps0.05-v1"
+    
+    # Model branches
+    BRANCH_HYBRID = "hybrid"
+    BRANCH_PROPHET = "prophet"
+    BRANCH_THEORETICAL = "theoretical"
+    BRANCH_FAST = "fast"
+    BRANCH_COHORT = "cohort"
+    
+    # Branches from richest to cheapest, for falling back under a deadline
+    TIER_ORDER = [BRANCH_HYBRID, BRANCH_PROPHET, BRANCH_THEORETICAL]
+    
+    # Time kept free after a Prophet fit for its forecast, the ensemble and
+    # response building (seconds)
+    DEADLINE_RESERVE_SECONDS = 0.1
+    
+    # Pipes fitted together per chunk when refitting cohort curves
+    COHORT_FIT_CHUNK = 4096
+    
+    # Reported as the LSTM inference mode when per-pipe training is enabled
+    PER_PIPE_LSTM_MODE = "per-pipe"
+    
+    def __init__(self, load_lstm: bool = True):
+        """
+        Initialize predictor (cheap: no heavy imports, no model loading)
+        
+        Args:
+            load_lstm: Load the pretrained LSTM artifact (disable for offline training)
+        """
+        self.load_lstm = load_lstm
+        self.per_pipe_lstm = settings.LSTM_PER_PIPE_TRAINING
+        self.device = None
+        self.lstm_artifact: Optional["LSTMArtifact"] = None
+        self._models_loaded = False
+        self._load_lock = threading.Lock()
+        self.prophet_params: Optional[ProphetParamStore] = ProphetParamStore(
+            max_entries=settings.PROPHET_PARAMS_MAX_ENTRIES,
+            disk_path=settings.PROPHET_PARAMS_DISK_PATH or None,
+        ) if settings.PROPHET_WARM_START_ENABLED else None
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether heavy libraries and model artifacts are loaded"""
+        return self._models_loaded
+    
+    @property
+    def lstm_version(self) -> Optional[str]:
+        """Version of the LSTM artifact being served, if any"""
+        return self.lstm_artifact.version if self.lstm_artifact else None
+    
+    @property
+    def lstm_inference_mode(self) -> Optional[str]:
+        """Inference mode actually serving the LSTM (after any fallback)"""
+        if self.per_pipe_lstm:
+            return self.PER_PIPE_LSTM_MODE
+        return self.lstm_artifact.inference_mode if self.lstm_artifact else None
+    
+    def load_models(self) -> None:
+        """
+        Import heavy libraries and load the LSTM artifact.
+        
+        Idempotent and thread-safe; called by warm-up in the background and
+        on first use otherwise.
+        """
+        if self._models_loaded:
+            return
+        
+        with self._load_lock:
+            if self._models_loaded:
+                return
+            
+            import pandas  # noqa: F401
+            import prophet  # noqa: F401
+            import torch
+            from app.services.lstm import load_artifact
+            
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+            # Per-pipe training does not use the pretrained artifact
+            if self.load_lstm and not self.per_pipe_lstm:
+                self.lstm_artifact = load_artifact(
+                    settings.LSTM_MODEL_DIR,
+                    settings.LSTM_MODEL_VERSION or None,
+                    device=self.device,
+                    inference_mode=settings.LSTM_INFERENCE_MODE,
+                    tolerance=settings.LSTM_QUANTIZATION_TOLERANCE,
+                )
+            self._models_loaded = True
+    
+    def warm_up(self) -> float:
+        """
+        Load models and run one synthetic hybrid prediction.
+        
+        The synthetic pipe has enough history for the full hybrid branch, so
+        Stan model initialization and torch kernels are paid here rather
+        than by the first real request.
+        
+        Returns:
+            Warm-up duration in seconds
+        """
+        started = time.perf_counter()
+        self.load_models()
+        self.predict(self._warmup_request())
+        elapsed = time.perf_counter() - started
+        logger.info(f"Predictor warm-up completed in {elapsed:.2f}s")
+        return elapsed
+    
+    def _warmup_request(self) -> PredictionRequest:
+        """Synthetic steel pipe with 8 half-yearly measurements"""
+        today = date.today()
+        history = [
+            MeasurementHistory(
+                date=today - timedelta(days=182 * (7 - i)),
+                value=20.0 - 0.15 * i,
+            )
+            for i in range(8)
+        ]
+        return PredictionRequest(
+            pipe_id=uuid.UUID(int=0),
+            material="steel",
+            age_years=10,
+            current_wall_thickness=19.0,
+            corrosion_rate_historical=0.3,
+            history_measurements=history,
+        )
     
     def predict(self, features: PredictionRequest) -> List[YearlyPrediction]:
         """
@@ -68,142 +214,814 @@ class PipeLifetimePredictor:
         If 3-4 points, uses Prophet only.
         Otherwise, uses theoretical degradation rate.
         """
-        predictions = []
+        result = self.predict_batch([features])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def predict_batch(
+        self,
+        requests: List[PredictionRequest],
+    ) -> List[Union[List[YearlyPrediction], Exception]]:
+        """
+        Generate 5-year predictions for many pipes at once.
         
-        # 1. Prepare Data
-        df = self._prepare_dataframe(features)
+        Requests are grouped by the branch their history selects (hybrid,
+        Prophet-only or theoretical), or the fast branch for requests in
+        "fast" mode, and each group is scored together.
+        A failing item does not affect the rest of the batch: its slot in
+        the returned list holds the exception instead of predictions.
         
-        current_age = features.age_years
-        current_thickness = features.current_wall_thickness
+        Args:
+            requests: Prediction requests to score
+            
+        Returns:
+            List aligned with ``requests`` of predictions or exceptions
+        """
+        return self.predict_batch_profiled(requests)[0]
+    
+    def predict_batch_profiled(
+        self,
+        requests: List[PredictionRequest],
+        deadlines: Optional[List[Optional[float]]] = None,
+        tier_latency: Optional[Dict[str, float]] = None,
+        cohort_table: Optional[cohorts.CohortTable] = None,
+    ) -> Tuple[List[Union[List[YearlyPrediction], Exception]], List[PredictionProfile]]:
+        """
+        Same as ``predict_batch`` but also returns a timing profile per request.
+        
+        Each profile records the branch taken, the usable history length and
+        wall/CPU time per stage. Work done for a whole branch group at once
+        (LSTM rollout, ensembling) is split evenly across the group.
+        
+        A request with a deadline gets the richest branch its history allows
+        whose latency estimate fits the remaining time. A Prophet fit that
+        would overrun the deadline is abandoned and the pipe falls back to
+        the theoretical rate; ``profile.tier`` tells which tier answered.
         
-        # 2. Generate predictions based on data availability
-        if len(df) >= 5:
-            # Full hybrid model
-            prophet_pred = self._prophet_predict(df, current_age)
-            lstm_pred = self._lstm_predict(df, current_age, current_thickness)
+        With a cohort table, pipes that would get the bare theoretical rate
+        are scored on their cohort's curve instead (tier "cohort").
+        
+        Args:
+            requests: Prediction requests to score
+            deadlines: Absolute ``time.time()`` deadline per request (None = no deadline)
+            tier_latency: Expected wall seconds per branch (see ``TierLatency``)
+            cohort_table: Fitted cohort curves (see ``cohorts.CohortRegistry``)
+        
+        Returns:
+            Tuple of (predictions or exceptions, profiles), both aligned with ``requests``
+        """
+        deadlines = deadlines or [None] * len(requests)
+        tier_latency = tier_latency or {}
+        profiles = [PredictionProfile() for _ in requests]
+        results: List[Union[List[YearlyPrediction], Exception, None]] = [None] * len(requests)
+        groups: Dict[str, List[Tuple[int, PredictionRequest, History]]] = {
+            self.BRANCH_HYBRID: [],
+            self.BRANCH_PROPHET: [],
+            self.BRANCH_THEORETICAL: [],
+            self.BRANCH_FAST: [],
+            self.BRANCH_COHORT: [],
+        }
+        
+        # 1. Prepare Data and route each request to its branch
+        for idx, features in enumerate(requests):
+            profile = profiles[idx]
+            try:
+                with profile.stage(STAGE_PREPARE):
+                    history = self._prepare_history(features)
+            except Exception as e:
+                results[idx] = e
+                continue
+            profile.history_length = len(history[1])
+            if features.mode == PREDICTION_MODE_FAST:
+                profile.branch = self.BRANCH_FAST
+            elif features.mode == PREDICTION_MODE_COHORT:
+                profile.branch = self.BRANCH_COHORT
+            else:
+                profile.branch = self._select_branch(profile.history_length)
+                if deadlines[idx] is not None:
+                    tier = self._select_tier(profile.branch, deadlines[idx], tier_latency)
+                    profile.degraded = tier != profile.branch
+                    profile.branch = tier
+            if profile.branch == self.BRANCH_THEORETICAL and self._has_cohort(features, cohort_table):
+                profile.branch = self.BRANCH_COHORT
+            profile.tier = profile.branch
+            groups[profile.branch].append((idx, features, history))
+        
+        # Heavy libraries are only needed by the Prophet/LSTM branches
+        model_group = groups[self.BRANCH_HYBRID] + groups[self.BRANCH_PROPHET]
+        if model_group and not self._models_loaded:
+            with shared_stage([profiles[idx] for idx, _, _ in model_group], STAGE_LOAD):
+                self.load_models()
+        
+        # 2. Score each branch group together
+        abandoned = []
+        self._score_hybrid(groups[self.BRANCH_HYBRID], results, profiles, deadlines, abandoned)
+        self._score_prophet_only(groups[self.BRANCH_PROPHET], results, profiles, deadlines, abandoned)
+        self._score_theoretical(groups[self.BRANCH_THEORETICAL], results, profiles)
+        self._score_fast(groups[self.BRANCH_FAST], results, profiles)
+        self._score_cohort(groups[self.BRANCH_COHORT], results, profiles, cohort_table)
+        
+        # Pipes whose Prophet fit ran out of time get their cohort curve or
+        # the theoretical rate
+        abandoned_cohort = []
+        abandoned_theoretical = []
+        for item in abandoned:
+            idx, features, _ = item
+            if self._has_cohort(features, cohort_table):
+                profiles[idx].tier = self.BRANCH_COHORT
+                abandoned_cohort.append(item)
+            else:
+                profiles[idx].tier = self.BRANCH_THEORETICAL
+                abandoned_theoretical.append(item)
+            profiles[idx].degraded = True
+        self._score_cohort(abandoned_cohort, results, profiles, cohort_table)
+        self._score_theoretical(abandoned_theoretical, results, profiles)
+        
+        for profile in profiles:
+            profile.add(
+                STAGE_TOTAL,
+                sum(t["wall"] for t in profile.stages.values()),
+                sum(t["cpu"] for t in profile.stages.values()),
+            )
+        
+        return results, profiles
+    
+    def predict_incremental(
+        self,
+        request: IncrementalPredictionRequest,
+    ) -> Tuple[List[YearlyPrediction], TrackerState]:
+        """
+        Update a pipe's Kalman tracker with new measurements and forecast 5 years.
+        
+        With a state from a previous call only the new measurements are folded
+        in (O(1) each). Without one, the tracker is bootstrapped from the
+        material-adjusted historical rate and the measurements sent, so the
+        first call may carry the full history. No model fitting is involved.
+        
+        Returns:
+            Tuple of (yearly predictions, updated tracker state)
             
-            # Ensemble
-            for year_offset in range(1, 6):
-                future_age = current_age + year_offset
-                
-                prophet_val = prophet_pred.get(future_age, current_thickness)
-                lstm_val = lstm_pred.get(future_age, current_thickness)
-                
-                predicted_thickness = (
-                    self.PROPHET_WEIGHT * prophet_val +
-                    self.LSTM_WEIGHT * lstm_val
-                )
-                
-                # Confidence intervals (wider for later years)
-                uncertainty = 0.5 + (year_offset * 0.15)
-                conf_lower = max(predicted_thickness - uncertainty, 0.1)
-                conf_upper = predicted_thickness + uncertainty
-                
-                failure_prob = self._calculate_failure_probability(
-                    predicted_thickness, uncertainty
+        Raises:
+            ValueError: If a measurement is older than the state
+        """
+        measurements = sorted(request.measurements, key=lambda m: m.date)
+        
+        if request.state is not None:
+            state = kalman.DegradationState(
+                mean=np.array([request.state.thickness, request.state.corrosion_rate]),
+                covariance=np.array(request.state.covariance, dtype=float),
+                as_of=request.state.as_of,
+                measurements=request.state.measurements,
+            )
+        else:
+            # Same rule as the batch path: ignore readings before production
+            production_date = date(date.today().year - request.age_years, 1, 1)
+            measurements = [m for m in measurements if m.date >= production_date]
+            
+            expected_rate = request.corrosion_rate_historical * self._get_material_factor(request.material)
+            if measurements:
+                state = kalman.initial_state(measurements[0].value, expected_rate, measurements[0].date)
+            else:
+                state = kalman.initial_state(request.current_wall_thickness, expected_rate, date.today())
+        
+        for measurement in measurements:
+            state = kalman.update_state(state, measurement.date, measurement.value)
+        
+        mean, std = kalman.forecast(state, date.today(), self._year_offsets())
+        predictions = self._build_yearly_predictions(np.maximum(mean, 0.1), std, 0.1)
+        
+        return predictions, TrackerState(
+            thickness=state.thickness,
+            corrosion_rate=state.corrosion_rate,
+            covariance=state.covariance.tolist(),
+            as_of=state.as_of,
+            measurements=state.measurements,
+        )
+    
+    def predict_lifetimes(
+        self,
+        requests: List[PredictionRequest],
+        horizon_years: int = 100,
+        confidence: float = 0.9,
+    ) -> List[PipeLifetime]:
+        """
+        Estimate when each pipe reaches WARNING_THICKNESS and CRITICAL_THICKNESS.
+        
+        Uses the fast-mode trends of all pipes at once and solves the crossing
+        dates and their intervals in closed form, so the cost does not grow
+        with the horizon. An item whose history cannot be parsed is reported
+        in its own ``error``.
+        
+        Args:
+            requests: Pipes to estimate
+            horizon_years: Crossings later than this are reported as beyond the horizon
+            confidence: Two-sided confidence level of the date intervals
+            
+        Returns:
+            List of PipeLifetime aligned with ``requests``
+        """
+        from scipy.special import ndtri
+        
+        results: List[Optional[PipeLifetime]] = [None] * len(requests)
+        group = []
+        for idx, features in enumerate(requests):
+            try:
+                group.append((idx, features, self._prepare_history(features)))
+            except Exception as e:
+                results[idx] = PipeLifetime(pipe_id=features.pipe_id, error=f"Prediction failed: {str(e)}")
+        
+        if group:
+            trend = self._fast_trends(group)
+            z = float(ndtri(0.5 + confidence / 2))
+            # + 0.0 turns -0.0 from flat trends into 0.0
+            rates = (np.round(-trend[1], 4) + 0.0).tolist()
+            crossings = {
+                name: self._threshold_crossings(
+                    threshold, *fast_linear.crossing_times(*trend, threshold, z), horizon_years
                 )
-                
-                status = self._determine_status(failure_prob, predicted_thickness)
-                
-                predictions.append(YearlyPrediction(
-                    year=year_offset,
-                    predicted_thickness=round(predicted_thickness, 2),
-                    conf_lower=round(conf_lower, 2),
-                    conf_upper=round(conf_upper, 2),
-                    failure_probability=round(failure_prob, 4),
-                    status=status
-                ))
-                
-        elif len(df) >= 3:
-            # Prophet only (not enough data for LSTM)
-            prophet_pred = self._prophet_predict(df, current_age)
-            
-            for year_offset in range(1, 6):
-                future_age = current_age + year_offset
-                predicted_thickness = prophet_pred.get(future_age, current_thickness)
-                
-                uncertainty = 0.6 + (year_offset * 0.2)
-                conf_lower = max(predicted_thickness - uncertainty, 0.1)
-                conf_upper = predicted_thickness + uncertainty
-                
-                failure_prob = self._calculate_failure_probability(
-                    predicted_thickness, uncertainty
+                for name, threshold in (
+                    ("warning", self.WARNING_THICKNESS),
+                    ("critical", self.CRITICAL_THICKNESS),
                 )
-                
-                status = self._determine_status(failure_prob, predicted_thickness)
-                
-                predictions.append(YearlyPrediction(
-                    year=year_offset,
-                    predicted_thickness=round(predicted_thickness, 2),
-                    conf_lower=round(conf_lower, 2),
-                    conf_upper=round(conf_upper, 2),
-                    failure_probability=round(failure_prob, 4),
-                    status=status
-                ))
-        else:
-            # Fallback: Theoretical rate
-            material_factor = self._get_material_factor(features.material)
-            slope = -1.0 * features.corrosion_rate_historical * material_factor
-            
-            for year_offset in range(1, 6):
-                predicted_thickness = max(
-                    current_thickness + (slope * year_offset),
-                    0.1
+            }
+            
+            for row, (idx, features, _) in enumerate(group):
+                results[idx] = PipeLifetime(
+                    pipe_id=features.pipe_id,
+                    corrosion_rate=rates[row],
+                    warning=crossings["warning"][row],
+                    critical=crossings["critical"][row],
                 )
-                
-                uncertainty = 0.8 * (1 + 0.2 * year_offset)
-                conf_lower = max(predicted_thickness - uncertainty, 0.0)
-                conf_upper = predicted_thickness + uncertainty
-                
-                failure_prob = self._calculate_failure_probability(
-                    predicted_thickness, uncertainty
+        
+        return results
+    
+    def _threshold_crossings(
+        self,
+        threshold: float,
+        expected: np.ndarray,
+        earliest: np.ndarray,
+        latest: np.ndarray,
+        horizon_years: int,
+    ) -> List[ThresholdCrossing]:
+        """Crossing years per pipe as ThresholdCrossings; dates beyond the horizon are None"""
+        today = date.today().toordinal()
+        
+        def _dates(years: np.ndarray) -> List[Optional[date]]:
+            within = np.isfinite(years) & (years <= horizon_years)
+            days = np.round(np.where(within, years, 0.0) * fast_linear.DAYS_PER_YEAR).astype(np.int64)
+            return [
+                date.fromordinal(today + int(d)) if ok else None
+                for d, ok in zip(days.tolist(), within.tolist())
+            ]
+        
+        beyond = ~(np.isfinite(expected) & (expected <= horizon_years))
+        years = np.round(np.where(beyond, 0.0, expected), 2).tolist()
+        return [
+            ThresholdCrossing(
+                threshold_mm=threshold,
+                years=None if is_beyond else year,
+                expected_date=expected_date,
+                earliest_date=earliest_date,
+                latest_date=latest_date,
+                beyond_horizon=is_beyond,
+            )
+            for year, is_beyond, expected_date, earliest_date, latest_date in zip(
+                years, beyond.tolist(), _dates(expected), _dates(earliest), _dates(latest)
+            )
+        ]
+    
+    def fit_cohorts(self, observations: List[cohorts.Observation], version: int) -> cohorts.CohortTable:
+        """
+        Fit cohort curves across the fleet.
+        
+        Every pipe's history gets the same robust linear fit as fast mode,
+        in chunks of similar history length to bound the padded arrays.
+        Pipes with fewer than two measurement dates carry no rate and are
+        skipped.
+        
+        Args:
+            observations: One observation per pipe
+            version: Version number of the new table
+            
+        Returns:
+            CohortTable fitted from every pipe with a trend
+        """
+        reference_day = date.today().toordinal() - _EPOCH_ORDINAL
+        order = sorted(range(len(observations)), key=lambda row: len(observations[row].values))
+        
+        kept: List[cohorts.Observation] = []
+        rates, rate_vars, noise_vars = [], [], []
+        for start in range(0, len(order), self.COHORT_FIT_CHUNK):
+            chunk = [observations[row] for row in order[start:start + self.COHORT_FIT_CHUNK]]
+            histories = [self._clean_history(o.days, o.values, o.age_years) for o in chunk]
+            years, values, mask = fast_linear.stack_histories(histories, reference_day)
+            _, slope, covariance, residual_var, fitted = fast_linear.fit_linear_trends(
+                years, values, mask
+            )
+            kept.extend(o for o, ok in zip(chunk, fitted.tolist()) if ok)
+            # Positive rates only, as in every other branch
+            rates.append(np.maximum(-slope[fitted], 0.0))
+            rate_vars.append(covariance[fitted, 1, 1])
+            noise_vars.append(residual_var[fitted])
+        
+        if not kept:
+            return cohorts.fit_table([], np.empty(0), np.empty(0), np.empty(0), version)
+        return cohorts.fit_table(
+            kept, np.concatenate(rates), np.concatenate(rate_vars), np.concatenate(noise_vars), version
+        )
+    
+    def may_use_cohorts(self, features: PredictionRequest) -> bool:
+        """
+        Whether a cohort table can change this request's answer.
+        
+        True for cohort mode and for hybrid requests too short for Prophet.
+        Counts usable measurements the way the batch router does (after
+        dropping pre-production readings), so the answer matches the branch
+        the request is scored with.
+        """
+        if features.mode == PREDICTION_MODE_COHORT:
+            return True
+        if features.mode == PREDICTION_MODE_FAST:
+            return False
+        try:
+            num_points = len(self._prepare_history(features)[1])
+        except Exception:
+            # Scoring fails the same way and nothing is cached
+            return True
+        return self._select_branch(num_points) == self.BRANCH_THEORETICAL
+    
+    def _has_cohort(self, features: PredictionRequest, cohort_table: Optional[cohorts.CohortTable]) -> bool:
+        """Whether the pipe's material has a cohort curve in the table"""
+        if cohort_table is None:
+            return False
+        return cohort_table.lookup(features.material, features.diameter_mm, features.age_years) is not None
+    
+    def _select_branch(self, num_points: int) -> str:
+        """Select model branch based on the amount of usable history"""
+        if num_points >= 5:
+            return self.BRANCH_HYBRID
+        if num_points >= 3:
+            return self.BRANCH_PROPHET
+        return self.BRANCH_THEORETICAL
+    
+    def _select_tier(self, branch: str, deadline: float, tier_latency: Dict[str, float]) -> str:
+        """Richest tier, starting from ``branch``, expected to finish before ``deadline``"""
+        remaining = deadline - time.time()
+        for tier in self.TIER_ORDER[self.TIER_ORDER.index(branch):]:
+            # Loading pandas/Prophet/torch alone takes seconds
+            if tier != self.BRANCH_THEORETICAL and not self._models_loaded:
+                continue
+            estimate = tier_latency.get(tier)
+            # Without timings yet, try the tier if a fit could start at all;
+            # an overrunning fit is abandoned
+            if estimate is None:
+                estimate = self.DEADLINE_RESERVE_SECONDS
+            if estimate < remaining:
+                return tier
+        return self.BRANCH_THEORETICAL
+    
+    def _prophet_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        """
+        Seconds a Prophet fit may take before ``deadline`` (None = unlimited).
+        
+        Raises:
+            TimeoutError: If there is no time left for a fit
+        """
+        if deadline is None:
+            return None
+        timeout = deadline - time.time() - self.DEADLINE_RESERVE_SECONDS
+        if timeout <= 0:
+            raise TimeoutError("No time left for a Prophet fit before the deadline")
+        return timeout
+    
+    def _score_hybrid(
+        self,
+        group: list,
+        results: list,
+        profiles: list,
+        deadlines: list,
+        abandoned: list,
+    ) -> None:
+        """Full hybrid model: 40% Prophet + 60% LSTM"""
+        if not group:
+            return
+        
+        # One batched LSTM rollout for the whole group
+        with shared_stage([profiles[idx] for idx, _, _ in group], STAGE_LSTM):
+            lstm_preds = self._lstm_predict_batch([(h[1], f.age_years) for _, f, h in group])
+        
+        prophet_preds, kept = self._prophet_predict_group(group, profiles, deadlines, abandoned)
+        if not kept:
+            return
+        group = [group[row] for row in kept]
+        lstm_preds = [lstm_preds[row] for row in kept]
+        
+        group_profiles = [profiles[idx] for idx, _, _ in group]
+        offsets = self._year_offsets()
+        current_thickness = np.array([f.current_wall_thickness for _, f, _ in group])
+        prophet_vals = np.empty((len(group), len(offsets)))
+        lstm_vals = np.empty((len(group), len(offsets)))
+        
+        with shared_stage(group_profiles, STAGE_ENSEMBLE):
+            for row, (_, features, _) in enumerate(group):
+                prophet_pred = prophet_preds[row]
+                lstm_pred = lstm_preds[row]
+                for col, year_offset in enumerate(offsets):
+                    future_age = features.age_years + int(year_offset)
+                    prophet_vals[row, col] = prophet_pred.get(future_age, current_thickness[row])
+                    # Without an LSTM forecast the ensemble reduces to Prophet
+                    lstm_vals[row, col] = lstm_pred.get(future_age, prophet_vals[row, col])
+            
+            # Ensemble
+            predicted = self.PROPHET_WEIGHT * prophet_vals + self.LSTM_WEIGHT * lstm_vals
+            
+            # Confidence intervals (wider for later years)
+            uncertainty = 0.5 + (offsets * 0.15)
+            self._collect_predictions(group, predicted, uncertainty, 0.1, results)
+    
+    def _score_prophet_only(
+        self,
+        group: list,
+        results: list,
+        profiles: list,
+        deadlines: list,
+        abandoned: list,
+    ) -> None:
+        """Prophet only (not enough data for LSTM)"""
+        if not group:
+            return
+        
+        prophet_preds, kept = self._prophet_predict_group(group, profiles, deadlines, abandoned)
+        if not kept:
+            return
+        group = [group[row] for row in kept]
+        
+        offsets = self._year_offsets()
+        predicted = np.empty((len(group), len(offsets)))
+        
+        with shared_stage([profiles[idx] for idx, _, _ in group], STAGE_ENSEMBLE):
+            for row, (idx, features, history) in enumerate(group):
+                prophet_pred = prophet_preds[row]
+                for col, year_offset in enumerate(offsets):
+                    future_age = features.age_years + int(year_offset)
+                    predicted[row, col] = prophet_pred.get(future_age, features.current_wall_thickness)
+            
+            uncertainty = 0.6 + (offsets * 0.2)
+            self._collect_predictions(group, predicted, uncertainty, 0.1, results)
+    
+    def _prophet_predict_group(
+        self,
+        group: list,
+        profiles: list,
+        deadlines: list,
+        abandoned: list,
+    ) -> Tuple[List[Dict[int, float]], List[int]]:
+        """
+        Prophet forecast for each pipe of a group, within each pipe's deadline.
+        
+        Pipes whose fit would overrun their deadline are appended to ``abandoned``.
+        
+        Returns:
+            Tuple of (forecasts of the kept pipes, their row numbers in ``group``)
+        """
+        prophet_preds, kept = [], []
+        for row, (idx, features, history) in enumerate(group):
+            try:
+                with profiles[idx].stage(STAGE_PROPHET):
+                    prophet_preds.append(self._prophet_predict(
+                        history, features.age_years, features.pipe_id,
+                        timeout=self._prophet_timeout(deadlines[idx]),
+                    ))
+                kept.append(row)
+            except TimeoutError:
+                abandoned.append(group[row])
+        return prophet_preds, kept
+    
+    def _score_theoretical(self, group: list, results: list, profiles: list) -> None:
+        """Fallback: Theoretical rate, vectorized over the whole group"""
+        if not group:
+            return
+        
+        with shared_stage([profiles[idx] for idx, _, _ in group], STAGE_THEORETICAL):
+            offsets = self._year_offsets()
+            current_thickness = np.array([f.current_wall_thickness for _, f, _ in group])
+            slopes = np.array([
+                -1.0 * f.corrosion_rate_historical * self._get_material_factor(f.material)
+                for _, f, _ in group
+            ])
+            
+            predicted = np.maximum(
+                current_thickness[:, None] + (slopes[:, None] * offsets),
+                0.1
+            )
+            
+            uncertainty = 0.8 * (1 + 0.2 * offsets)
+            self._collect_predictions(group, predicted, uncertainty, 0.0, results)
+    
+    def _score_fast(self, group: list, results: list, profiles: list) -> None:
+        """
+        Fast mode: robust weighted linear fit per pipe, vectorized over the group.
+        
+        Pipes with fewer than two distinct measurement dates use the
+        theoretical rate, as in the theoretical branch.
+        """
+        if not group:
+            return
+        
+        with shared_stage([profiles[idx] for idx, _, _ in group], STAGE_FAST):
+            offsets = self._year_offsets()
+            trend = self._fast_trends(group)
+            mean, uncertainty = fast_linear.forecast(*trend, offsets)
+            predicted = np.maximum(mean, 0.1)
+            
+            failure_probs = self._failure_probabilities(predicted, uncertainty)
+            statuses = self._determine_statuses(failure_probs, predicted).tolist()
+            
+            # Round whole matrices at once instead of per value
+            years = [int(year_offset) for year_offset in offsets]
+            thickness = np.round(predicted, 2).tolist()
+            lower = np.round(np.maximum(predicted - uncertainty, 0.1), 2).tolist()
+            upper = np.round(predicted + uncertainty, 2).tolist()
+            probs = np.round(failure_probs, 4).tolist()
+            
+            for row, (idx, _, _) in enumerate(group):
+                try:
+                    results[idx] = [
+                        YearlyPrediction(
+                            year=years[col],
+                            predicted_thickness=thickness[row][col],
+                            conf_lower=lower[row][col],
+                            conf_upper=upper[row][col],
+                            failure_probability=probs[row][col],
+                            status=statuses[row][col],
+                        )
+                        for col in range(len(years))
+                    ]
+                except Exception as e:
+                    results[idx] = e
+    
+    def _score_cohort(
+        self,
+        group: list,
+        results: list,
+        profiles: list,
+        cohort_table: Optional[cohorts.CohortTable],
+    ) -> None:
+        """
+        Cohort mode: each pipe's trend adjusted to its cohort curve, vectorized.
+        
+        The cohort's change of rate with age bends the forecast; thickness
+        never increases over the horizon.
+        """
+        if not group:
+            return
+        
+        with shared_stage([profiles[idx] for idx, _, _ in group], STAGE_COHORT):
+            offsets = self._year_offsets()
+            *trend, acceleration = self._cohort_trends(group, cohort_table)
+            mean, uncertainty = fast_linear.forecast(*trend, offsets)
+            mean = mean - 0.5 * acceleration[:, None] * offsets ** 2
+            predicted = np.maximum(np.minimum.accumulate(mean, axis=1), 0.1)
+            
+            for row, (idx, _, _) in enumerate(group):
+                try:
+                    results[idx] = self._build_yearly_predictions(
+                        predicted[row], uncertainty[row], 0.1
+                    )
+                except Exception as e:
+                    results[idx] = e
+    
+    def _fast_trends(self, group: list) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Linear trends of a group as of today, for ``fast_linear.forecast``.
+        
+        Pipes with fewer than two distinct measurement dates get the
+        theoretical rate from their current thickness, with a covariance that
+        reproduces the theoretical branch's 0.8 * (1 + 0.2 * k) uncertainty.
+        
+        Returns:
+            Tuple of (intercept, slope, covariance, residual variance)
+        """
+        intercept, slope, covariance, residual_var, fitted = self._fitted_trends(group)
+        return self._theoretical_fallback(group, fitted, intercept, slope, covariance, residual_var)
+    
+    def _fitted_trends(self, group: list) -> Tuple[np.ndarray, ...]:
+        """
+        Robust linear fit of each pipe's own history, as of today.
+        
+        Returns:
+            Tuple of (intercept, slope, covariance, residual variance, fitted flag)
+        """
+        reference_day = date.today().toordinal() - _EPOCH_ORDINAL
+        years, values, mask = fast_linear.stack_histories(
+            [history for _, _, history in group], reference_day
+        )
+        return fast_linear.fit_linear_trends(years, values, mask, non_increasing=True)
+    
+    def _theoretical_fallback(
+        self,
+        group: list,
+        use_fit: np.ndarray,
+        intercept: np.ndarray,
+        slope: np.ndarray,
+        covariance: np.ndarray,
+        residual_var: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Replace the trends of pipes where ``use_fit`` is False with the theoretical rate"""
+        current_thickness = np.array([f.current_wall_thickness for _, f, _ in group])
+        rates = np.array([
+            f.corrosion_rate_historical * self._get_material_factor(f.material)
+            for _, f, _ in group
+        ])
+        # (0.8 + 0.16k)^2 = 0.64 + 2 * 0.128k + 0.0256k^2
+        theory_covariance = np.array([[0.64, 0.128], [0.128, 0.0256]])
+        
+        intercept = np.where(use_fit, intercept, current_thickness)
+        slope = np.where(use_fit, slope, -rates)
+        covariance = np.where(use_fit[:, None, None], covariance, theory_covariance)
+        residual_var = np.where(use_fit, residual_var, 0.0)
+        return intercept, slope, covariance, residual_var
+    
+    def _cohort_trends(
+        self,
+        group: list,
+        cohort_table: Optional[cohorts.CohortTable],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Linear trends of a group adjusted to their cohort curves.
+        
+        Each pipe's own fit is shrunk toward its cohort's rate at the pipe's
+        age (``cohorts.shrink_trends``). Pipes without a fit start from their
+        current thickness with the cohort rate; pipes without a cohort are
+        treated as in fast mode.
+        
+        Returns:
+            Tuple of (intercept, slope, covariance, residual variance,
+            cohort acceleration in mm/year^2 or 0)
+        """
+        intercept, slope, covariance, residual_var, fitted = self._fitted_trends(group)
+        
+        count = len(group)
+        has_curve = np.zeros(count, dtype=bool)
+        prior_slope = np.zeros(count)
+        prior_var = np.ones(count)
+        noise_var = np.zeros(count)
+        acceleration = np.zeros(count)
+        for row, (_, f, _) in enumerate(group):
+            found = cohort_table.lookup(f.material, f.diameter_mm, f.age_years) if cohort_table else None
+            if found is None:
+                continue
+            _, curve = found
+            has_curve[row] = True
+            prior_slope[row] = -curve.rate_at(f.age_years)
+            prior_var[row] = curve.rate_var + curve.mean_var
+            noise_var[row] = curve.noise_var
+            acceleration[row] = curve.acceleration
+        
+        shrunk_slope, shrunk_covariance = cohorts.shrink_trends(
+            slope, covariance, fitted, prior_slope, prior_var
+        )
+        # Without a fit the level is the reported current thickness, as
+        # uncertain as one reading
+        current_thickness = np.array([f.current_wall_thickness for _, f, _ in group])
+        shrunk_covariance[~fitted] = 0.0
+        shrunk_covariance[~fitted, 0, 0] = noise_var[~fitted]
+        shrunk_covariance[~fitted, 1, 1] = prior_var[~fitted]
+        
+        intercept = np.where(has_curve & ~fitted, current_thickness, intercept)
+        slope = np.where(has_curve, np.minimum(shrunk_slope, 0.0), slope)
+        covariance = np.where(has_curve[:, None, None], shrunk_covariance, covariance)
+        residual_var = np.where(fitted, residual_var, 0.0)
+        
+        trend = self._theoretical_fallback(
+            group, fitted | has_curve, intercept, slope, covariance, residual_var
+        )
+        return (*trend, acceleration)
+    
+    def _collect_predictions(
+        self,
+        group: list,
+        predicted: np.ndarray,
+        uncertainty: np.ndarray,
+        lower_floor: float,
+        results: list,
+    ) -> None:
+        """Turn a (pipes x years) thickness matrix into per-pipe YearlyPredictions"""
+        for row, (idx, _, _) in enumerate(group):
+            try:
+                results[idx] = self._build_yearly_predictions(
+                    predicted[row], uncertainty, lower_floor
                 )
-                
-                status = self._determine_status(failure_prob, predicted_thickness)
-                
-                predictions.append(YearlyPrediction(
-                    year=year_offset,
-                    predicted_thickness=round(predicted_thickness, 2),
-                    conf_lower=round(conf_lower, 2),
-                    conf_upper=round(conf_upper, 2),
-                    failure_probability=round(failure_prob, 4),
-                    status=status
-                ))
+            except Exception as e:
+                results[idx] = e
+    
+    def _build_yearly_predictions(
+        self,
+        predicted: np.ndarray,
+        uncertainty: np.ndarray,
+        lower_floor: float,
+    ) -> List[YearlyPrediction]:
+        """Build yearly predictions with intervals, failure probability and status"""
+        predictions = []
+        
+        for col, year_offset in enumerate(self._year_offsets()):
+            predicted_thickness = float(predicted[col])
+            year_uncertainty = float(uncertainty[col])
+            
+            conf_lower = max(predicted_thickness - year_uncertainty, lower_floor)
+            conf_upper = predicted_thickness + year_uncertainty
+            
+            failure_prob = self._calculate_failure_probability(
+                predicted_thickness, year_uncertainty
+            )
+            
+            status = self._determine_status(failure_prob, predicted_thickness)
+            
+            predictions.append(YearlyPrediction(
+                year=int(year_offset),
+                predicted_thickness=round(predicted_thickness, 2),
+                conf_lower=round(conf_lower, 2),
+                conf_upper=round(conf_upper, 2),
+                failure_probability=round(failure_prob, 4),
+                status=status
+            ))
         
         return predictions
     
-    def _prepare_dataframe(self, features: PredictionRequest) -> pd.DataFrame:
-        """Prepare Prophet-compatible dataframe"""
-        if not features.history_measurements:
-            return pd.DataFrame(columns=['ds', 'y'])
+    def _year_offsets(self) -> np.ndarray:
+        """Forecast horizon as year offsets 1..HORIZON_YEARS"""
+        return np.arange(1, self.HORIZON_YEARS + 1, dtype=float)
+    
+    def _prepare_history(self, features: PredictionRequest) -> History:
+        """
+        Parse measurement history into contiguous date and value arrays.
+        
+        NumPy only: measurements before the production date are dropped with
+        a vectorized mask and the rest are sorted by date. Pandas is only
+        built later if the Prophet branch needs it.
+        
+        Returns:
+            Tuple of (dates as datetime64[D], thickness values as float64)
+        """
+        measurements = features.history_measurements
+        if not measurements:
+            return _EMPTY_DATES, _EMPTY_VALUES
         
-        data = []
+        count = len(measurements)
+        days = np.fromiter(
+            (m.date.toordinal() for m in measurements), dtype=np.int64, count=count
+        )
+        values = np.fromiter((m.value for m in measurements), dtype=np.float64, count=count)
+        return self._clean_history(days, values, features.age_years)
+    
+    def _clean_history(self, days: np.ndarray, values: np.ndarray, age_years: int) -> History:
+        """Drop readings before production, sort by date and convert dates to datetime64"""
         today = date.today()
-        production_year = today.year - features.age_years
+        production_year = today.year - age_years
         production_date = date(production_year, 1, 1)
         
-        for m in features.history_measurements:
-            if m.date < production_date:
-                continue
-            
-            # Prophet expects 'ds' (datetime) and 'y' (value)
-            data.append({
-                'ds': pd.Timestamp(m.date),
-                'y': m.value
-            })
+        mask = days >= production_date.toordinal()
+        if not mask.all():
+            days = days[mask]
+            values = values[mask]
         
-        if not data:
-            return pd.DataFrame(columns=['ds', 'y'])
+        if len(days) > 1:
+            order = np.argsort(days, kind="stable")
+            days = days[order]
+            values = values[order]
         
-        df = pd.DataFrame(data)
-        df = df.sort_values('ds')
-        return df
+        dates = (days - _EPOCH_ORDINAL).astype("datetime64[D]")
+        return dates, values
     
-    def _prophet_predict(self, df: pd.DataFrame, current_age: int) -> Dict[int, float]:
+    def _prophet_predict(
+        self,
+        history: History,
+        current_age: int,
+        pipe_id: Optional[uuid.UUID] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[int, float]:
         """
         Use Prophet for time series forecasting.
+        
+        When the pipe was fitted before, the optimizer starts from its
+        previous parameters instead of Prophet's default initialization.
+        
         Returns dict: {future_age: predicted_thickness}
+        
+        Raises:
+            TimeoutError: If the fit does not finish within ``timeout`` seconds
         """
+        import pandas as pd
+        import prophet
+        from prophet import Prophet
+        
+        params_key = None
+        if self.prophet_params is not None and pipe_id is not None:
+            params_key = ProphetParamStore.make_key(
+                pipe_id, f"prophet-{prophet.__version__}:{self.PROPHET_CONFIG_VERSION}"
+            )
+        
         try:
             # Initialize Prophet with conservative settings
             model = Prophet(
@@ -213,17 +1031,26 @@ class PipeLifetimePredictor:
                 changepoint_prior_scale=0.05,  # Conservative trend changes
             )
             
-            model.fit(df)
+            # Prophet expects 'ds' (datetime) and 'y' (value)
+            dates, values = history
+            stored = self.prophet_params.get(params_key) if params_key else None
+            fit_kwargs = {'init': warm_start_init(stored, dates, values)} if stored else {}
+            if timeout is not None:
+                # The Stan optimizer subprocess is killed when time runs out
+                fit_kwargs['timeout'] = timeout
+            model.fit(pd.DataFrame({
+                'ds': dates.astype('datetime64[ns]'),
+                'y': values,
+            }), **fit_kwargs)
             
-            # Create future dataframe (5 years ahead)
-            future_dates = []
-            last_date = df['ds'].max()
+            if params_key:
+                self.prophet_params.set(params_key, extract_params(model, dates, values))
             
-            for year_offset in range(1, 6):
-                future_date = last_date + pd.Timedelta(days=365 * year_offset)
-                future_dates.append(future_date)
+            # Create future dataframe (5 years ahead)
+            last_date = dates[-1]
+            future_dates = last_date + np.arange(1, 6) * np.timedelta64(365, 'D')
             
-            future_df = pd.DataFrame({'ds': future_dates})
+            future_df = pd.DataFrame({'ds': future_dates.astype('datetime64[ns]')})
             
             # Make prediction
             forecast = model.predict(future_df)
@@ -237,98 +1064,121 @@ class PipeLifetimePredictor:
             
             return predictions
             
+        except TimeoutError:
+            raise
         except Exception as e:
             # If Prophet fails, return empty dict (will use fallback)
-            print(f"Prophet prediction failed: {e}")
+            logger.warning(f"Prophet prediction failed: {e}")
             return {}
     
-    def _lstm_predict(self, df: pd.DataFrame, current_age: int, current_thickness: float) -> Dict[int, float]:
+    def _lstm_predict(self, history: History, current_age: int, current_thickness: float) -> Dict[int, float]:
         """
-        Use LSTM for non-linear pattern learning.
+        Use the pretrained LSTM for non-linear pattern extrapolation.
+        Inference only: weights come from the artifact loaded at startup.
         Returns dict: {future_age: predicted_thickness}
         """
-        try:
-            if len(df) < 5:
-                return {}
+        return self._lstm_predict_batch([(history[1], current_age)])[0]
+    
+    def _lstm_predict_batch(self, items: List[Tuple[np.ndarray, int]]) -> List[Dict[int, float]]:
+        """
+        Batched LSTM inference for many pipes.
+        
+        The normalized last windows of all eligible pipes are stacked into one
+        (N, seq_len, 1) tensor and rolled forward together, so N pipes cost
+        HORIZON_YEARS forward passes instead of N * HORIZON_YEARS.
+        
+        With per-pipe training enabled, each pipe instead gets its own small
+        LSTM fitted to its history; all of them train at once as one stacked
+        model (see ``stacked_lstm``) and roll forward the same way.
+        
+        Args:
+            items: (sorted thickness values, current age) per pipe
             
-            # Prepare sequence data
-            values = df['y'].values.reshape(-1, 1)
+        Returns:
+            List aligned with ``items`` of {future_age: predicted_thickness};
+            empty dict for pipes the LSTM cannot score
+        """
+        results: List[Dict[int, float]] = [{} for _ in items]
+        
+        if self.lstm_artifact is None and not self.per_pipe_lstm:
+            return results
+        
+        from app.services.lstm import SEQUENCE_LENGTH, normalize_history, rollout
+        
+        max_seq_length = SEQUENCE_LENGTH if self.per_pipe_lstm else self.lstm_artifact.seq_length
+        rows = []
+        windows = []
+        histories = []
+        stats = []
+        
+        for idx, (values, _) in enumerate(items):
+            if len(values) < 5:
+                continue
             
-            # Normalize
-            mean_val = values.mean()
-            std_val = values.std() + 1e-8
-            normalized = (values - mean_val) / std_val
+            # Normalize with this pipe's own statistics (as in training)
+            normalized, mean_val, std_val = normalize_history(values)
             
-            # Create sequences (use last 3 points to predict next)
-            seq_length = min(3, len(normalized) - 1)
+            # Use the last points as the input window
+            seq_length = min(max_seq_length, len(normalized) - 1)
             if seq_length < 2:
-                return {}
-            
-            # Prepare training data
-            X = []
-            y = []
-            for i in range(len(normalized) - seq_length):
-                X.append(normalized[i:i+seq_length])
-                y.append(normalized[i+seq_length])
-            
-            if len(X) < 2:
-                return {}
-            
-            X = np.array(X)
-            y = np.array(y)
-            
-            # Convert to tensors
-            X_tensor = torch.FloatTensor(X).to(self.device)
-            y_tensor = torch.FloatTensor(y).to(self.device)
-            
-            # Initialize and train LSTM
-            model = LSTMModel(input_size=1, hidden_size=16, num_layers=1).to(self.device)
-            criterion = nn.MSELoss()
-            optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
-            
-            # Quick training (50 epochs)
-            model.train()
-            for epoch in range(50):
-                optimizer.zero_grad()
-                output = model(X_tensor)
-                loss = criterion(output, y_tensor)
-                loss.backward()
-                optimizer.step()
-            
-            # Predict future
-            model.eval()
-            predictions = {}
-            
-            # Start from last sequence
-            last_seq = normalized[-seq_length:].reshape(1, seq_length, 1)
-            last_seq_tensor = torch.FloatTensor(last_seq).to(self.device)
-            
-            current_pred = normalized[-1]
-            
-            for year_offset in range(1, 6):
-                # Predict next value
-                with torch.no_grad():
-                    pred_tensor = model(last_seq_tensor)
-                    current_pred = pred_tensor.cpu().numpy()[0, 0]
-                
-                # Denormalize
-                predicted_thickness = (current_pred * std_val) + mean_val
-                predicted_thickness = max(predicted_thickness, 0.1)
-                
-                future_age = current_age + year_offset
-                predictions[future_age] = predicted_thickness
-                
-                # Update sequence for next prediction
-                new_seq = np.append(last_seq[0, :, 0], current_pred)[-seq_length:]
-                last_seq = new_seq.reshape(1, seq_length, 1)
-                last_seq_tensor = torch.FloatTensor(last_seq).to(self.device)
-            
-            return predictions
+                continue
             
+            rows.append(idx)
+            windows.append(normalized[-seq_length:])
+            histories.append(normalized)
+            stats.append((mean_val, std_val))
+        
+        if not rows:
+            return results
+        
+        try:
+            if self.per_pipe_lstm:
+                forecasts = self._per_pipe_lstm_rollout(histories, max_seq_length)
+            else:
+                forecasts = rollout(
+                    self.lstm_artifact.model, windows, self.HORIZON_YEARS, self.device
+                )
         except Exception as e:
-            # If LSTM fails, return empty dict
-            print(f"LSTM prediction failed: {e}")
-            return {}
+            # If LSTM fails, return empty dicts
+            logger.warning(f"LSTM prediction failed: {e}")
+            return results
+        
+        for row, idx, (mean_val, std_val) in zip(range(len(rows)), rows, stats):
+            current_age = items[idx][1]
+            predictions = {}
+            for step in range(self.HORIZON_YEARS):
+                # Denormalize
+                predicted_thickness = (forecasts[row, step] * std_val) + mean_val
+                predictions[current_age + step + 1] = max(float(predicted_thickness), 0.1)
+            results[idx] = predictions
+        
+        return results
+    
+    def _per_pipe_lstm_rollout(self, histories: List[np.ndarray], seq_length: int) -> np.ndarray:
+        """
+        Train one LSTM per normalized history (stacked) and roll each forward.
+        
+        Every eligible history has at least 5 points, so all pipes share
+        ``seq_length`` and can be stacked together.
+        
+        Returns:
+            Normalized predictions with shape (N, HORIZON_YEARS)
+        """
+        from app.services.stacked_lstm import fit_and_rollout
+        
+        started = time.perf_counter()
+        forecasts, epochs = fit_and_rollout(
+            histories,
+            self.HORIZON_YEARS,
+            seq_length=seq_length,
+            device=self.device,
+            max_models=settings.LSTM_PER_PIPE_BATCH_SIZE,
+        )
+        logger.debug(
+            f"Trained {len(histories)} per-pipe LSTMs in "
+            f"{time.perf_counter() - started:.3f}s (mean {epochs.mean():.1f} epochs)"
+        )
+        return forecasts
     
     def _calculate_failure_probability(self, thickness: float, uncertainty: float) -> float:
         """
@@ -343,6 +1193,23 @@ class PipeLifetimePredictor:
         
         return min(max(prob, 0.0), 0.99)
     
+    def _failure_probabilities(self, thickness: np.ndarray, uncertainty: np.ndarray) -> np.ndarray:
+        """Elementwise ``_calculate_failure_probability`` for arrays"""
+        from scipy.special import erf
+        
+        safe_uncertainty = np.where(uncertainty <= 0.001, 1.0, uncertainty)
+        z_score = (self.CRITICAL_THICKNESS - thickness) / safe_uncertainty
+        prob = np.clip(0.5 * (1 + erf(z_score / math.sqrt(2))), 0.0, 0.99)
+        
+        degenerate = np.where(thickness < self.CRITICAL_THICKNESS, 1.0, 0.0)
+        return np.where(uncertainty <= 0.001, degenerate, prob)
+    
+    def _determine_statuses(self, failure_probs: np.ndarray, thickness: np.ndarray) -> np.ndarray:
+        """Elementwise ``_determine_status`` for arrays"""
+        critical = (failure_probs >= self.CRITICAL_RISK_THRESHOLD) | (thickness < self.CRITICAL_THICKNESS)
+        warning = (failure_probs >= self.WARNING_RISK_THRESHOLD) | (thickness < self.WARNING_THICKNESS)
+        return np.where(critical, 'Critical', np.where(warning, 'Warning', 'Ok'))
+    
     def _determine_status(self, failure_prob: float, thickness: float) -> str:
         """Determine status based on failure probability and thickness"""
         if failure_prob >= self.CRITICAL_RISK_THRESHOLD or thickness < self.CRITICAL_THICKNESS:
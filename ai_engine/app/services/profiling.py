@@ -0,0 +1,221 @@
+"""
+Stage-level timing for PipeLifetimePredictor
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Prediction stages, in execution order
+STAGE_PREPARE = "prepare"
+STAGE_LOAD = "load_models"
+STAGE_PROPHET = "prophet"
+STAGE_LSTM = "lstm"
+STAGE_ENSEMBLE = "ensemble"
+STAGE_THEORETICAL = "theoretical"
+STAGE_FAST = "fast_linear"
+STAGE_COHORT = "cohort"
+STAGE_TOTAL = "total"
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+HISTORY_LENGTH_BUCKETS = [0, 2, 4, 10, 20, 50, 100, 500, 1000]
+
+
+class PredictionProfile:
+    """
+    Timings recorded for a single prediction.
+
+    Wall time comes from ``time.perf_counter`` and CPU time from
+    ``time.thread_time`` (the calling thread only; Prophet's Stan optimizer
+    runs in a subprocess and shows up as wall time only).
+    """
+
+    def __init__(self, history_length: int = 0, branch: Optional[str] = None):
+        self.history_length = history_length
+        # Branch attempted, and the tier that produced the result; they
+        # differ when a deadline made the predictor fall back mid-way
+        self.branch = branch
+        self.tier: Optional[str] = branch
+        # Result comes from a cheaper tier than the history allows
+        self.degraded = False
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, wall: float, cpu: float) -> None:
+        """Accumulate time spent in a stage"""
+        totals = self.stages.setdefault(stage, {"wall": 0.0, "cpu": 0.0})
+        totals["wall"] += wall
+        totals["cpu"] += cpu
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a stage"""
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+
+    def to_dict(self) -> dict:
+        return {
+            "branch": self.branch,
+            "tier": self.tier,
+            "degraded": self.degraded,
+            "history_length": self.history_length,
+            "stages": {
+                name: {"wall_ms": round(t["wall"] * 1000, 3), "cpu_ms": round(t["cpu"] * 1000, 3)}
+                for name, t in self.stages.items()
+            },
+        }
+
+
+@contextmanager
+def shared_stage(profiles: List[PredictionProfile], name: str) -> Iterator[None]:
+    """
+    Time a block that works on several predictions at once.
+
+    The elapsed time is split evenly across the profiles, so batched work
+    is attributed to each pipe at its amortized cost.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        if profiles:
+            wall = (time.perf_counter() - wall_start) / len(profiles)
+            cpu = (time.thread_time() - cpu_start) / len(profiles)
+            for profile in profiles:
+                profile.add(name, wall, cpu)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style)"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+class StageMetrics:
+    """Aggregated stage histograms per branch"""
+
+    def __init__(self):
+        self._wall: Dict[str, Dict[str, Histogram]] = {}
+        self._cpu: Dict[str, Dict[str, Histogram]] = {}
+        self._history_length: Dict[str, Histogram] = {}
+
+    def observe(self, profile: PredictionProfile) -> None:
+        """Record one prediction profile"""
+        branch = profile.branch or "unknown"
+
+        self._history_length.setdefault(
+            branch, Histogram(HISTORY_LENGTH_BUCKETS)
+        ).observe(profile.history_length)
+
+        for stage, totals in profile.stages.items():
+            self._wall.setdefault(branch, {}).setdefault(
+                stage, Histogram(LATENCY_BUCKETS)
+            ).observe(totals["wall"])
+            self._cpu.setdefault(branch, {}).setdefault(
+                stage, Histogram(LATENCY_BUCKETS)
+            ).observe(totals["cpu"])
+
+    def to_dict(self) -> dict:
+        return {
+            branch: {
+                "predictions": self._history_length[branch].count,
+                "history_length": self._history_length[branch].to_dict(),
+                "wall_seconds": {
+                    stage: hist.to_dict() for stage, hist in self._wall.get(branch, {}).items()
+                },
+                "cpu_seconds": {
+                    stage: hist.to_dict() for stage, hist in self._cpu.get(branch, {}).items()
+                },
+            }
+            for branch in self._history_length
+        }
+
+
+class TierLatency:
+    """
+    Recent end-to-end latency per branch, used to pick a tier under a deadline.
+
+    Keeps an exponentially weighted mean and mean absolute deviation of each
+    branch's total wall time. The estimate is the mean plus ``DEVIATIONS``
+    deviations, so a tier is only chosen when it usually finishes in time.
+    A branch without samples has no estimate and is assumed to fit.
+
+    An attempt abandoned at the deadline only shows that the branch takes
+    at least that long, so it is counted only when it raises the mean.
+    """
+
+    ALPHA = 0.2
+    DEVIATIONS = 2.0
+
+    def __init__(self):
+        self._mean: Dict[str, float] = {}
+        self._deviation: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        self._degraded: Dict[str, int] = {}
+
+    def observe(self, profile: PredictionProfile) -> None:
+        """Record the total wall time of one prediction under its attempted branch"""
+        branch = profile.branch
+        total = profile.stages.get(STAGE_TOTAL)
+        if branch is None or total is None:
+            return
+
+        if profile.degraded:
+            self._degraded[branch] = self._degraded.get(branch, 0) + 1
+
+        wall = total["wall"]
+        if profile.tier != branch and wall <= self._mean.get(branch, float("inf")):
+            return
+
+        if branch not in self._mean:
+            self._mean[branch] = wall
+            self._deviation[branch] = 0.0
+        else:
+            error = wall - self._mean[branch]
+            self._mean[branch] += self.ALPHA * error
+            self._deviation[branch] += self.ALPHA * (abs(error) - self._deviation[branch])
+        self._samples[branch] = self._samples.get(branch, 0) + 1
+
+    def estimate(self, branch: str) -> Optional[float]:
+        """Expected wall seconds for a branch, or None without samples"""
+        if branch not in self._mean:
+            return None
+        return self._mean[branch] + self.DEVIATIONS * self._deviation[branch]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current estimates per branch (picklable, for worker processes)"""
+        return {branch: self.estimate(branch) for branch in self._mean}
+
+    def to_dict(self) -> dict:
+        return {
+            branch: {
+                "samples": self._samples[branch],
+                "degraded": self._degraded.get(branch, 0),
+                "mean_ms": round(self._mean[branch] * 1000, 3),
+                "deviation_ms": round(self._deviation[branch] * 1000, 3),
+                "estimate_ms": round(self.estimate(branch) * 1000, 3),
+            }
+            for branch in self._mean
+        }
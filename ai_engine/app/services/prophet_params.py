@@ -0,0 +1,221 @@
+"""
+Prophet parameter store - warm-start state for per-pipe Prophet refits
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Prophet defaults that determine the number of trend changepoints
+PROPHET_N_CHANGEPOINTS = 25
+PROPHET_CHANGEPOINT_RANGE = 0.8
+
+
+def extract_params(model, dates: np.ndarray, values: np.ndarray) -> dict:
+    """
+    Compact copy of a fitted Prophet model's parameters.
+
+    Prophet fits in scaled space (time divided by the history span, values
+    by their absolute maximum), so the scaling is stored alongside the
+    parameters to translate them onto a longer history later.
+
+    Args:
+        model: Fitted Prophet model (MAP estimate)
+        dates: History dates (datetime64[D]) the model was fitted on
+        values: History values the model was fitted on
+
+    Returns:
+        JSON-serializable dict of parameters and scaling
+    """
+    params = model.params
+    start, t_scale, y_scale = _scaling(dates, values)
+    return {
+        "k": float(params["k"][0, 0]),
+        "m": float(params["m"][0, 0]),
+        "sigma_obs": float(params["sigma_obs"][0, 0]),
+        "delta": [float(d) for d in params["delta"][0]],
+        "start": start,
+        "t_scale": t_scale,
+        "y_scale": y_scale,
+    }
+
+
+def warm_start_init(stored: dict, dates: np.ndarray, values: np.ndarray) -> dict:
+    """
+    Translate stored parameters into a Stan init for a new history.
+
+    The trend is preserved in real units: slope and changepoint deltas are
+    rescaled by the new time/value scaling and the intercept is moved to the
+    new start date. Short histories gain changepoints as points arrive, so
+    deltas are padded with zeros (or truncated) to the new count.
+
+    Args:
+        stored: Parameters from ``extract_params``
+        dates: New history dates (datetime64[D])
+        values: New history values
+
+    Returns:
+        Init dict for ``Prophet.fit(df, init=...)``
+    """
+    start, t_scale, y_scale = _scaling(dates, values)
+
+    # Scaled slope per day in real units, re-expressed in the new scaling
+    slope_factor = (stored["y_scale"] / stored["t_scale"]) * (t_scale / y_scale)
+    shift = (start - stored["start"]) / stored["t_scale"]
+
+    delta = np.zeros(_num_changepoints(len(values)))
+    previous = np.array(stored["delta"])[:len(delta)]
+    delta[:len(previous)] = previous * slope_factor
+
+    return {
+        "k": stored["k"] * slope_factor,
+        "m": stored["y_scale"] * (stored["m"] + stored["k"] * shift) / y_scale,
+        "sigma_obs": stored["sigma_obs"] * stored["y_scale"] / y_scale,
+        "delta": delta,
+        "beta": np.zeros(0),
+    }
+
+
+def _num_changepoints(num_points: int) -> int:
+    """Length of Prophet's delta vector for a history of ``num_points``"""
+    hist_size = int(np.floor(num_points * PROPHET_CHANGEPOINT_RANGE))
+    # Without room for changepoints Prophet keeps a single one at t=0
+    return max(min(PROPHET_N_CHANGEPOINTS, hist_size - 1), 1)
+
+
+def _scaling(dates: np.ndarray, values: np.ndarray) -> tuple:
+    """Prophet's default scaling: (start day, span in days, absmax of values)"""
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    start = int(days.min())
+    t_scale = float(days.max() - start) or 1.0
+    y_scale = float(np.abs(values).max()) or 1.0
+    return start, t_scale, y_scale
+
+
+class ProphetParamStore:
+    """
+    Previously fitted Prophet parameters per pipe.
+
+    Entries are keyed by pipe_id plus a model version, so a change to the
+    Prophet configuration or library starts from cold fits again. The memory
+    tier is a bounded LRU; the optional SQLite tier survives restarts and is
+    shared by worker processes.
+    """
+
+    def __init__(self, max_entries: int = 10000, disk_path: Optional[str] = None):
+        """
+        Initialize store
+
+        Args:
+            max_entries: Maximum entries held in memory
+            disk_path: SQLite file for the disk tier (disabled if not set)
+        """
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+
+        self._hits = 0
+        self._misses = 0
+
+        if disk_path:
+            self._open_disk(disk_path)
+
+    @staticmethod
+    def make_key(pipe_id, model_version: str) -> str:
+        return f"{pipe_id}:{model_version}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return stored parameters or None"""
+        with self._lock:
+            params = self._entries.get(key)
+            if params is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return params
+
+            if self._disk is not None:
+                params = self._disk_get(key)
+                if params is not None:
+                    self._memory_set(key, params)
+                    self._hits += 1
+                    return params
+
+            self._misses += 1
+            return None
+
+    def set(self, key: str, params: dict) -> None:
+        """Store parameters in memory and, if enabled, on disk"""
+        with self._lock:
+            self._memory_set(key, params)
+
+            if self._disk is not None:
+                try:
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO prophet_params (key, params) VALUES (?, ?)",
+                        (key, json.dumps(params, separators=(",", ":"))),
+                    )
+                    self._disk.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Prophet parameter store disk write failed: {e}")
+
+    def close(self) -> None:
+        """Close the disk tier"""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self) -> dict:
+        """Entry and hit/miss counters"""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_enabled": self._disk is not None,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _memory_set(self, key: str, params: dict) -> None:
+        self._entries[key] = params
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _open_disk(self, path: str) -> None:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Worker processes share the file; wait for each other's writes
+            self._disk = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS prophet_params "
+                "(key TEXT PRIMARY KEY, params TEXT NOT NULL)"
+            )
+            self._disk.commit()
+            logger.info(f"Prophet parameter store disk tier enabled at {path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Prophet parameter store disk tier unavailable ({path}): {e}")
+            self._disk = None
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        try:
+            row = self._disk.execute(
+                "SELECT params FROM prophet_params WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Prophet parameter store disk read failed: {e}")
+            return None
+        return json.loads(row[0]) if row is not None else None
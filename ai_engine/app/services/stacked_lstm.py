@@ -0,0 +1,340 @@
+"""
+Stacked per-pipe LSTMs - many small independent models trained as one
+
+Each pipe gets its own LSTMModel-shaped network (1 input, one layer, linear
+head) trained on its own history only. Instead of one Python training loop
+per pipe, the weights of all M models are stacked along a leading model
+dimension and every step runs as batched matrix multiplies (``bmm``) over
+that dimension. Models share no parameters, so the summed loss gives each
+model exactly the gradient of its own loss, and the elementwise Adam update
+is the same as M separate optimizers. Each model stops on its own once its
+loss stops improving.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app.services.lstm import HIDDEN_SIZE, SEQUENCE_LENGTH, LSTMModel, build_sequences
+
+# Training schedule per model (upper bound; early stopping usually ends sooner)
+MAX_EPOCHS = 50
+LEARNING_RATE = 0.01
+
+# A model stops after PATIENCE epochs without improving its loss by MIN_DELTA
+# and keeps its best weights (Adam at this learning rate oscillates, so the
+# last weights are often not the best ones)
+PATIENCE = 10
+MIN_DELTA = 1e-4
+
+# All models start from the same seeded weights, so a pipe's forecast does
+# not depend on which other pipes were trained alongside it
+INIT_SEED = 42
+
+# Models trained together per stacked batch. Histories are chunked by
+# length, so smaller stacks pad less; 64 was fastest on CPU for 256 pipes
+MAX_MODELS_PER_BATCH = 64
+
+# Adam hyperparameters (torch.optim.Adam defaults)
+ADAM_BETAS = (0.9, 0.999)
+ADAM_EPS = 1e-8
+
+
+class StackedLSTM(nn.Module):
+    """
+    M independent single-layer LSTM regressors with stacked weights.
+
+    Parameter shapes carry the model dimension first, e.g. ``weight_hh`` is
+    (M, 4H, H) where nn.LSTM has (4H, H). Gates are stored as (input,
+    forget, output, cell) rather than nn.LSTM's (input, forget, cell,
+    output) so the three sigmoid gates form one contiguous slice.
+    """
+
+    def __init__(self, num_models: int, hidden_size: int = HIDDEN_SIZE):
+        super().__init__()
+        self.num_models = num_models
+        self.hidden_size = hidden_size
+
+        gates = 4 * hidden_size
+        self.weight_ih = nn.Parameter(torch.empty(num_models, gates, 1))
+        self.weight_hh = nn.Parameter(torch.empty(num_models, gates, hidden_size))
+        self.bias_ih = nn.Parameter(torch.empty(num_models, 1, gates))
+        self.bias_hh = nn.Parameter(torch.empty(num_models, 1, gates))
+        self.fc_weight = nn.Parameter(torch.empty(num_models, 1, hidden_size))
+        self.fc_bias = nn.Parameter(torch.empty(num_models, 1, 1))
+
+    @classmethod
+    def from_model(cls, model: LSTMModel, num_models: int) -> "StackedLSTM":
+        """Stack ``num_models`` copies of a single-layer LSTMModel's weights"""
+        if model.num_layers != 1:
+            raise ValueError("Only single-layer LSTMModels can be stacked")
+
+        stacked = cls(num_models, model.hidden_size)
+        order = _gate_order(model.hidden_size)
+        with torch.no_grad():
+            lstm = model.lstm
+            stacked.weight_ih.copy_(lstm.weight_ih_l0[order].expand(num_models, -1, -1))
+            stacked.weight_hh.copy_(lstm.weight_hh_l0[order].expand(num_models, -1, -1))
+            stacked.bias_ih.copy_(lstm.bias_ih_l0[order].expand(num_models, 1, -1))
+            stacked.bias_hh.copy_(lstm.bias_hh_l0[order].expand(num_models, 1, -1))
+            stacked.fc_weight.copy_(model.fc.weight.expand(num_models, -1, -1))
+            stacked.fc_bias.copy_(model.fc.bias.expand(num_models, 1, -1))
+        return stacked
+
+    def forward(self, x: torch.Tensor, rows: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Args:
+            x: (M, B, T) windows, B windows per model
+            rows: Optional model indices; x then holds windows for those
+                models only, shape (len(rows), B, T)
+
+        Returns:
+            (M, B) or (len(rows), B) prediction of the value following each window
+        """
+        weight_ih, weight_hh = self.weight_ih, self.weight_hh
+        bias_ih, bias_hh = self.bias_ih, self.bias_hh
+        fc_weight, fc_bias = self.fc_weight, self.fc_bias
+        if rows is not None:
+            weight_ih, weight_hh = weight_ih[rows], weight_hh[rows]
+            bias_ih, bias_hh = bias_ih[rows], bias_hh[rows]
+            fc_weight, fc_bias = fc_weight[rows], fc_bias[rows]
+
+        num_models, batch, steps = x.shape
+        h = x.new_zeros(num_models, batch, self.hidden_size)
+        c = x.new_zeros(num_models, batch, self.hidden_size)
+        input_weights = weight_ih.transpose(1, 2)
+        hidden_weights = weight_hh.transpose(1, 2)
+        # Kept as two parameters like nn.LSTM: Adam steps each one separately
+        bias = bias_ih + bias_hh
+
+        for t in range(steps):
+            gates = torch.baddbmm(bias, x[:, :, t:t + 1], input_weights)
+            gates = torch.baddbmm(gates, h, hidden_weights)
+            sig = torch.sigmoid(gates[:, :, :3 * self.hidden_size])
+            i, f, o = sig.chunk(3, dim=2)
+            g = torch.tanh(gates[:, :, 3 * self.hidden_size:])
+            c = f * c + i * g
+            h = o * torch.tanh(c)
+
+        return torch.baddbmm(fc_bias, h, fc_weight.transpose(1, 2)).squeeze(2)
+
+
+def _gate_order(hidden_size: int) -> torch.Tensor:
+    """Row permutation from nn.LSTM gate order (i, f, g, o) to (i, f, o, g)"""
+    i, f, g, o = torch.arange(4 * hidden_size).chunk(4)
+    return torch.cat([i, f, o, g])
+
+
+class MaskedAdam:
+    """
+    Adam over stacked parameters with a per-model on/off mask.
+
+    Equivalent to one torch.optim.Adam per model: moments and step counts
+    are kept per model, and models that have stopped keep both their
+    weights and their optimizer state frozen.
+    """
+
+    def __init__(self, params: List[nn.Parameter], num_models: int, lr: float = LEARNING_RATE):
+        self.params = params
+        self.lr = lr
+        self.steps = torch.zeros(num_models, device=params[0].device)
+        self.exp_avg = [torch.zeros_like(p) for p in params]
+        self.exp_avg_sq = [torch.zeros_like(p) for p in params]
+
+    @torch.no_grad()
+    def step(self, active: torch.Tensor) -> None:
+        """Update the parameters of models where ``active`` is True"""
+        beta1, beta2 = ADAM_BETAS
+        self.steps += active.float()
+        # Stopped models keep their step count; clamp only avoids 0 ** 0 noise
+        steps = self.steps.clamp(min=1)
+        step_size = self.lr / (1 - beta1 ** steps)
+        bias_correction2_sqrt = torch.sqrt(1 - beta2 ** steps)
+
+        for param, exp_avg, exp_avg_sq in zip(self.params, self.exp_avg, self.exp_avg_sq):
+            shape = (-1,) + (1,) * (param.dim() - 1)
+            mask = active.view(shape)
+            grad = param.grad
+
+            exp_avg.copy_(torch.where(mask, beta1 * exp_avg + (1 - beta1) * grad, exp_avg))
+            exp_avg_sq.copy_(torch.where(mask, beta2 * exp_avg_sq + (1 - beta2) * grad * grad, exp_avg_sq))
+
+            denom = exp_avg_sq.sqrt() / bias_correction2_sqrt.view(shape) + ADAM_EPS
+            update = step_size.view(shape) * exp_avg / denom
+            param.sub_(torch.where(mask, update, torch.zeros_like(update)))
+
+
+def stack_training_data(
+    sequences: List[Tuple[np.ndarray, np.ndarray]],
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Right-pad per-pipe training pairs into stacked tensors.
+
+    Args:
+        sequences: (X with shape (n, T, 1), y with shape (n, 1)) per pipe,
+            as built by ``lstm.build_sequences``
+
+    Returns:
+        Tuple of X (M, B, T), y (M, B) and a validity mask (M, B)
+    """
+    num_models = len(sequences)
+    batch = max(len(X) for X, _ in sequences)
+    steps = sequences[0][0].shape[1]
+
+    X_stacked = torch.zeros(num_models, batch, steps)
+    y_stacked = torch.zeros(num_models, batch)
+    mask = torch.zeros(num_models, batch)
+    for row, (X, y) in enumerate(sequences):
+        n = len(X)
+        X_stacked[row, :n] = torch.from_numpy(X[:, :, 0])
+        y_stacked[row, :n] = torch.from_numpy(y[:, 0])
+        mask[row, :n] = 1.0
+    return X_stacked, y_stacked, mask
+
+
+def train_stacked(
+    X: torch.Tensor,
+    y: torch.Tensor,
+    mask: torch.Tensor,
+    max_epochs: int = MAX_EPOCHS,
+    patience: int = PATIENCE,
+    min_delta: float = MIN_DELTA,
+    restore_best: bool = True,
+) -> Tuple[StackedLSTM, np.ndarray, np.ndarray]:
+    """
+    Train one model per pipe, all at once.
+
+    Every epoch is one full-batch step per model on its own windows (as the
+    single-pipe training loop did), with a per-model masked MSE.
+
+    Args:
+        X, y, mask: Stacked training data from ``stack_training_data``
+        max_epochs: Epoch cap per model
+        patience: Epochs without improvement before a model stops
+        min_delta: Minimum loss decrease that counts as improvement
+        restore_best: End with each model's lowest-loss weights rather than its last
+
+    Returns:
+        Tuple of (trained StackedLSTM, epochs trained per model, best loss per model)
+    """
+    num_models = X.shape[0]
+    device = X.device
+
+    # Seed the shared initial weights without disturbing the global RNG
+    with torch.random.fork_rng(devices=[]):
+        torch.manual_seed(INIT_SEED)
+        template = LSTMModel(input_size=1, hidden_size=HIDDEN_SIZE, num_layers=1)
+    model = StackedLSTM.from_model(template, num_models).to(device)
+    optimizer = MaskedAdam(list(model.parameters()), num_models)
+
+    counts = mask.sum(dim=1).clamp(min=1)
+    active = torch.ones(num_models, dtype=torch.bool, device=device)
+    best = torch.full((num_models,), math.inf, device=device)
+    waited = torch.zeros(num_models, dtype=torch.long, device=device)
+    epochs = torch.zeros(num_models, dtype=torch.long, device=device)
+    best_params = [p.detach().clone() for p in model.parameters()]
+
+    for _ in range(max_epochs):
+        # Only models still training are evaluated; stopped ones get zero gradient
+        rows = active.nonzero().squeeze(1)
+        model.zero_grad(set_to_none=False)
+        errors = (model(X[rows], rows) - y[rows]) ** 2
+        per_model = (errors * mask[rows]).sum(dim=1) / counts[rows]
+
+        with torch.no_grad():
+            loss = per_model.detach()
+            improved = loss < best[rows] - min_delta
+            # The loss was computed with the current weights: keep them if best
+            improved_rows = rows[improved]
+            for best_param, param in zip(best_params, model.parameters()):
+                best_param[improved_rows] = param[improved_rows]
+
+        # Parameters are disjoint per model, so the sum's gradient with
+        # respect to model m's weights is the gradient of model m's loss
+        per_model.sum().backward()
+        optimizer.step(active)
+
+        with torch.no_grad():
+            epochs[rows] += 1
+            best[rows] = torch.where(improved, loss, best[rows])
+            waited[rows] = torch.where(improved, torch.zeros_like(waited[rows]), waited[rows] + 1)
+            active[rows] = waited[rows] < patience
+
+        if not bool(active.any()):
+            break
+
+    if restore_best:
+        with torch.no_grad():
+            for best_param, param in zip(best_params, model.parameters()):
+                param.copy_(best_param)
+    model.eval()
+    return model, epochs.cpu().numpy(), best.cpu().numpy()
+
+
+def rollout_stacked(model: StackedLSTM, windows: torch.Tensor, steps: int) -> np.ndarray:
+    """
+    Autoregressive forecast, each model from its own pipe's last window.
+
+    Args:
+        model: Trained StackedLSTM
+        windows: (M, T) normalized last windows
+        steps: Number of future steps
+
+    Returns:
+        Normalized predictions with shape (M, steps)
+    """
+    outputs = torch.empty(windows.shape[0], steps)
+    x = windows.clone()
+    with torch.no_grad():
+        for step in range(steps):
+            pred = model(x.unsqueeze(1))[:, 0]
+            outputs[:, step] = pred.cpu()
+            x = torch.cat([x[:, 1:], pred.unsqueeze(1)], dim=1)
+    return outputs.numpy()
+
+
+def fit_and_rollout(
+    histories: List[np.ndarray],
+    steps: int,
+    seq_length: int = SEQUENCE_LENGTH,
+    device: Optional[torch.device] = None,
+    max_models: int = MAX_MODELS_PER_BATCH,
+    patience: int = PATIENCE,
+    restore_best: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Train one LSTM per normalized history and forecast each pipe forward.
+
+    Args:
+        histories: Normalized thickness histories, each longer than seq_length + 1
+        steps: Number of future steps
+        seq_length: Window length for training and rollout
+        device: Device to train on
+        max_models: Models per stacked batch
+        patience: Early-stopping patience (above MAX_EPOCHS disables it)
+        restore_best: Keep each model's lowest-loss weights
+
+    Returns:
+        Tuple of normalized predictions (N, steps) and epochs trained per pipe
+    """
+    forecasts = np.empty((len(histories), steps))
+    epochs = np.empty(len(histories), dtype=np.int64)
+    # Chunks of similar length waste less compute on padded windows
+    order = sorted(range(len(histories)), key=lambda idx: len(histories[idx]))
+    for start in range(0, len(order), max_models):
+        chunk = order[start:start + max_models]
+        sequences = [build_sequences(histories[idx], seq_length) for idx in chunk]
+        X, y, mask = (t.to(device or "cpu") for t in stack_training_data(sequences))
+
+        model, chunk_epochs, _ = train_stacked(
+            X, y, mask, patience=patience, restore_best=restore_best
+        )
+        windows = torch.tensor(
+            np.stack([histories[idx][-seq_length:] for idx in chunk]), dtype=torch.float32
+        )
+        forecasts[chunk] = rollout_stacked(model, windows.to(X.device), steps)
+        epochs[chunk] = chunk_epochs
+
+    return forecasts, epochs
@@ -0,0 +1,154 @@
+"""
+Offline LSTM training on fleet-wide measurement histories
+
+Usage:
+    python -m app.training --input fleet.jsonl --version 2024.06.01
+
+The input is a JSON Lines file with one PredictionRequest payload per pipe
+(the same body the backend sends to POST /predict). Each pipe's history is
+normalized on its own, windows from all pipes are pooled, and one model is
+trained and saved to MODEL_DIR/lstm-<version>.pt for the engine to serve.
+"""
+import argparse
+import logging
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app.core.config import settings
+from app.schemas import PredictionRequest
+from app.services.lstm import (
+    HIDDEN_SIZE,
+    NUM_LAYERS,
+    SEQUENCE_LENGTH,
+    LSTMModel,
+    build_sequences,
+    normalize_history,
+    save_artifact,
+)
+from app.services.predictor import PipeLifetimePredictor
+
+logger = logging.getLogger(__name__)
+
+
+def load_fleet_sequences(path: str) -> tuple:
+    """
+    Read fleet histories and build pooled, per-pipe normalized sequences.
+
+    Returns:
+        Tuple of (X, y, number of pipes contributing sequences)
+    """
+    predictor = PipeLifetimePredictor(load_lstm=False)
+    X_parts = []
+    y_parts = []
+    pipes = 0
+
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            request = PredictionRequest.model_validate_json(line)
+            _, values = predictor._prepare_history(request)
+            if len(values) <= SEQUENCE_LENGTH:
+                continue
+
+            normalized, _, _ = normalize_history(values)
+            X, y = build_sequences(normalized, SEQUENCE_LENGTH)
+            X_parts.append(X)
+            y_parts.append(y)
+            pipes += 1
+
+    if not X_parts:
+        raise ValueError(f"No pipe in {path} has more than {SEQUENCE_LENGTH} measurements")
+
+    return np.concatenate(X_parts), np.concatenate(y_parts), pipes
+
+
+def train(
+    X: np.ndarray,
+    y: np.ndarray,
+    epochs: int = 200,
+    batch_size: int = 256,
+    learning_rate: float = 0.01,
+    seed: int = 42,
+) -> tuple:
+    """
+    Train the serving LSTM on pooled sequences.
+
+    Returns:
+        Tuple of (trained model, final epoch loss)
+    """
+    torch.manual_seed(seed)
+
+    X_tensor = torch.from_numpy(X)
+    y_tensor = torch.from_numpy(y)
+
+    model = LSTMModel(input_size=1, hidden_size=HIDDEN_SIZE, num_layers=NUM_LAYERS)
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+
+    generator = torch.Generator().manual_seed(seed)
+    epoch_loss = float("nan")
+
+    model.train()
+    for epoch in range(epochs):
+        permutation = torch.randperm(len(X_tensor), generator=generator)
+        total_loss = 0.0
+
+        for start in range(0, len(X_tensor), batch_size):
+            batch_idx = permutation[start:start + batch_size]
+            optimizer.zero_grad()
+            output = model(X_tensor[batch_idx])
+            loss = criterion(output, y_tensor[batch_idx])
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch_idx)
+
+        epoch_loss = total_loss / len(X_tensor)
+        if (epoch + 1) % 20 == 0:
+            logger.info(f"Epoch {epoch + 1}/{epochs}, loss: {epoch_loss:.5f}")
+
+    model.eval()
+    return model, epoch_loss
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the fleet-wide LSTM artifact")
+    parser.add_argument("--input", required=True, help="JSON Lines file of PredictionRequest payloads")
+    parser.add_argument("--version", required=True, help="Artifact version, e.g. 2024.06.01")
+    parser.add_argument("--model-dir", default=settings.LSTM_MODEL_DIR, help="Artifact directory")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--learning-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    X, y, pipes = load_fleet_sequences(args.input)
+    logger.info(f"Training on {len(X)} sequences from {pipes} pipes")
+
+    model, final_loss = train(
+        X, y,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        seed=args.seed,
+    )
+
+    path = save_artifact(model, args.model_dir, args.version, training={
+        "pipes": pipes,
+        "sequences": int(len(X)),
+        "epochs": args.epochs,
+        "final_loss": final_loss,
+        "seed": args.seed,
+    })
+    logger.info(f"Saved LSTM artifact {args.version} to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Fast-mode benchmark for the AI Engine
+
+Compares the vectorized "fast" mode with the hybrid Prophet+LSTM path:
+- throughput (pipes per second) of PipeLifetimePredictor.predict_batch()
+  for fleet-sized batches in fast mode and a sample in hybrid mode
+- accuracy against the noise-free synthetic degradation curve (MAE and max
+  error in mm per forecast year) on the same sample for both modes
+- agreement of the predicted status between the two modes
+
+Usage (from ai_engine/):
+    python benchmarks/bench_fast_mode.py --output fast_mode.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
+
+from benchmarks.common import git_revision  # noqa: E402
+from benchmarks.synthetic import MATERIALS, expected_thickness, make_requests  # noqa: E402
+from app.schemas import PREDICTION_MODE_FAST, PREDICTION_MODE_HYBRID, PredictionRequest  # noqa: E402
+from app.services.predictor import PipeLifetimePredictor  # noqa: E402
+
+
+def _fleet(pipes_per_scenario: int, sizes: List[int], mode: str, seed: int) -> List[PredictionRequest]:
+    return [
+        request.model_copy(update={"mode": mode})
+        for points in sizes
+        for material in MATERIALS
+        for request in make_requests(pipes_per_scenario, points, material, seed)
+    ]
+
+
+def _throughput(predictor: PipeLifetimePredictor, requests: List[PredictionRequest], repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        predictor.predict_batch(requests)
+        best = min(best, time.perf_counter() - started)
+    return {
+        "pipes": len(requests),
+        "best_seconds": round(best, 4),
+        "pipes_per_second": round(len(requests) / best, 1),
+    }
+
+
+def _errors(requests: List[PredictionRequest], outcomes: list) -> np.ndarray:
+    """(pipes, years) absolute error against the synthetic ground truth"""
+    return np.array([
+        [
+            abs(prediction.predicted_thickness - expected_thickness(request, prediction.year))
+            for prediction in outcome
+        ]
+        for request, outcome in zip(requests, outcomes)
+    ])
+
+
+def _accuracy(errors: np.ndarray) -> dict:
+    return {
+        "mae_mm_by_year": [round(float(v), 4) for v in errors.mean(axis=0)],
+        "max_error_mm": round(float(errors.max()), 4),
+        "mae_mm": round(float(errors.mean()), 4),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Throughput and accuracy of both modes"""
+    predictor = PipeLifetimePredictor()
+    predictor.warm_up()
+
+    fleet = _fleet(args.fleet_pipes, args.sizes, PREDICTION_MODE_FAST, args.seed)
+    fast_throughput = _throughput(predictor, fleet, args.repeat)
+    print(f"fast    {fast_throughput['pipes_per_second']:10.1f} pipes/s", file=sys.stderr)
+
+    sample_hybrid = _fleet(args.sample_pipes, args.sizes, PREDICTION_MODE_HYBRID, args.seed + 1)
+    sample_fast = [r.model_copy(update={"mode": PREDICTION_MODE_FAST}) for r in sample_hybrid]
+
+    started = time.perf_counter()
+    hybrid_outcomes = predictor.predict_batch(sample_hybrid)
+    hybrid_seconds = time.perf_counter() - started
+    hybrid_throughput = {
+        "pipes": len(sample_hybrid),
+        "best_seconds": round(hybrid_seconds, 4),
+        "pipes_per_second": round(len(sample_hybrid) / hybrid_seconds, 1),
+    }
+    print(f"hybrid  {hybrid_throughput['pipes_per_second']:10.1f} pipes/s", file=sys.stderr)
+
+    fast_outcomes = predictor.predict_batch(sample_fast)
+
+    # Compare only pipes both modes scored
+    scored = [
+        i for i, (h, f) in enumerate(zip(hybrid_outcomes, fast_outcomes))
+        if not isinstance(h, Exception) and not isinstance(f, Exception)
+    ]
+    requests = [sample_hybrid[i] for i in scored]
+    hybrid_scored = [hybrid_outcomes[i] for i in scored]
+    fast_scored = [fast_outcomes[i] for i in scored]
+
+    status_agreement = np.mean([
+        h.status == f.status
+        for hybrid, fast in zip(hybrid_scored, fast_scored)
+        for h, f in zip(hybrid, fast)
+    ])
+
+    return {
+        "throughput": {
+            "fast": fast_throughput,
+            "hybrid": hybrid_throughput,
+            "speedup": round(
+                fast_throughput["pipes_per_second"] / hybrid_throughput["pipes_per_second"], 1
+            ),
+        },
+        "accuracy": {
+            "pipes": len(scored),
+            "fast": _accuracy(_errors(requests, fast_scored)),
+            "hybrid": _accuracy(_errors(requests, hybrid_scored)),
+            "status_agreement": round(float(status_agreement), 4),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine fast-mode benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[0, 3, 5, 20, 60])
+    parser.add_argument("--fleet-pipes", type=int, default=400,
+                        help="Fast-mode pipes per (size, material)")
+    parser.add_argument("--sample-pipes", type=int, default=3,
+                        help="Pipes per (size, material) scored in both modes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    import prophet
+
+    # Prophet and cmdstanpy log every fit at INFO
+    logging.basicConfig(level=logging.WARNING)
+    for name in ("cmdstanpy", "prophet"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results = run(args)
+
+    report = json.dumps({
+        "benchmark": "fast_mode",
+        **git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "prophet": prophet.__version__,
+        },
+        "config": {
+            "sizes": args.sizes,
+            "materials": MATERIALS,
+            "fleet_pipes_per_scenario": args.fleet_pipes,
+            "sample_pipes_per_scenario": args.sample_pipes,
+            "seed": args.seed,
+        },
+        **results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
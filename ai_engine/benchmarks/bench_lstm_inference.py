@@ -0,0 +1,196 @@
+"""
+LSTM inference-mode benchmark for the AI Engine
+
+Compares the eager, TorchScript and dynamically quantized (int8) LSTM on CPU:
+- rollout latency of the predictor's batched LSTM path for several batch sizes
+- accuracy delta against the eager float model, in mm of wall thickness, on
+  seeded synthetic histories (see synthetic.py)
+- the deviation on the validation rollout used to accept or reject a mode
+
+Usage (from ai_engine/):
+    python benchmarks/bench_lstm_inference.py --model-dir models --output lstm.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
+
+from benchmarks.common import git_revision, latency_stats  # noqa: E402
+from benchmarks.synthetic import MATERIALS, make_requests  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.lstm import (  # noqa: E402
+    INFERENCE_EAGER,
+    INFERENCE_MODES,
+    LSTMArtifact,
+    load_artifact,
+    optimize_for_inference,
+)
+from app.services.predictor import PipeLifetimePredictor  # noqa: E402
+
+
+def _predictor_for(artifact: LSTMArtifact) -> PipeLifetimePredictor:
+    """Predictor serving the given artifact on CPU"""
+    import torch
+
+    predictor = PipeLifetimePredictor(load_lstm=False)
+    predictor.load_models()
+    # Serving nodes are CPU-only (and int8 quantization is CPU-only)
+    predictor.device = torch.device("cpu")
+    predictor.lstm_artifact = artifact
+    return predictor
+
+
+def _lstm_items(count: int, sizes: List[int], seed: int) -> list:
+    """(sorted thickness values, age) items as the hybrid branch builds them"""
+    predictor = PipeLifetimePredictor(load_lstm=False)
+    items = []
+    for points in sizes:
+        for material in MATERIALS:
+            for request in make_requests(count, points, material, seed):
+                _, values = predictor._prepare_history(request)
+                items.append((values, request.age_years))
+    return items
+
+
+def _accuracy(predictions: List[Dict[int, float]], reference: List[Dict[int, float]]) -> dict:
+    """Absolute thickness deviation (mm) from the eager model"""
+    deltas = np.array([
+        abs(pred[age] - ref[age])
+        for pred, ref in zip(predictions, reference)
+        for age in ref
+    ])
+    return {
+        "max_abs_mm": round(float(deltas.max()), 5),
+        "mean_abs_mm": round(float(deltas.mean()), 5),
+        "p99_abs_mm": round(float(np.percentile(deltas, 99)), 5),
+    }
+
+
+def run(args: argparse.Namespace) -> tuple:
+    """
+    Benchmark every requested inference mode.
+
+    Returns:
+        Tuple of (per-mode results, artifact version)
+    """
+    base = load_artifact(args.model_dir, args.version or None)
+    if base is None:
+        raise SystemExit(f"No LSTM artifact found in {args.model_dir}")
+
+    items = _lstm_items(args.pipes, args.sizes, args.seed)
+    reference = _predictor_for(base)._lstm_predict_batch(items)
+
+    results = []
+    for mode in args.modes:
+        # Infinite tolerance: report the deviation instead of falling back
+        model, effective_mode, validation_error = optimize_for_inference(
+            base.model, mode, float("inf"), seq_length=base.seq_length
+        )
+        predictor = _predictor_for(
+            LSTMArtifact(model, base.version, base.metadata, effective_mode, validation_error)
+        )
+
+        latency = {}
+        for batch_size in args.batch_sizes:
+            batch = items[:batch_size]
+            predictor._lstm_predict_batch(batch)
+            samples = []
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                call_started = time.perf_counter()
+                predictor._lstm_predict_batch(batch)
+                samples.append(time.perf_counter() - call_started)
+            latency[str(batch_size)] = latency_stats(samples, time.perf_counter() - started)
+
+        result = {
+            "mode": mode,
+            "effective_mode": effective_mode,
+            "validation_max_abs_error": round(validation_error, 5),
+            "within_tolerance": validation_error <= args.tolerance,
+            "accuracy_vs_eager": _accuracy(predictor._lstm_predict_batch(items), reference),
+            "latency_by_batch_size": latency,
+        }
+        results.append(result)
+        print(
+            f"{mode:12} deviation {validation_error:.4f}  "
+            + "  ".join(
+                f"n={size}: p50 {stats['latency_ms']['p50']:.2f} ms"
+                for size, stats in latency.items()
+            ),
+            file=sys.stderr,
+        )
+
+    eager = next((r for r in results if r["mode"] == INFERENCE_EAGER), None)
+    if eager is not None:
+        for result in results:
+            result["p50_speedup_vs_eager"] = {
+                size: round(
+                    eager["latency_by_batch_size"][size]["latency_ms"]["p50"]
+                    / stats["latency_ms"]["p50"],
+                    3,
+                )
+                for size, stats in result["latency_by_batch_size"].items()
+            }
+
+    return results, base.version
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine LSTM inference-mode benchmark")
+    parser.add_argument("--model-dir", default=settings.LSTM_MODEL_DIR)
+    parser.add_argument("--version", default=settings.LSTM_MODEL_VERSION)
+    parser.add_argument("--modes", nargs="+", default=list(INFERENCE_MODES), choices=INFERENCE_MODES)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 32, 256])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5, 20, 60, 500],
+                        help="History sizes of the synthetic pipes")
+    parser.add_argument("--pipes", type=int, default=20, help="Pipes per (size, material)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--tolerance", type=float, default=settings.LSTM_QUANTIZATION_TOLERANCE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    import torch
+
+    results, version = run(args)
+
+    report = json.dumps({
+        "benchmark": "lstm_inference",
+        **git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "lstm_version": version,
+        },
+        "config": {
+            "sizes": args.sizes,
+            "pipes_per_scenario": args.pipes,
+            "batch_sizes": args.batch_sizes,
+            "iterations": args.iterations,
+            "tolerance": args.tolerance,
+            "seed": args.seed,
+        },
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
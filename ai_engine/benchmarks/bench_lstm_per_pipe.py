@@ -0,0 +1,182 @@
+"""
+Per-pipe LSTM training benchmark for the AI Engine
+
+Compares training one small LSTM per pipe in a Python loop (one
+LSTMModel + torch.optim.Adam per pipe, full-batch epochs) with the stacked
+trainer in app/services/stacked_lstm.py:
+- wall time to train and roll forward N pipes, and how many single-pipe
+  fits the stacked batch costs
+- forecast difference against the sequential loop, in mm of wall
+  thickness, with per-model early stopping and without it (the latter
+  should agree to float rounding)
+
+Usage (from ai_engine/):
+    python benchmarks/bench_lstm_per_pipe.py --output lstm_per_pipe.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+import torch
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
+
+from benchmarks.common import git_revision  # noqa: E402
+from benchmarks.synthetic import MATERIALS, make_requests  # noqa: E402
+from app.services import stacked_lstm  # noqa: E402
+from app.services.lstm import (  # noqa: E402
+    HIDDEN_SIZE,
+    SEQUENCE_LENGTH,
+    LSTMModel,
+    build_sequences,
+    normalize_history,
+    rollout,
+)
+
+STEPS = 5
+
+
+def _histories(batch: int, sizes: List[int], seed: int) -> List[Tuple[np.ndarray, float, float]]:
+    """(normalized history, mean, std) for ``batch`` synthetic pipes"""
+    histories = []
+    scenario = 0
+    while len(histories) < batch:
+        points = sizes[scenario % len(sizes)]
+        material = MATERIALS[scenario % len(MATERIALS)]
+        for request in make_requests(1, points, material, seed + scenario):
+            history = sorted(request.history_measurements, key=lambda m: m.date)
+            histories.append(normalize_history(np.array([m.value for m in history])))
+        scenario += 1
+    return histories[:batch]
+
+
+def _sequential(normalized: List[np.ndarray]) -> np.ndarray:
+    """One model and optimizer per pipe, MAX_EPOCHS full-batch steps each"""
+    forecasts = []
+    for history in normalized:
+        X, y = build_sequences(history, SEQUENCE_LENGTH)
+        torch.manual_seed(stacked_lstm.INIT_SEED)
+        model = LSTMModel(input_size=1, hidden_size=HIDDEN_SIZE, num_layers=1)
+        optimizer = torch.optim.Adam(model.parameters(), lr=stacked_lstm.LEARNING_RATE)
+        criterion = torch.nn.MSELoss()
+        X_t, y_t = torch.from_numpy(X), torch.from_numpy(y)
+        for _ in range(stacked_lstm.MAX_EPOCHS):
+            optimizer.zero_grad()
+            loss = criterion(model(X_t), y_t)
+            loss.backward()
+            optimizer.step()
+        model.eval()
+        forecasts.append(rollout(model, [history[-SEQUENCE_LENGTH:]], STEPS)[0])
+    return np.array(forecasts)
+
+
+def _denormalize(forecasts: np.ndarray, histories: list) -> np.ndarray:
+    means = np.array([mean for _, mean, _ in histories])[:, None]
+    stds = np.array([std for _, _, std in histories])[:, None]
+    return forecasts * stds + means
+
+
+def run(args: argparse.Namespace) -> list:
+    """Timings and forecast deltas per batch size"""
+    # Pay torch's one-off kernel initialization before timing anything
+    warm_up = [h for h, _, _ in _histories(2, args.sizes, args.seed)]
+    _sequential(warm_up)
+    stacked_lstm.fit_and_rollout(warm_up, STEPS)
+
+    results = []
+    for batch in args.batches:
+        histories = _histories(batch, args.sizes, args.seed)
+        normalized = [h for h, _, _ in histories]
+
+        started = time.perf_counter()
+        reference = _sequential(normalized)
+        sequential_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        stacked, epochs = stacked_lstm.fit_and_rollout(normalized, STEPS)
+        stacked_seconds = time.perf_counter() - started
+
+        # Same schedule as the sequential loop: must match it up to rounding
+        exact, _ = stacked_lstm.fit_and_rollout(
+            normalized, STEPS, patience=stacked_lstm.MAX_EPOCHS + 1, restore_best=False
+        )
+
+        reference_mm = _denormalize(reference, histories)
+        stacked_delta = np.abs(_denormalize(stacked, histories) - reference_mm)
+        exact_delta = np.abs(_denormalize(exact, histories) - reference_mm)
+        single_fit = sequential_seconds / batch
+
+        row = {
+            "pipes": batch,
+            "sequential_seconds": round(sequential_seconds, 4),
+            "stacked_seconds": round(stacked_seconds, 4),
+            "speedup": round(sequential_seconds / stacked_seconds, 1),
+            "single_fit_equivalents": round(stacked_seconds / single_fit, 1),
+            "mean_epochs": round(float(epochs.mean()), 1),
+            "early_stopping_delta_mm": {
+                "mean": round(float(stacked_delta.mean()), 4),
+                "max": round(float(stacked_delta.max()), 4),
+            },
+            "full_schedule_max_delta_mm": round(float(exact_delta.max()), 6),
+        }
+        print(
+            f"{batch:5d} pipes  sequential {sequential_seconds:8.3f}s  "
+            f"stacked {stacked_seconds:7.3f}s  speedup {row['speedup']:6.1f}x",
+            file=sys.stderr,
+        )
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine per-pipe LSTM training benchmark")
+    parser.add_argument("--batches", nargs="+", type=int, default=[1, 16, 64, 256])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5, 10, 20, 40],
+                        help="History lengths cycled across pipes")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="torch intra-op threads (1 mirrors a prediction worker)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    torch.set_num_threads(args.threads)
+
+    results = run(args)
+
+    report = json.dumps({
+        "benchmark": "lstm_per_pipe",
+        **git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+        },
+        "config": {
+            "batches": args.batches,
+            "sizes": args.sizes,
+            "threads": args.threads,
+            "max_epochs": stacked_lstm.MAX_EPOCHS,
+            "patience": stacked_lstm.PATIENCE,
+            "min_delta": stacked_lstm.MIN_DELTA,
+            "seed": args.seed,
+        },
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Predictor benchmark for the AI Engine
+
+Scores seeded synthetic histories (see synthetic.py) of several sizes and
+materials and measures, per scenario:
+- latency percentiles (p50/p95/p99) and throughput of PipeLifetimePredictor.predict()
+- the same for the HTTP /predict path (in-process TestClient, inline mode, no cache)
+- peak traced Python memory of one prediction
+
+Results are written as JSON together with the commit hash so runs can be
+diffed between commits. Runs offline on CPU.
+
+Usage (from ai_engine/):
+    python benchmarks/bench_predictor.py --output predictor.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+import numpy as np
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
+
+# The HTTP path is measured in-process without worker pools or caching
+os.environ.setdefault("PREDICTION_EXECUTION_MODE", "inline")
+os.environ["PREDICTION_CACHE_ENABLED"] = "false"
+
+from benchmarks.common import git_revision, latency_stats  # noqa: E402
+from benchmarks.synthetic import HISTORY_SIZES, MATERIALS, make_requests  # noqa: E402
+from app.schemas import PredictionRequest  # noqa: E402
+from app.services.predictor import PipeLifetimePredictor  # noqa: E402
+
+
+def _measure(call: Callable[[PredictionRequest], None], requests: List[PredictionRequest]) -> dict:
+    """Time ``call`` once per request, then trace peak memory of one extra call"""
+    samples = []
+    started = time.perf_counter()
+    for request in requests:
+        call_started = time.perf_counter()
+        call(request)
+        samples.append(time.perf_counter() - call_started)
+    stats = latency_stats(samples, time.perf_counter() - started)
+
+    tracemalloc.start()
+    call(requests[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats["peak_traced_mib"] = round(peak / 2 ** 20, 3)
+    return stats
+
+
+def run(sizes: List[int], materials: List[str], iterations: int, seed: int, http: bool) -> tuple:
+    """
+    Run every (target, size, material) scenario.
+
+    Returns:
+        Tuple of (scenario results, predictor used for predict())
+    """
+    predictor = PipeLifetimePredictor()
+    predictor.warm_up()
+
+    targets = {"predict": predictor.predict}
+
+    if http:
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        client = TestClient(app)
+        client.__enter__()
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.05)
+
+        def _post(request: PredictionRequest) -> None:
+            client.post("/predict", json=request.model_dump(mode="json")).raise_for_status()
+
+        targets["http"] = _post
+
+    results = []
+    try:
+        for target, call in targets.items():
+            for points in sizes:
+                for material in materials:
+                    requests = make_requests(iterations, points, material, seed)
+                    branch = predictor._select_branch(len(predictor._prepare_history(requests[0])[1]))
+                    stats = _measure(call, requests)
+                    results.append({
+                        "target": target,
+                        "history_points": points,
+                        "material": material,
+                        "branch": branch,
+                        **stats,
+                    })
+                    print(
+                        f"{target:8} {points:4} pts {material:16} {branch:12} "
+                        f"p50 {stats['latency_ms']['p50']:9.2f} ms  "
+                        f"p99 {stats['latency_ms']['p99']:9.2f} ms",
+                        file=sys.stderr,
+                    )
+    finally:
+        if http:
+            client.__exit__(None, None, None)
+
+    return results, predictor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine predictor benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=HISTORY_SIZES)
+    parser.add_argument("--materials", nargs="+", default=MATERIALS)
+    parser.add_argument("--iterations", type=int, default=20, help="Requests per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-http", action="store_true", help="Skip the HTTP /predict path")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    import prophet
+    import torch
+
+    # Prophet and cmdstanpy log every fit at INFO
+    logging.basicConfig(level=logging.WARNING)
+    for name in ("cmdstanpy", "prophet"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    started = time.perf_counter()
+    results, predictor = run(args.sizes, args.materials, args.iterations, args.seed, not args.no_http)
+
+    report = json.dumps({
+        "benchmark": "predictor",
+        **git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+            "prophet": prophet.__version__,
+            "lstm_version": predictor.lstm_version,
+            "lstm_inference_mode": predictor.lstm_inference_mode,
+        },
+        "config": {
+            "sizes": args.sizes,
+            "materials": args.materials,
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "results": results,
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "duration_s": round(time.perf_counter() - started, 1),
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Prophet warm-start benchmark for the AI Engine
+
+Simulates a pipe being rescored after one or two new measurements: a first
+fit on the shorter history provides stored parameters, then the full
+history is fitted cold (default initialization) and warm (initialized from
+the stored parameters). Reports optimizer iterations, wall time and the
+5-year forecast difference (mm) between warm and cold fits.
+
+Usage (from ai_engine/):
+    python benchmarks/bench_prophet_warm_start.py --output prophet_warm_start.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
+
+from benchmarks.common import git_revision  # noqa: E402
+from benchmarks.synthetic import MATERIALS, make_requests  # noqa: E402
+from app.services.predictor import PipeLifetimePredictor  # noqa: E402
+from app.services.prophet_params import extract_params, warm_start_init  # noqa: E402
+
+
+def _fit(dates: np.ndarray, values: np.ndarray, init: Optional[dict] = None) -> tuple:
+    """
+    Fit Prophet with the predictor's settings.
+
+    Returns:
+        Tuple of (model, wall seconds, optimizer iterations)
+    """
+    import pandas as pd
+    from prophet import Prophet
+
+    model = Prophet(
+        yearly_seasonality=False,
+        weekly_seasonality=False,
+        daily_seasonality=False,
+        changepoint_prior_scale=0.05,
+    )
+    kwargs = {"init": init} if init is not None else {}
+
+    started = time.perf_counter()
+    model.fit(
+        pd.DataFrame({"ds": dates.astype("datetime64[ns]"), "y": values}),
+        save_iterations=True,
+        **kwargs,
+    )
+    elapsed = time.perf_counter() - started
+
+    iterations = model.stan_backend.stan_fit.optimized_iterations_np.shape[0]
+    return model, elapsed, iterations
+
+
+def _forecast(model, dates: np.ndarray) -> np.ndarray:
+    import pandas as pd
+
+    future = dates[-1] + np.arange(1, 6) * np.timedelta64(365, "D")
+    return model.predict(pd.DataFrame({"ds": future.astype("datetime64[ns]")}))["yhat"].to_numpy()
+
+
+def _summary(values: List[float], digits: int = 3) -> dict:
+    array = np.array(values, dtype=float)
+    return {
+        "mean": round(float(array.mean()), digits),
+        "p50": round(float(np.percentile(array, 50)), digits),
+        "p95": round(float(np.percentile(array, 95)), digits),
+    }
+
+
+def run(sizes: List[int], pipes: int, new_points: int, seed: int) -> List[dict]:
+    """Compare cold and warm refits per history size"""
+    predictor = PipeLifetimePredictor(load_lstm=False)
+    results = []
+
+    for points in sizes:
+        cold_iters, warm_iters, cold_ms, warm_ms, deltas = [], [], [], [], []
+
+        for material in MATERIALS:
+            for request in make_requests(pipes, points, material, seed):
+                dates, values = predictor._prepare_history(request)
+                previous_dates, previous_values = dates[:-new_points], values[:-new_points]
+
+                previous_model, _, _ = _fit(previous_dates, previous_values)
+                stored = extract_params(previous_model, previous_dates, previous_values)
+
+                cold_model, cold_s, cold_n = _fit(dates, values)
+                warm_model, warm_s, warm_n = _fit(
+                    dates, values, init=warm_start_init(stored, dates, values)
+                )
+
+                cold_iters.append(cold_n)
+                warm_iters.append(warm_n)
+                cold_ms.append(cold_s * 1000)
+                warm_ms.append(warm_s * 1000)
+                deltas.append(float(np.abs(
+                    _forecast(warm_model, dates) - _forecast(cold_model, dates)
+                ).max()))
+
+        result = {
+            "history_points": points,
+            "fits": len(cold_iters),
+            "cold_iterations": _summary(cold_iters, 1),
+            "warm_iterations": _summary(warm_iters, 1),
+            "iteration_reduction": round(1 - sum(warm_iters) / sum(cold_iters), 4),
+            "cold_wall_ms": _summary(cold_ms),
+            "warm_wall_ms": _summary(warm_ms),
+            "wall_time_reduction": round(1 - sum(warm_ms) / sum(cold_ms), 4),
+            "forecast_max_abs_delta_mm": round(max(deltas), 5),
+        }
+        results.append(result)
+        print(
+            f"{points:4} pts  iterations {result['cold_iterations']['mean']:8.1f} -> "
+            f"{result['warm_iterations']['mean']:8.1f}  wall {result['cold_wall_ms']['mean']:8.1f} -> "
+            f"{result['warm_wall_ms']['mean']:8.1f} ms",
+            file=sys.stderr,
+        )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine Prophet warm-start benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5, 20, 60, 150, 500])
+    parser.add_argument("--pipes", type=int, default=4, help="Pipes per (size, material)")
+    parser.add_argument("--new-points", type=int, default=1, help="Measurements added since the previous fit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    import prophet
+
+    # Prophet and cmdstanpy log every fit at INFO
+    logging.basicConfig(level=logging.WARNING)
+    for name in ("cmdstanpy", "prophet"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results = run(args.sizes, args.pipes, args.new_points, args.seed)
+
+    report = json.dumps({
+        "benchmark": "prophet_warm_start",
+        **git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "prophet": prophet.__version__,
+        },
+        "config": {
+            "sizes": args.sizes,
+            "pipes_per_scenario": args.pipes,
+            "materials": MATERIALS,
+            "new_points": args.new_points,
+            "seed": args.seed,
+        },
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
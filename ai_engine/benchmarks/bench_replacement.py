@@ -0,0 +1,163 @@
+"""
+Replacement planning benchmark for the AI Engine
+
+Times app/services/replacement.plan_replacements on seeded synthetic fleets
+and checks its Lagrangian bound against the exact LP relaxation:
+- solve time (excluding request parsing) and optimality gap by fleet size
+- for fleets up to --lp-max segments, the LP optimum from SciPy's HiGHS
+  solver; the reported bound must not be below it, and should be close
+
+Usage (from ai_engine/):
+    python benchmarks/bench_replacement.py --output replacement.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import uuid
+
+import numpy as np
+import scipy
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix, vstack
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
+
+from benchmarks.common import git_revision  # noqa: E402
+from benchmarks.synthetic import MATERIALS  # noqa: E402
+from app.schemas import ReplacementPlanRequest  # noqa: E402
+from app.services import replacement  # noqa: E402
+
+
+def _request(segments: int, years: int, budget_share: float, seed: int) -> ReplacementPlanRequest:
+    """
+    Fleet with skewed failure probabilities rising 0-50% a year.
+
+    The annual budget replaces ``budget_share`` of the fleet's total cost.
+    """
+    rng = np.random.default_rng(seed)
+    first_year = rng.beta(0.5, 8.0, segments)
+    growth = rng.uniform(1.0, 1.5, segments)
+    probabilities = np.minimum(first_year[:, None] * growth[:, None] ** np.arange(years), 1.0)
+    lengths = rng.uniform(4.0, 12.0, segments)
+    request = ReplacementPlanRequest(
+        segments=[
+            {
+                "pipe_id": uuid.UUID(int=idx + 1),
+                "length_m": float(lengths[idx]),
+                "failure_probabilities": np.round(probabilities[idx], 4).tolist(),
+                "material": MATERIALS[idx % len(MATERIALS)],
+            }
+            for idx in range(segments)
+        ],
+        cost_model={"cost_per_meter": 100.0, "fixed_cost": 500.0, "material_cost_per_meter": {"cast_iron": 150.0}},
+        annual_budget=1.0,
+        years=years,
+    )
+    request.annual_budget = float(replacement.segment_costs(request).sum() * budget_share)
+    return request
+
+
+def _lp_avoided(request: ReplacementPlanRequest) -> float:
+    """Failures avoided by the optimal fractional plan (LP relaxation)"""
+    failures = replacement.yearly_failures(replacement.failure_matrix(request))
+    benefit = replacement.failures_avoided(failures)
+    cost = replacement.segment_costs(request)
+    segments, years = benefit.shape
+    cells = segments * years
+
+    # x[i, y] in [0, 1]; each segment at most once; each year within budget
+    once = coo_matrix((np.ones(cells), (np.repeat(np.arange(segments), years), np.arange(cells))))
+    budget = coo_matrix((np.repeat(cost, years), (np.tile(np.arange(years), segments), np.arange(cells))))
+    result = linprog(
+        -benefit.ravel(),
+        A_ub=vstack([once, budget]).tocsr(),
+        b_ub=np.concatenate([np.ones(segments), np.full(years, request.annual_budget)]),
+        bounds=(0.0, 1.0),
+        method="highs",
+    )
+    return float(-result.fun)
+
+
+def run(args: argparse.Namespace) -> list:
+    """Solve time, gap and LP check per fleet size"""
+    results = []
+    for segments in args.segments:
+        request = _request(segments, args.years, args.budget_share, args.seed)
+        started = time.perf_counter()
+        plan = replacement.plan_replacements(request)
+        seconds = time.perf_counter() - started
+
+        row = {
+            "segments": segments,
+            "seconds": round(seconds, 4),
+            "planned": len(plan.replacements),
+            "optimality_gap": plan.optimality_gap,
+            "expected_failures_baseline": plan.expected_failures_baseline,
+            "expected_failures_planned": plan.expected_failures_planned,
+            "expected_failures_lower_bound": plan.expected_failures_lower_bound,
+        }
+        if segments <= args.lp_max:
+            started = time.perf_counter()
+            lp_avoided = _lp_avoided(request)
+            bound_avoided = plan.expected_failures_baseline - plan.expected_failures_lower_bound
+            row["lp"] = {
+                "seconds": round(time.perf_counter() - started, 3),
+                "avoided": round(lp_avoided, 6),
+                "bound_excess": round((bound_avoided - lp_avoided) / lp_avoided, 6),
+            }
+        print(
+            f"{segments:7d} segments  {seconds:7.3f}s  gap {plan.optimality_gap:.4%}",
+            file=sys.stderr,
+        )
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine replacement planning benchmark")
+    parser.add_argument("--segments", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--budget-share", type=float, default=0.05,
+                        help="Annual budget as a share of the fleet's total replacement cost")
+    parser.add_argument("--lp-max", type=int, default=10000,
+                        help="Largest fleet checked against the exact LP relaxation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run(args)
+
+    report = json.dumps({
+        "benchmark": "replacement",
+        **git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+        },
+        "config": {
+            "segments": args.segments,
+            "years": args.years,
+            "budget_share": args.budget_share,
+            "bound_iterations": replacement.BOUND_ITERATIONS,
+            "seed": args.seed,
+        },
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Fleet scenario simulation benchmark for the AI Engine
+
+Loads a seeded synthetic fleet into a FleetSnapshot and times
+app/services/scenarios.simulate over it:
+- snapshot load time (pydantic pipes to column arrays)
+- simulation wall time and pipe-samples per second, per scenario count and
+  thread count
+- time to the first streamed progress event
+
+Usage (from ai_engine/):
+    python benchmarks/bench_scenarios.py --output scenarios.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
+
+from benchmarks.common import git_revision  # noqa: E402
+from benchmarks.synthetic import MATERIAL_PROFILES, MATERIALS  # noqa: E402
+from app.schemas import FleetPipe, Scenario, ScenarioRequest  # noqa: E402
+from app.services import scenarios  # noqa: E402
+from app.services.predictor import PipeLifetimePredictor  # noqa: E402
+
+
+def _fleet(pipes: int, seed: int) -> List[FleetPipe]:
+    """Pipes spread over materials, ages 0-60 years and 4-12 m lengths"""
+    rng = np.random.default_rng(seed)
+    fleet = []
+    for idx in range(pipes):
+        material = MATERIALS[idx % len(MATERIALS)]
+        nominal, rate = MATERIAL_PROFILES[material]
+        age = int(rng.integers(0, 61))
+        pipe_rate = float(rng.gamma(4.0, rate / 4.0))
+        fleet.append(FleetPipe(
+            pipe_id=uuid.UUID(int=int(rng.integers(0, 2 ** 63))),
+            material=material,
+            age_years=age,
+            current_wall_thickness=max(nominal - pipe_rate * age, 1.0),
+            corrosion_rate=pipe_rate,
+            length_m=float(rng.uniform(4.0, 12.0)),
+        ))
+    return fleet
+
+
+def _request(count: int, args: argparse.Namespace) -> ScenarioRequest:
+    """``count`` scenarios stepping rates up by 10% each"""
+    return ScenarioRequest(
+        scenarios=[
+            Scenario(name=f"rate x{1 + step / 10:.1f}", rate_multiplier=1 + step / 10)
+            for step in range(count)
+        ],
+        horizon_years=args.horizon,
+        samples=args.samples,
+        seed=args.seed,
+    )
+
+
+def run(args: argparse.Namespace, snapshot: scenarios.FleetSnapshot) -> list:
+    """Timings per thread count and scenario count"""
+    critical = PipeLifetimePredictor.CRITICAL_THICKNESS
+    results = []
+    for threads in args.threads:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            # Allocate the threads' scratch arrays before timing
+            for _ in scenarios.simulate(snapshot, _request(1, args), critical, pool, threads):
+                pass
+
+            for count in args.scenarios:
+                started = time.perf_counter()
+                first_progress = None
+                for event in scenarios.simulate(snapshot, _request(count, args), critical, pool, threads):
+                    if event["event"] == "progress" and first_progress is None:
+                        first_progress = time.perf_counter() - started
+                seconds = time.perf_counter() - started
+
+                cells = len(snapshot) * args.samples * count
+                row = {
+                    "threads": threads,
+                    "scenarios": count,
+                    "seconds": round(seconds, 3),
+                    "seconds_per_scenario": round(seconds / count, 3),
+                    "first_progress_seconds": round(first_progress, 3) if first_progress is not None else None,
+                    "pipe_samples_per_second": round(cells / seconds),
+                }
+                print(
+                    f"{threads:3d} threads  {count:3d} scenarios  {seconds:7.3f}s  "
+                    f"{row['pipe_samples_per_second'] / 1e6:7.1f}M pipe-samples/s",
+                    file=sys.stderr,
+                )
+                results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine fleet scenario simulation benchmark")
+    parser.add_argument("--pipes", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--scenarios", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, os.cpu_count() or 1])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    args.threads = sorted(set(args.threads))
+
+    fleet = _fleet(args.pipes, args.seed)
+    started = time.perf_counter()
+    snapshot = scenarios.FleetSnapshot(fleet, version=1)
+    load_seconds = time.perf_counter() - started
+
+    results = run(args, snapshot)
+
+    report = json.dumps({
+        "benchmark": "scenarios",
+        **git_revision(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+        },
+        "config": {
+            "pipes": args.pipes,
+            "samples": args.samples,
+            "horizon": args.horizon,
+            "scenarios": args.scenarios,
+            "threads": args.threads,
+            "chunk_cells": scenarios.CHUNK_CELLS,
+            "seed": args.seed,
+        },
+        "snapshot_load_seconds": round(load_seconds, 3),
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Startup benchmark for the AI Engine
+
+Starts the engine with uvicorn in a subprocess and measures:
+- time until the server is listening (/health answers)
+- time until warm-up completes (/ready answers 200)
+- latency of the first /predict request sent right after listening
+- latency of a /predict request sent after warm-up
+
+Usage (from ai_engine/):
+    python benchmarks/bench_startup.py --output startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+import httpx
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _hybrid_payload() -> dict:
+    """Request with enough history for the full hybrid branch"""
+    today = date.today()
+    return {
+        "pipe_id": str(uuid.uuid4()),
+        "material": "steel",
+        "age_years": 12,
+        "current_wall_thickness": 18.5,
+        "corrosion_rate_historical": 0.3,
+        "history_measurements": [
+            {"date": (today - timedelta(days=180 * (9 - i))).isoformat(), "value": 20.0 - 0.16 * i}
+            for i in range(10)
+        ],
+    }
+
+
+def _wait_for(client: httpx.Client, path: str, expected: int, started: float, timeout: float) -> float:
+    """Poll an endpoint until it returns the expected status; returns elapsed seconds"""
+    while True:
+        try:
+            if client.get(path).status_code == expected:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError(f"{path} did not return {expected} within {timeout}s")
+        time.sleep(0.02)
+
+
+def run(mode: str, timeout: float) -> dict:
+    """Start one engine instance and collect startup timings"""
+    port = _free_port()
+    env = dict(os.environ, PREDICTION_EXECUTION_MODE=mode, PREDICTION_CACHE_ENABLED="false")
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ENGINE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            listening = _wait_for(client, "/health", 200, started, timeout)
+
+            request_started = time.perf_counter()
+            client.post("/predict", json=_hybrid_payload()).raise_for_status()
+            first_request = time.perf_counter() - request_started
+
+            ready = _wait_for(client, "/ready", 200, started, timeout)
+
+            request_started = time.perf_counter()
+            client.post("/predict", json=_hybrid_payload()).raise_for_status()
+            warm_request = time.perf_counter() - request_started
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        "mode": mode,
+        "time_to_listening_s": round(listening, 3),
+        "time_to_ready_s": round(ready, 3),
+        "first_request_latency_s": round(first_request, 3),
+        "warm_request_latency_s": round(warm_request, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Engine startup benchmark")
+    parser.add_argument("--modes", nargs="+", default=["inline", "process"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = [
+        run(mode, args.timeout)
+        for mode in args.modes
+        for _ in range(args.repeat)
+    ]
+
+    report = json.dumps({"benchmark": "startup", "results": results}, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Helpers shared by the AI Engine benchmarks
+"""
+import os
+import subprocess
+from typing import List
+
+import numpy as np
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_revision() -> dict:
+    """Commit hash and dirty flag of the working tree"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ENGINE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--", "."], cwd=ENGINE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def latency_stats(samples: List[float], elapsed: float) -> dict:
+    """Latency percentiles (ms) and throughput of timed calls"""
+    latencies = np.array(samples) * 1000
+    return {
+        "iterations": len(samples),
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p95": round(float(np.percentile(latencies, 95)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3),
+            "mean": round(float(latencies.mean()), 3),
+            "min": round(float(latencies.min()), 3),
+            "max": round(float(latencies.max()), 3),
+        },
+        "throughput_per_s": round(len(samples) / elapsed, 2),
+    }
@@ -0,0 +1,98 @@
+"""
+Seeded synthetic degradation histories for benchmarks
+
+The same (seed, material, points) always yields the same measurements, so
+results are comparable between commits. Dates are laid out relative to
+today because the predictor drops measurements older than the pipe's
+production date.
+"""
+import uuid
+from datetime import date, timedelta
+from typing import List
+
+import numpy as np
+
+from app.schemas import PredictionRequest
+
+HISTORY_SIZES = [0, 3, 5, 20, 60, 500]
+MATERIALS = ["steel", "cast_iron", "ductile_iron", "stainless_steel", "pvc"]
+
+# Nominal wall thickness (mm) and mean corrosion rate (mm/year) per material
+MATERIAL_PROFILES = {
+    "steel": (24.0, 0.30),
+    "cast_iron": (26.0, 0.35),
+    "ductile_iron": (24.0, 0.25),
+    "stainless_steel": (22.0, 0.08),
+    "pvc": (20.0, 0.03),
+}
+
+# Every pipe is old enough to hold 500 monthly measurements
+AGE_YEARS = 45
+
+# Corrosion acceleration (mm/year^2) shared by every synthetic pipe
+ACCELERATION = 0.0005
+
+
+def make_request(points: int, material: str = "steel", seed: int = 0) -> PredictionRequest:
+    """
+    Build one PredictionRequest with a seeded degradation history.
+
+    Measurements are evenly spaced over the pipe's life up to today and
+    follow a slightly accelerating corrosion curve with gaussian noise.
+
+    Args:
+        points: Number of history measurements
+        material: Pipe material (key of MATERIAL_PROFILES)
+        seed: Base seed
+
+    Returns:
+        PredictionRequest with a deterministic pipe_id and history
+    """
+    nominal, rate = MATERIAL_PROFILES[material]
+    rng = np.random.default_rng([seed, points, MATERIALS.index(material)])
+
+    today = date.today()
+    span_days = (AGE_YEARS - 1) * 365
+    offsets = np.linspace(span_days, 0, points, dtype=int) if points else np.empty(0, dtype=int)
+    years = (span_days - offsets) / 365.0
+
+    pipe_rate = rate * rng.uniform(0.8, 1.2)
+    values = nominal - pipe_rate * years - ACCELERATION * years ** 2 + rng.normal(0, 0.05, points)
+
+    history = [
+        {"date": (today - timedelta(days=int(offset))).isoformat(), "value": round(float(value), 3)}
+        for offset, value in zip(offsets, values)
+    ]
+
+    current_thickness = float(values[-1]) if points else nominal - pipe_rate * (AGE_YEARS - 1)
+
+    return PredictionRequest(
+        pipe_id=uuid.UUID(int=int(rng.integers(0, 2 ** 63))),
+        material=material,
+        age_years=AGE_YEARS,
+        current_wall_thickness=round(current_thickness, 3),
+        corrosion_rate_historical=round(pipe_rate, 4),
+        history_measurements=history,
+    )
+
+
+def make_requests(
+    count: int,
+    points: int,
+    material: str = "steel",
+    seed: int = 0,
+) -> List[PredictionRequest]:
+    """Distinct seeded requests sharing history size and material"""
+    return [make_request(points, material, seed=seed * 100003 + i) for i in range(count)]
+
+
+def expected_thickness(request: PredictionRequest, years_ahead: float) -> float:
+    """
+    Noise-free thickness of a synthetic pipe ``years_ahead`` years from today.
+
+    Ground truth for accuracy benchmarks; the request's corrosion rate is the
+    pipe's own rate rounded to 4 decimals.
+    """
+    nominal, _ = MATERIAL_PROFILES[request.material]
+    years = AGE_YEARS - 1 + years_ahead
+    return nominal - request.corrosion_rate_historical * years - ACCELERATION * years ** 2
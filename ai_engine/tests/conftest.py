@@ -0,0 +1,11 @@
+"""
+Shared test setup for the AI Engine
+
+Usage (from ai_engine/):
+    python -m pytest tests
+"""
+import os
+import sys
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ENGINE_DIR)
@@ -0,0 +1,60 @@
+"""Tests for the stacked robust linear fits of fast mode"""
+import numpy as np
+
+from app.services import fast_linear
+
+
+def _fit(values, years=None, **kwargs):
+    values = np.asarray(values, dtype=float)[None, :]
+    if years is None:
+        # Yearly readings up to t = 0
+        years = np.arange(values.shape[1], dtype=float) - (values.shape[1] - 1)
+    years = np.asarray(years, dtype=float).reshape(values.shape)
+    return fast_linear.fit_linear_trends(years, values, np.ones_like(values, dtype=bool), **kwargs)
+
+
+def test_declining_history_follows_its_trend():
+    intercept, slope, _, _, fitted = _fit([12.0, 11.8, 11.6, 11.4, 11.2], non_increasing=True)
+
+    assert fitted[0]
+    np.testing.assert_allclose(slope, [-0.2], atol=1e-9)
+    np.testing.assert_allclose(intercept, [11.2], atol=1e-9)
+
+
+def test_rising_history_is_not_extrapolated_upward():
+    values = [10.0, 11.0, 12.0, 13.0, 14.0]
+    intercept, slope, covariance, _, fitted = _fit(values, non_increasing=True)
+
+    assert fitted[0]
+    assert slope[0] == 0.0
+    # The level is a weighted mean of the readings, not the rising line at t = 0
+    assert min(values) <= intercept[0] <= max(values)
+    assert covariance[0, 0, 1] == 0.0
+
+    mean, _ = fast_linear.forecast(intercept, slope, covariance, np.zeros(1), np.arange(1, 6))
+    assert mean.max() <= max(values)
+
+
+def test_flat_history_keeps_its_level():
+    intercept, slope, _, _, _ = _fit([12.0, 12.05, 11.95, 12.0, 12.02], non_increasing=True)
+
+    assert slope[0] <= 0.0
+    np.testing.assert_allclose(intercept, [12.0], atol=0.05)
+
+
+def test_rising_fit_is_kept_without_non_increasing():
+    intercept, slope, _, _, _ = _fit([10.0, 11.0, 12.0, 13.0, 14.0])
+
+    np.testing.assert_allclose(slope, [1.0], atol=1e-9)
+    np.testing.assert_allclose(intercept, [14.0], atol=1e-9)
+
+
+def test_crossing_times_of_flat_trend_above_threshold_are_never():
+    intercept, slope, covariance, residual_var, _ = _fit(
+        [15.0, 16.0, 17.0, 18.0, 19.0], non_increasing=True
+    )
+
+    expected, _, _ = fast_linear.crossing_times(
+        intercept, slope, covariance, residual_var, threshold=14.0, z=1.645
+    )
+    assert np.isinf(expected[0])
@@ -0,0 +1,96 @@
+"""Tests for the vectorized (fast, cohort, lifetime) predictor paths"""
+import uuid
+from datetime import date
+
+import pytest
+
+from app.schemas import PredictionRequest
+from app.services import cohorts
+from app.services.predictor import PipeLifetimePredictor
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    return PipeLifetimePredictor(load_lstm=False)
+
+
+def _request(values, mode="fast", current_wall_thickness=12.0, **kwargs):
+    return PredictionRequest(
+        pipe_id=uuid.uuid4(),
+        material="steel",
+        age_years=20,
+        current_wall_thickness=current_wall_thickness,
+        corrosion_rate_historical=0.1,
+        mode=mode,
+        history_measurements=[
+            {"date": date(2019 + offset, 1, 1), "value": value}
+            for offset, value in enumerate(values)
+        ],
+        **kwargs,
+    )
+
+
+def test_fast_mode_does_not_extrapolate_a_rising_history(predictor):
+    values = [10.0, 11.0, 12.0, 13.0, 14.0]
+
+    predictions = predictor.predict(_request(values))
+
+    assert len(predictions) == 5
+    assert all(p.predicted_thickness <= max(values) for p in predictions)
+    thickness = [p.predicted_thickness for p in predictions]
+    assert thickness == sorted(thickness, reverse=True)
+
+
+def test_fast_mode_follows_a_declining_history(predictor):
+    predictions = predictor.predict(_request([12.0, 11.8, 11.6, 11.4, 11.2]))
+
+    thickness = [p.predicted_thickness for p in predictions]
+    assert thickness == sorted(thickness, reverse=True)
+    assert thickness[0] < 11.2
+
+
+def test_lifetime_of_a_rising_history_starts_from_its_readings(predictor):
+    # Rising readings around the 18 mm warning threshold: extrapolated to
+    # today they would stay above it, their level is already below it
+    values = [13.0, 14.0, 15.0, 16.0, 17.0]
+
+    lifetime, = predictor.predict_lifetimes([_request(values, current_wall_thickness=17.0)])
+
+    assert lifetime.error is None
+    assert lifetime.corrosion_rate == 0.0
+    assert lifetime.warning.years == 0.0
+    assert lifetime.warning.expected_date == date.today()
+    # Flat above the 14 mm critical threshold: never crossed
+    assert lifetime.critical.beyond_horizon
+
+
+def test_lifetime_of_a_declining_history_crosses_at_its_rate(predictor):
+    values = [16.0, 15.8, 15.6, 15.4, 15.2]
+
+    lifetime, = predictor.predict_lifetimes([_request(values, current_wall_thickness=15.2)])
+
+    assert lifetime.corrosion_rate == pytest.approx(0.2, abs=1e-3)
+    # 15.2 mm on 2023-01-01, 1.2 mm above critical at 0.2 mm/year
+    elapsed = (date.today() - date(2023, 1, 1)).days / 365.25
+    assert lifetime.critical.years == pytest.approx(6.0 - elapsed, abs=0.02)
+    assert lifetime.critical.earliest_date <= lifetime.critical.expected_date
+
+
+def test_cohort_mode_does_not_extrapolate_a_rising_history(predictor):
+    declining = [
+        _request([12.0 - 0.3 * year + 0.01 * pipe for year in range(5)], mode="cohort")
+        for pipe in range(10)
+    ]
+    table = predictor.fit_cohorts([cohorts.observation(r) for r in declining], version=1)
+    values = [10.0, 11.0, 12.0, 13.0, 14.0]
+
+    results, profiles = predictor.predict_batch_profiled(
+        [_request(values, mode="cohort")], cohort_table=table
+    )
+
+    assert profiles[0].branch == predictor.BRANCH_COHORT
+    thickness = [p.predicted_thickness for p in results[0]]
+    # The cohort's 0.3 mm/year bends the flat level down, never up
+    assert max(thickness) <= max(values)
+    assert thickness == sorted(thickness, reverse=True)
+    assert thickness[-1] < thickness[0]
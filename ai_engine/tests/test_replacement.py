@@ -0,0 +1,101 @@
+"""Tests for the budget-constrained replacement planner"""
+import itertools
+import uuid
+
+import numpy as np
+
+from app.schemas import ReplacementPlanRequest
+from app.services import replacement
+
+
+def _request(probabilities, annual_budget, years, costs=None):
+    return ReplacementPlanRequest(
+        segments=[
+            {
+                "pipe_id": uuid.UUID(int=idx + 1),
+                "length_m": 10.0,
+                "failure_probabilities": list(p),
+                "replacement_cost": None if costs is None else float(costs[idx]),
+            }
+            for idx, p in enumerate(probabilities)
+        ],
+        cost_model={"cost_per_meter": 100.0},
+        annual_budget=annual_budget,
+        years=years,
+    )
+
+
+def _fleet(segments, years, seed):
+    rng = np.random.default_rng(seed)
+    first_year = rng.beta(0.5, 4.0, segments)
+    growth = rng.uniform(1.0, 1.8, segments)
+    probabilities = np.minimum(first_year[:, None] * growth[:, None] ** np.arange(years), 1.0)
+    return np.round(probabilities, 4), rng.uniform(500.0, 3000.0, segments)
+
+
+def test_yearly_failures_count_each_segment_once():
+    failures = replacement.yearly_failures(np.array([[0.2, 0.5, 0.4, 0.9]]))
+
+    np.testing.assert_allclose(failures, [[0.2, 0.3, 0.0, 0.4]])
+    np.testing.assert_allclose(replacement.failures_avoided(failures), [[0.9, 0.7, 0.4, 0.4]])
+
+
+def test_constant_probability_is_one_failure_not_one_per_year():
+    plan = replacement.plan_replacements(_request([[0.9]], annual_budget=5000.0, years=5))
+
+    assert plan.expected_failures_baseline == 0.9
+    planned, = plan.replacements
+    assert planned.year == 1
+    assert planned.expected_failures_avoided == 0.9
+    assert plan.expected_failures_planned == 0.0
+    assert [year.expected_failures for year in plan.years] == [0.0] * 5
+
+
+def test_avoided_failures_never_exceed_one_per_segment():
+    probabilities, costs = _fleet(500, 10, seed=1)
+
+    plan = replacement.plan_replacements(_request(probabilities, 50000.0, 10, costs))
+
+    assert plan.replacements
+    assert all(0.0 <= r.expected_failures_avoided <= 1.0 for r in plan.replacements)
+    assert plan.expected_failures_baseline <= len(probabilities)
+    baseline = probabilities.max(axis=1).sum()
+    np.testing.assert_allclose(plan.expected_failures_baseline, baseline, atol=1e-4)
+    yearly = sum(year.expected_failures for year in plan.years)
+    np.testing.assert_allclose(yearly, plan.expected_failures_planned, atol=1e-4)
+
+
+def test_plan_stays_within_the_yearly_budgets():
+    probabilities, costs = _fleet(500, 5, seed=2)
+
+    plan = replacement.plan_replacements(_request(probabilities, 40000.0, 5, costs))
+
+    assert all(year.spent <= year.budget for year in plan.years)
+    assert len({r.pipe_id for r in plan.replacements}) == len(plan.replacements)
+
+
+def test_bound_is_at_or_above_the_plan_and_the_optimum():
+    years = 3
+    probabilities, costs = _fleet(7, years, seed=3)
+    budgets = np.full(years, 3000.0)
+    benefit = replacement.failures_avoided(replacement.yearly_failures(probabilities))
+
+    plan_years, left_out = replacement.greedy_plan(benefit, costs, budgets)
+    achieved = float(sum(benefit[i, y] for i, y in enumerate(plan_years) if y >= 0))
+
+    # Exhaustive optimum: every segment kept (-1) or replaced in one year
+    optimum = 0.0
+    for choice in itertools.product(range(-1, years), repeat=len(costs)):
+        choice = np.array(choice)
+        spent = np.bincount(choice[choice >= 0], weights=costs[choice >= 0], minlength=years)
+        if (spent <= budgets).all():
+            value = sum(benefit[i, y] for i, y in enumerate(choice) if y >= 0)
+            optimum = max(optimum, float(value))
+
+    bound, _ = replacement.lagrangian_bound(benefit, costs, budgets, left_out, achieved)
+    assert achieved <= optimum + 1e-9
+    assert bound >= optimum - 1e-9
+
+    plan = replacement.plan_replacements(_request(probabilities, 3000.0, years, costs))
+    assert plan.expected_failures_lower_bound <= plan.expected_failures_planned
+    assert plan.optimality_gap >= 0.0
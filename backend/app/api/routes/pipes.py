@@ -8,14 +8,22 @@ import qrcode
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db
-from app.core.ai_client import get_ai_client
+from app.core.cache import TwoTierCache, get_passport_cache
 from sqlalchemy import select, func
 from typing import List
 from app.schemas.pipes import PipeResponse, PipeCreate
 from app.models.pipes import Pipe
 from app.models.defects import Defect
 from app.models.inspections import Inspection
-from app.services.pipe_service import get_pipe_by_qr, get_pipe_by_id
+from app.services.pipe_service import (
+    get_pipe_by_qr,
+    get_pipe_by_id,
+    get_passport_by_qr,
+    get_passport_by_id,
+    invalidate_passport,
+    prediction_status,
+)
+from app.services.prediction_refresh import get_prediction_refresher
 from app.services.report_service import ReportService
 
 logger = logging.getLogger(__name__)
@@ -27,16 +35,19 @@ router = APIRouter()
 async def get_pipe_by_qr_code(
     qr_code: str,
     db: AsyncSession = Depends(get_db),
+    cache: TwoTierCache = Depends(get_passport_cache),
 ) -> PipeResponse:
     """
     Get pipe information by QR code.
     
     This endpoint is used by mobile application to retrieve pipe passport
-    after scanning QR code.
+    after scanning QR code. Passports are served from the Redis-backed
+    passport cache when possible.
     
     Args:
         qr_code: QR code string (format: PL-{COMPANY}-{ID})
         db: Database session (dependency injection)
+        cache: Passport cache (dependency injection)
         
     Returns:
         PipeResponse with full pipe passport including:
@@ -44,6 +55,8 @@ async def get_pipe_by_qr_code(
         - Current status and risk score
         - Predicted lifetime
         - Location data
+        - Prediction freshness (a stale or missing prediction is refreshed
+          in the background; scan again for the new values)
         
     Raises:
         HTTPException 404: If pipe with given QR code is not found
@@ -51,12 +64,12 @@ async def get_pipe_by_qr_code(
     logger.info(f"QR scanned: {qr_code}")
     
     try:
-        # Get AI client for prediction
-        ai_client = get_ai_client()
+        # Stale predictions are refreshed after the response, not before it
+        refresher = get_prediction_refresher()
         
-        pipe = await get_pipe_by_qr(db, qr_code, ai_client=ai_client)
+        passport = await get_passport_by_qr(db, qr_code, cache, refresher=refresher)
         
-        if pipe is None:
+        if passport is None:
             # If database is not available, return mock data for testing
             logger.warning(f"Pipe not found in database for QR code: {qr_code}")
             logger.info(f"Returning mock pipe data for testing")
@@ -79,8 +92,11 @@ async def get_pipe_by_qr_code(
                 predicted_lifetime_years=25,
             )
         
-        logger.info(f"Pipe found: {pipe.id} for QR code: {qr_code}")
-        return PipeResponse.model_validate(pipe)
+        logger.info(f"Pipe found: {passport.id} for QR code: {qr_code}")
+        return passport.model_copy(update={
+            "prediction_status": prediction_status(passport),
+            "prediction_refresh_pending": refresher.is_pending(passport.id),
+        })
     except Exception as e:
         logger.error(f"Error getting pipe by QR code: {e}", exc_info=True)
         # Return mock data if database error
@@ -172,6 +188,7 @@ async def get_dashboard_stats(
 async def create_pipe(
     pipe_data: PipeCreate,
     db: AsyncSession = Depends(get_db),
+    cache: TwoTierCache = Depends(get_passport_cache),
 ) -> PipeResponse:
     """
     Create a new pipe with auto-generated QR code.
@@ -181,6 +198,7 @@ async def create_pipe(
     Args:
         pipe_data: Pipe creation data
         db: Database session
+        cache: Passport cache
         
     Returns:
         Created PipeResponse
@@ -227,6 +245,7 @@ async def create_pipe(
             await db.commit()
             await db.refresh(new_pipe)
             logger.info(f"Pipe created: {new_pipe.id} with QR code: {qr_code}")
+            await invalidate_passport(cache, new_pipe.id, qr_code)
         except Exception as db_error:
             # If database is not available, return mock response for testing
             logger.warning(f"Database save failed (may be unavailable): {db_error}")
@@ -309,6 +328,7 @@ async def get_qr_code_image(
 async def get_pipe_qr_code_image(
     pipe_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
+    cache: TwoTierCache = Depends(get_passport_cache),
     size: int = 300,
 ) -> Response:
     """
@@ -317,6 +337,7 @@ async def get_pipe_qr_code_image(
     Args:
         pipe_id: Pipe UUID
         db: Database session
+        cache: Passport cache
         size: Image size in pixels (default: 300)
         
     Returns:
@@ -328,7 +349,7 @@ async def get_pipe_qr_code_image(
     logger.info(f"Generating QR code image for pipe_id: {pipe_id}")
     
     # Get pipe
-    pipe = await get_pipe_by_id(db, pipe_id)
+    pipe = await get_passport_by_id(db, pipe_id, cache)
     
     if pipe is None:
         raise HTTPException(
@@ -57,6 +57,7 @@ class AIClient:
         current_wall_thickness: float,
         corrosion_rate_historical: float,
         history_measurements: Optional[list] = None,
+        diameter_mm: Optional[int] = None,
     ) -> Optional[dict]:
         """
         Request lifetime prediction from AI Engine
@@ -68,6 +69,7 @@ class AIClient:
             current_wall_thickness: Current wall thickness in mm
             corrosion_rate_historical: Historical corrosion rate (mm/year)
             history_measurements: List of historical measurements
+            diameter_mm: Nominal diameter in mm (selects the fleet cohort)
             
         Returns:
             Prediction response dict or None if AI Engine is unavailable
@@ -83,6 +85,8 @@ class AIClient:
             "corrosion_rate_historical": corrosion_rate_historical or 0.1,
             "history_measurements": history_measurements or [],
         }
+        if diameter_mm:
+            payload["diameter_mm"] = diameter_mm
         
         try:
             logger.info(f"Requesting prediction from AI Engine for pipe_id: {pipe_id}")
@@ -112,6 +116,13 @@ class AIClient:
             return None
             
         except httpx.HTTPStatusError as e:
+            if e.response.status_code == 503:
+                # Engine is shedding load; it says when capacity frees up
+                logger.warning(
+                    f"AI Engine overloaded for pipe_id: {pipe_id}, "
+                    f"retry after {e.response.headers.get('Retry-After', '?')}s"
+                )
+                return None
             logger.error(
                 f"AI Engine HTTP error for pipe_id: {pipe_id}. "
                 f"Status: {e.response.status_code}, Response: {e.response.text}"
@@ -0,0 +1,277 @@
+"""
+Two-tier read-through cache (per-worker memory in front of Redis)
+
+Values are strings (serialized payloads). Each uvicorn worker keeps a small
+LRU of recent entries with a short TTL in front of Redis, which is shared by
+all workers. Invalidations delete the Redis entries and are broadcast over
+Redis pub/sub so every worker drops its local copy too.
+
+Cache errors never fail a request: a broken backend is logged and treated as
+a miss. Tests use InMemoryCacheBackend instead of Redis; caches sharing one
+instance behave like workers sharing one Redis.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from redis import asyncio as aioredis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub channel for invalidated keys
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Seconds between reconnect attempts of the invalidation listener
+RECONNECT_DELAY = 1.0
+
+
+class RedisCacheBackend:
+    """Shared tier backed by Redis"""
+
+    def __init__(self, url: Optional[str] = None, password: Optional[str] = None):
+        """
+        Initialize Redis backend
+
+        Args:
+            url: Redis URL (defaults to settings.REDIS_URL)
+            password: Redis password (defaults to settings.REDIS_PASSWORD)
+        """
+        self._redis = aioredis.Redis.from_url(
+            url or settings.REDIS_URL,
+            password=password or settings.REDIS_PASSWORD,
+            decode_responses=True,
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def delete(self, keys: List[str]) -> None:
+        await self._redis.delete(*keys)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._redis.publish(channel, message)
+
+    async def listen(self, channel: str) -> AsyncIterator[str]:
+        """Yield messages published on the channel"""
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class InMemoryCacheBackend:
+    """In-process stand-in for RedisCacheBackend (tests, single worker)"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[float, str]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._values.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._values.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._values[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._values.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    async def listen(self, channel: str) -> AsyncIterator[str]:
+        """Yield messages published on the channel"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    async def close(self) -> None:
+        pass
+
+
+CACHE_BACKENDS = {
+    "redis": RedisCacheBackend,
+    "memory": InMemoryCacheBackend,
+}
+
+
+class TwoTierCache:
+    """Local LRU + shared backend with pub/sub invalidation"""
+
+    def __init__(
+        self,
+        backend: RedisCacheBackend | InMemoryCacheBackend,
+        ttl: int = 300,
+        local_ttl: int = 30,
+        local_max_entries: int = 10000,
+    ):
+        """
+        Initialize cache
+
+        Args:
+            backend: Shared tier
+            ttl: Seconds an entry lives in the shared tier
+            local_ttl: Seconds an entry lives in this worker's memory (bounds
+                staleness if an invalidation message is lost)
+            local_max_entries: Size of the local LRU
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_max_entries = local_max_entries
+        self._local: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+        # Bumped on every invalidation; see set()
+        self.generation = 0
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "errors": 0, "invalidations": 0}
+
+    def start(self) -> None:
+        """Start listening for invalidations (call from the running event loop)"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="cache-invalidation")
+
+    async def stop(self) -> None:
+        """Stop the listener and close the backend"""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.backend.close()
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Value, or None on a miss or backend error
+        """
+        entry = self._local.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._local.move_to_end(key)
+                self._stats["local_hits"] += 1
+                return entry[1]
+            del self._local[key]
+
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache get failed for {key}: {str(e)}")
+            return None
+
+        if value is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats["shared_hits"] += 1
+        self._remember(key, value)
+        return value
+
+    async def set(self, keys: List[str], value: str, generation: Optional[int] = None) -> None:
+        """
+        Cache a value under one or more keys
+
+        Args:
+            keys: Cache keys
+            value: Serialized value
+            generation: ``self.generation`` read before the value was loaded;
+                if anything was invalidated since, the value may predate it
+                and is not cached
+        """
+        if generation is not None and generation != self.generation:
+            return
+        for key in keys:
+            self._remember(key, value)
+        try:
+            for key in keys:
+                await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache set failed for {keys}: {str(e)}")
+
+    async def invalidate(self, keys: List[str]) -> None:
+        """
+        Drop keys here, in the shared tier and in every other worker
+
+        Args:
+            keys: Cache keys
+        """
+        self._forget(keys)
+        try:
+            await self.backend.delete(keys)
+            await self.backend.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache invalidation failed for {keys}: {str(e)}")
+
+    def stats(self) -> dict:
+        return {**self._stats, "local_entries": len(self._local)}
+
+    def _remember(self, key: str, value: str) -> None:
+        self._local[key] = (time.monotonic() + self.local_ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_max_entries:
+            self._local.popitem(last=False)
+
+    def _forget(self, keys: List[str]) -> None:
+        self.generation += 1
+        self._stats["invalidations"] += 1
+        for key in keys:
+            self._local.pop(key, None)
+
+    async def _listen(self) -> None:
+        """Apply invalidations from other workers, reconnecting on errors"""
+        while True:
+            try:
+                async for message in self.backend.listen(INVALIDATION_CHANNEL):
+                    self._forget(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener failed: {str(e)}")
+            # Invalidations may have been missed while disconnected
+            self._local.clear()
+            self.generation += 1
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+# Singleton instance (started in the application lifespan)
+_cache_instance: Optional[TwoTierCache] = None
+
+
+def get_passport_cache() -> TwoTierCache:
+    """Get singleton pipe passport cache"""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = TwoTierCache(
+            CACHE_BACKENDS[settings.PASSPORT_CACHE_BACKEND](),
+            ttl=settings.PASSPORT_CACHE_TTL,
+            local_ttl=settings.PASSPORT_CACHE_LOCAL_TTL,
+            local_max_entries=settings.PASSPORT_CACHE_LOCAL_MAX_ENTRIES,
+        )
+    return _cache_instance
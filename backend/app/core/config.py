@@ -15,6 +15,12 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_PASSWORD: Optional[str] = None
     
+    # Pipe passport cache: redis (shared by all workers) or memory (in-process)
+    PASSPORT_CACHE_BACKEND: str = "redis"
+    PASSPORT_CACHE_TTL: int = 300  # seconds in Redis
+    PASSPORT_CACHE_LOCAL_TTL: int = 30  # seconds in each worker's memory
+    PASSPORT_CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    
     # MinIO
     MINIO_ENDPOINT: str = "localhost:9000"
     MINIO_ACCESS_KEY: str = "minioadmin"
@@ -31,6 +37,12 @@ class Settings(BaseSettings):
     AI_ENGINE_URL: str = "http://ai-engine:8001"
     AI_ENGINE_TIMEOUT: int = 30  # seconds
     
+    # Background AI prediction refresh on QR scan
+    PREDICTION_REFRESH_WORKERS: int = 2
+    PREDICTION_REFRESH_MAX_PENDING: int = 1000
+    # postgres (advisory lock, shared by all workers) or local (single process)
+    PREDICTION_REFRESH_LOCK: str = "postgres"
+    
     # Local LLM (Ollama)
     OLLAMA_API_URL: str = "http://localhost:11434/api/generate"
     LLM_MODEL: str = "llama3.2"  # llama3.2, llama2, mistral, qwen2.5
@@ -2,11 +2,14 @@
 FastAPI Application Entry Point
 """
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.api.routes import pipes, chat
+from app.core.cache import get_passport_cache
 from app.core.config import settings
+from app.services.prediction_refresh import get_prediction_refresher
 
 # Configure logging
 logging.basicConfig(
@@ -14,12 +17,26 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the background prediction refresher and passport cache"""
+    cache = get_passport_cache()
+    cache.start()
+    refresher = get_prediction_refresher()
+    refresher.start()
+    yield
+    await refresher.stop()
+    await cache.stop()
+
+
 app = FastAPI(
     title="Tutas Ai API",
     description="Enterprise-Grade Pipeline Monitoring and Inspection System",
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
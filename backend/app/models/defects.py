@@ -2,7 +2,7 @@
 Defect model - Pipeline defects with AI detection
 """
 import uuid
-from sqlalchemy import String, Integer, Numeric, ForeignKey, Boolean, Text
+from sqlalchemy import String, Integer, Numeric, ForeignKey, Boolean, Index, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from geoalchemy2 import Geography
@@ -12,9 +12,17 @@ from .base import Base, UUIDMixin, TimestampMixin
 class Defect(Base, UUIDMixin, TimestampMixin):
     """Pipeline defect record with AI detection"""
     __tablename__ = "defects"
+    __table_args__ = (
+        # Critical defects (severity 4-5) are a small share of all defects
+        Index(
+            "defects_critical_pipe_id_idx",
+            "pipe_id",
+            postgresql_where=text("severity_level >= 4"),
+        ),
+    )
 
     inspection_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("inspections.id"), nullable=True)
-    pipe_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("pipes.id"), nullable=False)
+    pipe_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("pipes.id"), nullable=False, index=True)
 
     # Классификация
     defect_type: Mapped[str] = mapped_column(String(100))
@@ -3,7 +3,7 @@ Inspection model - Pipeline inspection records
 """
 import uuid
 from datetime import date, datetime
-from sqlalchemy import String, ForeignKey, Date, DateTime, Text
+from sqlalchemy import String, ForeignKey, Date, DateTime, Index, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base, UUIDMixin, TimestampMixin
@@ -12,6 +12,16 @@ from .base import Base, UUIDMixin, TimestampMixin
 class Inspection(Base, UUIDMixin, TimestampMixin):
     """Pipeline inspection record"""
     __tablename__ = "inspections"
+    __table_args__ = (
+        # Inspections of a pipe, latest first
+        Index("inspections_pipe_id_completed_date_idx", "pipe_id", text("completed_date DESC")),
+        # Recently completed inspections (planned ones have no completed_date)
+        Index(
+            "inspections_completed_date_idx",
+            "completed_date",
+            postgresql_where=text("completed_date IS NOT NULL"),
+        ),
+    )
 
     pipe_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("pipes.id"), nullable=False)
     inspection_type: Mapped[str] = mapped_column(String(50))  # visual, ultrasonic, etc.
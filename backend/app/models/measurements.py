@@ -3,7 +3,7 @@ Measurement model - TimescaleDB hypertable for time-series data
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Numeric, ForeignKey, event
+from sqlalchemy import String, Numeric, ForeignKey, Index, event, text
 from sqlalchemy.sql import DDL
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -13,6 +13,17 @@ from .base import Base, UUIDMixin
 class Measurement(Base, UUIDMixin):
     """Time-series measurement data (TimescaleDB hypertable)"""
     __tablename__ = "measurements"
+    __table_args__ = (
+        # Per-pipe history of one measurement type, newest first; covers the
+        # AI refresh summary (pipe_service._get_measurement_summary)
+        Index(
+            "measurements_pipe_id_measurement_type_measured_at_idx",
+            "pipe_id",
+            "measurement_type",
+            text("measured_at DESC"),
+            postgresql_include=["value", "unit"],
+        ),
+    )
 
     pipe_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("pipes.id"), nullable=False)
     
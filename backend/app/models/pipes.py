@@ -1,7 +1,7 @@
 """
 Pipe model - Digital passport for pipeline segments
 """
-from datetime import date
+from datetime import date, datetime
 from sqlalchemy import String, Integer, Numeric, Date
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from geoalchemy2 import Geography
@@ -30,6 +30,9 @@ class Pipe(Base, UUIDMixin, TimestampMixin):
     current_status: Mapped[str] = mapped_column(String(50), default="active")
     risk_score: Mapped[float | None] = mapped_column(Numeric(3, 2))
     predicted_lifetime_years: Mapped[int | None] = mapped_column(Integer)
+    # When risk_score/predicted_lifetime_years were computed (updated_at also
+    # changes on any other edit)
+    prediction_updated_at: Mapped[datetime | None] = mapped_column()
     
     # Relationships
     inspections = relationship("Inspection", back_populates="pipe", cascade="all, delete-orphan")
@@ -2,7 +2,7 @@
 Pydantic schemas for Pipe model
 """
 import uuid
-from datetime import date
+from datetime import date, datetime
 from pydantic import BaseModel, ConfigDict, computed_field
 from typing import Optional
 
@@ -24,6 +24,10 @@ class PipeResponse(PipeBase):
     current_status: str
     risk_score: Optional[float] = None
     predicted_lifetime_years: Optional[int] = None
+    prediction_updated_at: Optional[datetime] = None
+    # "fresh", "stale" or "missing"; set on the QR scan endpoint
+    prediction_status: Optional[str] = None
+    prediction_refresh_pending: bool = False
     
     # Геометрия: упрощаем для клиента
     @computed_field
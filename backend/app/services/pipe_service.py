@@ -3,36 +3,55 @@ Service layer for Pipe business logic
 """
 import logging
 import uuid
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import Date, Float, Select, cast, select, func, desc
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
 from app.models.pipes import Pipe
 from app.models.measurements import Measurement
-from app.core.ai_client import AIClient, get_ai_client
+from app.core.ai_client import AIClient
+from app.core.cache import TwoTierCache, get_passport_cache
+from app.schemas.pipes import PipeResponse
+from app.services.prediction_refresh import PredictionRefresher
 
 logger = logging.getLogger(__name__)
 
 # Cache prediction for 30 days
 PREDICTION_CACHE_DAYS = 30
 
+# Freshness of a stored prediction (PipeResponse.prediction_status)
+PREDICTION_FRESH = "fresh"
+PREDICTION_STALE = "stale"
+PREDICTION_MISSING = "missing"
+
+# Measurement type the corrosion rate and AI history are computed from
+WALL_THICKNESS = "wall_thickness"
+
+# Corrosion rate (mm/year) assumed without a measurable decrease
+DEFAULT_CORROSION_RATE = 0.1
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
 
 async def get_pipe_by_qr(
     db: AsyncSession,
     qr_code: str,
-    ai_client: Optional[AIClient] = None,
+    refresher: Optional[PredictionRefresher] = None,
 ) -> Optional[Pipe]:
     """
-    Get pipe by QR code with AI prediction update.
+    Get pipe by QR code, queueing a background AI prediction refresh.
     
-    If pipe has no recent prediction (or older than 30 days),
-    requests new prediction from AI Engine and updates risk_score
-    and predicted_lifetime_years.
+    The stored risk_score and predicted_lifetime_years are returned as they
+    are. If the prediction is missing or older than PREDICTION_CACHE_DAYS,
+    the pipe is queued on ``refresher`` and the AI Engine is asked for a new
+    one after the response has gone out (stale-while-revalidate).
     
     Args:
         db: Database session
         qr_code: QR code string (format: PL-{COMPANY}-{ID})
-        ai_client: AI Client instance (optional, will use singleton if not provided)
+        refresher: Background refresh queue (stale predictions are not
+            refreshed if omitted)
         
     Returns:
         Pipe object or None if not found
@@ -44,57 +63,104 @@ async def get_pipe_by_qr(
     if pipe is None:
         return None
     
-    # Check if prediction needs update
-    needs_prediction = _should_update_prediction(pipe)
+    if refresher is not None and _should_update_prediction(pipe):
+        logger.info(f"Queueing AI prediction refresh for pipe_id: {pipe.id}, qr_code: {qr_code}")
+        refresher.enqueue(pipe.id)
     
-    if needs_prediction:
-        logger.info(f"Updating AI prediction for pipe_id: {pipe.id}, qr_code: {qr_code}")
-        
-        # Get AI client
-        client = ai_client or get_ai_client()
-        
-        # Get historical measurements for AI
-        history_measurements = await _get_measurement_history(db, pipe.id)
-        
-        # Calculate age in years
-        age_years = _calculate_age_years(pipe.production_date)
-        
-        # Calculate historical corrosion rate
-        corrosion_rate = await _calculate_corrosion_rate(db, pipe.id, pipe.wall_thickness_mm)
+    return pipe
+
+
+async def refresh_pipe_prediction(
+    db: AsyncSession,
+    pipe_id: uuid.UUID,
+    ai_client: AIClient,
+) -> bool:
+    """
+    Request a new AI prediction for a pipe and store it.
+    
+    Runs in the background refresher with its own session, holding the
+    pipe's refresh lock. The pipe is read after the lock is taken, so one
+    refreshed by another worker since it was queued is skipped (and its
+    cached passport invalidated).
+    
+    Args:
+        db: Database session
+        pipe_id: Pipe UUID
+        ai_client: AI Client instance
         
-        # Request prediction from AI Engine
-        prediction = await client.predict_lifespan(
-            pipe_id=pipe.id,
-            material=pipe.material or "steel",
-            age_years=age_years,
-            current_wall_thickness=pipe.wall_thickness_mm or 20.0,
-            corrosion_rate_historical=corrosion_rate,
-            history_measurements=history_measurements,
+    Returns:
+        True if the prediction was updated
+    """
+    pipe = await get_pipe_by_id(db, pipe_id)
+    if pipe is None:
+        return False
+    if not _should_update_prediction(pipe):
+        # The stale passport that queued this pipe may have been cached by a
+        # worker that read the row just before another worker's refresh
+        # committed; drop it so the next scan reads the fresh row
+        await invalidate_passport(get_passport_cache(), pipe.id, pipe.qr_code)
+        return False
+    
+    logger.info(f"Updating AI prediction for pipe_id: {pipe.id}")
+    
+    # Get recent measurements and historical corrosion rate for AI
+    history_measurements, corrosion_rate = await _get_measurement_summary(db, pipe.id)
+    
+    # Calculate age in years
+    age_years = _calculate_age_years(pipe.production_date)
+    
+    # Request prediction from AI Engine
+    prediction = await ai_client.predict_lifespan(
+        pipe_id=pipe.id,
+        material=pipe.material or "steel",
+        age_years=age_years,
+        current_wall_thickness=pipe.wall_thickness_mm or 20.0,
+        corrosion_rate_historical=corrosion_rate,
+        history_measurements=history_measurements,
+        diameter_mm=pipe.diameter_mm,
+    )
+    
+    if not prediction:
+        logger.warning(
+            f"AI Engine unavailable for pipe_id: {pipe.id}. "
+            f"Keeping existing prediction."
         )
-        
-        if prediction:
-            # Extract risk score and predicted lifetime from AI response
-            risk_score, predicted_lifetime = _extract_prediction_metrics(prediction)
-            
-            # Update pipe with new prediction
-            pipe.risk_score = risk_score
-            pipe.predicted_lifetime_years = predicted_lifetime
-            pipe.updated_at = datetime.utcnow()
-            
-            await db.commit()
-            await db.refresh(pipe)
-            
-            logger.info(
-                f"AI prediction updated for pipe_id: {pipe.id}, "
-                f"risk_score: {risk_score}, predicted_lifetime: {predicted_lifetime}"
-            )
-        else:
-            logger.warning(
-                f"AI Engine unavailable for pipe_id: {pipe.id}. "
-                f"Returning existing data."
-            )
+        return False
     
-    return pipe
+    # Extract risk score and predicted lifetime from AI response
+    risk_score, predicted_lifetime = _extract_prediction_metrics(prediction)
+    
+    # Update pipe with new prediction
+    pipe.risk_score = risk_score
+    pipe.predicted_lifetime_years = predicted_lifetime
+    pipe.prediction_updated_at = datetime.utcnow()
+    
+    await db.commit()
+    await invalidate_passport(get_passport_cache(), pipe.id, pipe.qr_code)
+    
+    logger.info(
+        f"AI prediction updated for pipe_id: {pipe.id}, "
+        f"risk_score: {risk_score}, predicted_lifetime: {predicted_lifetime}"
+    )
+    return True
+
+
+def prediction_status(pipe: Pipe | PipeResponse) -> str:
+    """
+    Freshness of a pipe's stored prediction.
+    
+    Returns:
+        PREDICTION_MISSING, PREDICTION_STALE (older than
+        PREDICTION_CACHE_DAYS or of unknown age) or PREDICTION_FRESH
+    """
+    if pipe.risk_score is None or pipe.predicted_lifetime_years is None:
+        return PREDICTION_MISSING
+    
+    if pipe.prediction_updated_at is None:
+        return PREDICTION_STALE
+    
+    days_since_update = (datetime.utcnow() - pipe.prediction_updated_at).days
+    return PREDICTION_STALE if days_since_update > PREDICTION_CACHE_DAYS else PREDICTION_FRESH
 
 
 async def get_pipe_by_id(db: AsyncSession, pipe_id: uuid.UUID) -> Optional[Pipe]:
@@ -113,22 +179,97 @@ async def get_pipe_by_id(db: AsyncSession, pipe_id: uuid.UUID) -> Optional[Pipe]
     return result.scalar_one_or_none()
 
 
-def _should_update_prediction(pipe: Pipe) -> bool:
+async def get_passport_by_qr(
+    db: AsyncSession,
+    qr_code: str,
+    cache: TwoTierCache,
+    refresher: Optional[PredictionRefresher] = None,
+) -> Optional[PipeResponse]:
     """
-    Check if pipe prediction needs update.
+    Get pipe passport by QR code through the passport cache.
+    
+    Like get_pipe_by_qr, a missing or stale prediction (also in a cached
+    passport) is queued on ``refresher``; its refresh invalidates the entry.
     
-    Returns True if:
-    - No risk_score or predicted_lifetime_years
-    - Last update was more than PREDICTION_CACHE_DAYS ago
+    Args:
+        db: Database session
+        qr_code: QR code string (format: PL-{COMPANY}-{ID})
+        cache: Passport cache
+        refresher: Background refresh queue (optional)
+        
+    Returns:
+        PipeResponse or None if not found
     """
-    if pipe.risk_score is None or pipe.predicted_lifetime_years is None:
-        return True
+    generation = cache.generation
+    payload = await cache.get(_passport_qr_key(qr_code))
+    if payload is not None:
+        passport = PipeResponse.model_validate_json(payload)
+    else:
+        pipe = await get_pipe_by_qr(db, qr_code)
+        if pipe is None:
+            return None
+        passport = await _cache_passport(cache, pipe, generation)
     
-    if pipe.updated_at is None:
-        return True
+    if refresher is not None and _should_update_prediction(passport):
+        refresher.enqueue(passport.id)
     
-    days_since_update = (datetime.utcnow() - pipe.updated_at).days
-    return days_since_update > PREDICTION_CACHE_DAYS
+    return passport
+
+
+async def get_passport_by_id(
+    db: AsyncSession,
+    pipe_id: uuid.UUID,
+    cache: TwoTierCache,
+) -> Optional[PipeResponse]:
+    """
+    Get pipe passport by UUID through the passport cache.
+    
+    Args:
+        db: Database session
+        pipe_id: Pipe UUID
+        cache: Passport cache
+        
+    Returns:
+        PipeResponse or None if not found
+    """
+    generation = cache.generation
+    payload = await cache.get(_passport_id_key(pipe_id))
+    if payload is not None:
+        return PipeResponse.model_validate_json(payload)
+    
+    pipe = await get_pipe_by_id(db, pipe_id)
+    if pipe is None:
+        return None
+    return await _cache_passport(cache, pipe, generation)
+
+
+async def invalidate_passport(cache: TwoTierCache, pipe_id: uuid.UUID, qr_code: str) -> None:
+    """Drop a pipe's cached passport in every worker"""
+    await cache.invalidate([_passport_id_key(pipe_id), _passport_qr_key(qr_code)])
+
+
+def _passport_id_key(pipe_id: uuid.UUID) -> str:
+    return f"passport:id:{pipe_id}"
+
+
+def _passport_qr_key(qr_code: str) -> str:
+    return f"passport:qr:{qr_code}"
+
+
+async def _cache_passport(cache: TwoTierCache, pipe: Pipe, generation: int) -> PipeResponse:
+    """Serialize a pipe's passport and cache it under its ID and QR code"""
+    passport = PipeResponse.model_validate(pipe)
+    await cache.set(
+        [_passport_id_key(passport.id), _passport_qr_key(passport.qr_code)],
+        passport.model_dump_json(),
+        generation,
+    )
+    return passport
+
+
+def _should_update_prediction(pipe: Pipe | PipeResponse) -> bool:
+    """Check if pipe prediction is missing or stale"""
+    return prediction_status(pipe) != PREDICTION_FRESH
 
 
 def _calculate_age_years(production_date) -> int:
@@ -145,77 +286,69 @@ def _calculate_age_years(production_date) -> int:
     return max(0, age.days // 365)
 
 
-async def _get_measurement_history(
+async def _get_measurement_summary(
     db: AsyncSession,
     pipe_id: uuid.UUID,
     limit: int = 20,
-) -> list:
+) -> Tuple[list, float]:
     """
-    Get historical measurements for pipe.
+    Get wall thickness history and corrosion rate for pipe in one query.
     
-    Returns list formatted for AI Engine API.
-    """
-    stmt = (
-        select(Measurement)
-        .where(Measurement.pipe_id == pipe_id)
-        .order_by(desc(Measurement.measured_at))
-        .limit(limit)
-    )
-    result = await db.execute(stmt)
-    measurements = result.scalars().all()
+    Postgres fits the rate (least-squares slope of thickness over time,
+    regr_slope) over all of the pipe's wall thickness measurements and
+    returns the newest ``limit`` of them as JSON, so no measurement rows are
+    loaded into the session.
     
-    history = []
-    for m in measurements:
-        history.append({
-            "date": m.measured_at.date().isoformat() if m.measured_at else None,
-            "value": float(m.value),
-            "unit": m.unit,
-        })
+    Args:
+        db: Database session
+        pipe_id: Pipe UUID
+        limit: Number of recent measurements in the history
+        
+    Returns:
+        Tuple of (history formatted for AI Engine API, newest first;
+        corrosion rate in mm/year, DEFAULT_CORROSION_RATE without a
+        measurable decrease)
+    """
+    row = (await db.execute(_measurement_summary_query(pipe_id, limit))).one()
     
-    return history
+    history = row.history or []
+    # Slope is mm per second; thickness decreasing means a positive rate
+    rate = -row.slope * SECONDS_PER_YEAR if row.slope is not None else 0.0
+    return history, rate if rate > 0 else DEFAULT_CORROSION_RATE
 
 
-async def _calculate_corrosion_rate(
-    db: AsyncSession,
-    pipe_id: uuid.UUID,
-    current_thickness: Optional[float],
-) -> float:
-    """
-    Calculate historical corrosion rate from measurements.
-    
-    Returns average mm/year degradation rate.
-    """
-    if current_thickness is None:
-        return 0.1  # Default rate
-    
-    # Get oldest and newest measurements
-    stmt = (
-        select(Measurement)
-        .where(Measurement.pipe_id == pipe_id)
-        .order_by(Measurement.measured_at)
+def _measurement_summary_query(pipe_id: uuid.UUID, limit: int = 20) -> Select:
+    """Single-row query of (slope, history) behind _get_measurement_summary"""
+    wall = (
+        select(Measurement.value, Measurement.unit, Measurement.measured_at)
+        .where(
+            Measurement.pipe_id == pipe_id,
+            Measurement.measurement_type == WALL_THICKNESS,
+        )
+        .cte("wall")
+    )
+    recent = (
+        select(wall)
+        .order_by(desc(wall.c.measured_at))
+        .limit(limit)
+        .subquery("recent")
+    )
+    entry = func.json_build_object(
+        "date", cast(recent.c.measured_at, Date),
+        "value", recent.c.value,
+        "unit", recent.c.unit,
+    )
+    return select(
+        select(
+            func.regr_slope(
+                cast(wall.c.value, Float),
+                func.extract("epoch", wall.c.measured_at),
+            )
+        ).scalar_subquery().label("slope"),
+        select(
+            func.json_agg(aggregate_order_by(entry, desc(recent.c.measured_at)), type_=JSON)
+        ).scalar_subquery().label("history"),
     )
-    result = await db.execute(stmt)
-    measurements = result.scalars().all()
-    
-    if len(measurements) < 2:
-        return 0.1  # Default if not enough data
-    
-    oldest = measurements[0]
-    newest = measurements[-1]
-    
-    if oldest.measured_at is None or newest.measured_at is None:
-        return 0.1
-    
-    time_diff_years = (newest.measured_at - oldest.measured_at).days / 365.0
-    
-    if time_diff_years <= 0:
-        return 0.1
-    
-    thickness_diff = float(oldest.value) - float(newest.value)
-    rate = thickness_diff / time_diff_years
-    
-    # Ensure positive rate (corrosion = thickness decrease)
-    return max(0.0, rate) if rate > 0 else 0.1
 
 
 def _extract_prediction_metrics(prediction_response: dict) -> tuple[Optional[float], Optional[int]]:
@@ -0,0 +1,206 @@
+"""
+Background refresh of AI predictions (stale-while-revalidate)
+
+A QR scan answers with the pipe's stored prediction right away. If that
+prediction is missing or stale, the pipe is queued here and a small pool of
+worker tasks asks the AI Engine for a new one, each in its own database
+session, so the field worker never waits on measurement queries or a model
+run.
+
+Only one refresh per pipe runs at a time across all uvicorn workers: the
+worker takes a Postgres advisory lock on the pipe first and skips it if
+another process holds the lock (that process is already refreshing it).
+"""
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.ai_client import AIClient, get_ai_client
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Refreshes one pipe's prediction: (db, pipe_id, ai_client) -> updated?
+RefreshFunction = Callable[[AsyncSession, uuid.UUID, AIClient], Awaitable[bool]]
+
+
+class AdvisoryRefreshLock:
+    """
+    Per-pipe Postgres advisory lock, shared by every process on the database
+    
+    Transaction-scoped: released when the refresh commits or its session
+    rolls back, so a crashed worker never leaves a pipe locked.
+    """
+
+    @staticmethod
+    def key(pipe_id: uuid.UUID) -> int:
+        """Signed 64-bit lock key from the pipe UUID"""
+        return int.from_bytes(pipe_id.bytes[:8], "big", signed=True)
+
+    @asynccontextmanager
+    async def hold(self, db: AsyncSession, pipe_id: uuid.UUID) -> AsyncIterator[bool]:
+        """Try to lock the pipe without waiting; yields whether the lock was taken"""
+        result = await db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": self.key(pipe_id)}
+        )
+        yield bool(result.scalar())
+
+
+class LocalRefreshLock:
+    """In-process stand-in for AdvisoryRefreshLock (single worker, tests)"""
+
+    def __init__(self):
+        self._held: Set[uuid.UUID] = set()
+
+    @asynccontextmanager
+    async def hold(self, db: AsyncSession, pipe_id: uuid.UUID) -> AsyncIterator[bool]:
+        """Try to lock the pipe without waiting; yields whether the lock was taken"""
+        if pipe_id in self._held:
+            yield False
+            return
+        self._held.add(pipe_id)
+        try:
+            yield True
+        finally:
+            self._held.discard(pipe_id)
+
+
+REFRESH_LOCKS = {
+    "postgres": AdvisoryRefreshLock,
+    "local": LocalRefreshLock,
+}
+
+
+class PredictionRefresher:
+    """Queue of pipes whose predictions are refreshed in the background"""
+
+    def __init__(
+        self,
+        refresh: RefreshFunction,
+        session_factory: async_sessionmaker = SessionLocal,
+        ai_client: Optional[AIClient] = None,
+        lock: Optional[AdvisoryRefreshLock | LocalRefreshLock] = None,
+        workers: int = 2,
+        max_pending: int = 1000,
+    ):
+        """
+        Initialize refresher
+
+        Args:
+            refresh: Coroutine function that refreshes one pipe
+            session_factory: Factory for the workers' database sessions
+            ai_client: AI client (defaults to the singleton)
+            lock: Per-pipe lock held during a refresh (defaults to the
+                Postgres advisory lock)
+            workers: Number of concurrent refreshes
+            max_pending: Pipes allowed to wait; further requests are dropped
+                until the queue drains (the next scan queues them again)
+        """
+        self._refresh = refresh
+        self._session_factory = session_factory
+        self._ai_client = ai_client
+        self._lock = lock or AdvisoryRefreshLock()
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[uuid.UUID] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._stats = {"queued": 0, "deduplicated": 0, "dropped": 0, "refreshed": 0, "locked": 0, "failed": 0}
+
+    def start(self) -> None:
+        """Start the worker tasks (call from the running event loop)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"prediction-refresh-{idx}")
+            for idx in range(self.workers)
+        ]
+        logger.info(f"Prediction refresher started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Cancel the workers; refreshes still queued are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+
+    def enqueue(self, pipe_id: uuid.UUID) -> bool:
+        """
+        Queue a pipe for refresh
+
+        Args:
+            pipe_id: Pipe UUID
+
+        Returns:
+            True if a refresh for the pipe is pending (newly or already queued)
+        """
+        if self._queue is None:
+            logger.warning(f"Prediction refresher not started, pipe_id: {pipe_id} not queued")
+            return False
+        if pipe_id in self._pending:
+            self._stats["deduplicated"] += 1
+            return True
+        if len(self._pending) >= self.max_pending:
+            self._stats["dropped"] += 1
+            logger.warning(f"Prediction refresh queue full, pipe_id: {pipe_id} not queued")
+            return False
+
+        self._pending.add(pipe_id)
+        self._queue.put_nowait(pipe_id)
+        self._stats["queued"] += 1
+        return True
+
+    def is_pending(self, pipe_id: uuid.UUID) -> bool:
+        """Whether a refresh for the pipe is queued or running"""
+        return pipe_id in self._pending
+
+    def stats(self) -> dict:
+        return {**self._stats, "pending": len(self._pending), "workers": len(self._tasks)}
+
+    async def _worker(self) -> None:
+        """Refresh queued pipes one at a time"""
+        while True:
+            pipe_id = await self._queue.get()
+            try:
+                async with self._session_factory() as db:
+                    async with self._lock.hold(db, pipe_id) as acquired:
+                        if not acquired:
+                            # Another process is refreshing this pipe
+                            self._stats["locked"] += 1
+                            continue
+                        client = self._ai_client or get_ai_client()
+                        if await self._refresh(db, pipe_id, client):
+                            self._stats["refreshed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.error(f"Prediction refresh failed for pipe_id: {pipe_id}: {str(e)}")
+            finally:
+                self._pending.discard(pipe_id)
+                self._queue.task_done()
+
+
+# Singleton instance (started in the application lifespan)
+_refresher_instance: Optional[PredictionRefresher] = None
+
+
+def get_prediction_refresher() -> PredictionRefresher:
+    """Get singleton prediction refresher"""
+    global _refresher_instance
+    if _refresher_instance is None:
+        # Imported here because pipe_service queues refreshes through this module
+        from app.services.pipe_service import refresh_pipe_prediction
+        _refresher_instance = PredictionRefresher(
+            refresh_pipe_prediction,
+            lock=REFRESH_LOCKS[settings.PREDICTION_REFRESH_LOCK](),
+            workers=settings.PREDICTION_REFRESH_WORKERS,
+            max_pending=settings.PREDICTION_REFRESH_MAX_PENDING,
+        )
+    return _refresher_instance
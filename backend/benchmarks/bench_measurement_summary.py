@@ -0,0 +1,178 @@
+"""
+Measurement summary benchmark for the backend
+
+Times the inputs of one AI prediction refresh (measurement history and
+historical corrosion rate) for a pipe with many measurements:
+- legacy: two ORM queries, the history (newest 20 rows of any type) and
+  every measurement row of the pipe for an oldest/newest rate
+- summary: pipe_service._get_measurement_summary, one aggregate query over
+  the pipe's wall thickness measurements
+
+Needs a Postgres database with the backend tables (for example created with
+scripts/create_tables_simple.sql). A throwaway pipe and its measurements are
+inserted and deleted again.
+
+Usage (from backend/):
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_measurement_summary.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import desc, select, text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.models.measurements import Measurement  # noqa: E402
+from app.services import pipe_service  # noqa: E402
+
+# Share of the seeded measurements that are not wall thickness readings
+OTHER_TYPES_SHARE = 0.25
+
+
+async def _legacy_summary(db, pipe_id: uuid.UUID, limit: int = 20):
+    """History and rate as computed before the aggregate query"""
+    result = await db.execute(
+        select(Measurement)
+        .where(Measurement.pipe_id == pipe_id)
+        .order_by(desc(Measurement.measured_at))
+        .limit(limit)
+    )
+    history = [
+        {"date": m.measured_at.date().isoformat(), "value": float(m.value), "unit": m.unit}
+        for m in result.scalars().all()
+    ]
+
+    result = await db.execute(
+        select(Measurement)
+        .where(Measurement.pipe_id == pipe_id)
+        .order_by(Measurement.measured_at)
+    )
+    measurements = result.scalars().all()
+    years = (measurements[-1].measured_at - measurements[0].measured_at).days / 365.0
+    rate = (float(measurements[0].value) - float(measurements[-1].value)) / years
+    return history, rate if rate > 0 else 0.1
+
+
+async def _seed(count: int, seed: int) -> uuid.UUID:
+    """Pipe with ``count`` measurements over 10 years, thinning 0.3 mm/year"""
+    rng = random.Random(seed)
+    pipe_id = uuid.uuid4()
+    start = datetime(2015, 1, 1)
+    rows = []
+    for offset in sorted(rng.uniform(0, 10 * 365 * 86400) for _ in range(count)):
+        other = rng.random() < OTHER_TYPES_SHARE
+        thickness = 12.0 - 0.3 * offset / pipe_service.SECONDS_PER_YEAR + rng.gauss(0, 0.05)
+        rows.append({
+            "pipe_id": pipe_id,
+            "measurement_type": "pressure" if other else pipe_service.WALL_THICKNESS,
+            "value": round(rng.uniform(5, 10) if other else thickness, 4),
+            "unit": "bar" if other else "mm",
+            "measured_at": start + timedelta(seconds=offset),
+        })
+    async with SessionLocal() as db:
+        await db.execute(
+            text("INSERT INTO pipes (id, qr_code, current_status) VALUES (:id, :qr, 'active')"),
+            {"id": pipe_id, "qr": f"BENCH-{pipe_id}"},
+        )
+        await db.execute(
+            text(
+                "INSERT INTO measurements (id, pipe_id, measurement_type, value, unit, measured_at) "
+                "VALUES (gen_random_uuid(), :pipe_id, :measurement_type, :value, :unit, :measured_at)"
+            ),
+            rows,
+        )
+        await db.execute(text("ANALYZE measurements"))
+        await db.commit()
+    return pipe_id
+
+
+async def _time(fn, pipe_id: uuid.UUID, iterations: int):
+    """Median and mean ms per call, each call in a fresh session"""
+    samples = []
+    for _ in range(iterations + 1):
+        async with SessionLocal() as db:
+            started = time.perf_counter()
+            result = await fn(db, pipe_id)
+            samples.append((time.perf_counter() - started) * 1000)
+    # First call warms the connection and statement caches
+    samples = samples[1:]
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "rate_mm_per_year": round(result[1], 4),
+        "history": len(result[0]),
+    }
+
+
+async def run(args: argparse.Namespace) -> list:
+    results = []
+    for count in args.measurements:
+        pipe_id = await _seed(count, args.seed)
+        try:
+            legacy = await _time(_legacy_summary, pipe_id, args.iterations)
+            summary = await _time(pipe_service._get_measurement_summary, pipe_id, args.iterations)
+        finally:
+            async with SessionLocal() as db:
+                await db.execute(text("DELETE FROM measurements WHERE pipe_id = :id"), {"id": pipe_id})
+                await db.execute(text("DELETE FROM pipes WHERE id = :id"), {"id": pipe_id})
+                await db.commit()
+
+        speedup = legacy["p50_ms"] / summary["p50_ms"]
+        print(
+            f"{count:7d} measurements  legacy {legacy['p50_ms']:8.2f} ms  "
+            f"summary {summary['p50_ms']:7.2f} ms  x{speedup:.1f}",
+            file=sys.stderr,
+        )
+        results.append({
+            "measurements": count,
+            "legacy": legacy,
+            "summary": summary,
+            "speedup": round(speedup, 2),
+        })
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend measurement summary benchmark")
+    parser.add_argument("--measurements", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    report = json.dumps({
+        "benchmark": "measurement_summary",
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "measurements": args.measurements,
+            "iterations": args.iterations,
+            "other_types_share": OTHER_TYPES_SHARE,
+            "seed": args.seed,
+        },
+        "results": results,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
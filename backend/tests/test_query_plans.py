@@ -0,0 +1,174 @@
+"""
+Query plan regression tests for the backend's hot read paths
+
+Seeds a fleet of pipes with measurements, inspections and defects inside a
+transaction, runs ANALYZE, and EXPLAINs the queries behind QR scans, the AI
+refresh, /stats and the chat context. A test fails if its query plans a
+sequential scan of pipes, measurements, defects or inspections, i.e. if an
+index from infra/db/migrations/002_add_hot_query_indexes.sql is missing or
+no longer matches its query. The transaction is rolled back at the end.
+
+Whole-table aggregates (total length, active pipes, total counts) read
+every row by design and are not checked.
+
+Needs a Postgres database with the backend tables, given by DATABASE_URL
+(dev or CI, not production: ANALYZE statistics from the seeded rows outlive
+the rollback until the next autovacuum). Skipped without it.
+
+Usage (from backend/):
+    DATABASE_URL=postgresql+asyncpg://... poetry run pytest tests/test_query_plans.py
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import Select, desc, func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.defects import Defect
+from app.models.inspections import Inspection
+from app.models.pipes import Pipe
+from app.services import pipe_service
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL"),
+    reason="DATABASE_URL not set (query plan tests need a Postgres database)",
+)
+
+CHECKED_TABLES = {"pipes", "measurements", "defects", "inspections"}
+
+SEED_PIPES = 2000
+SEED_PER_PIPE = {"measurements": 50, "inspections": 10, "defects": 10}
+
+# Seeded rows inserted with generate_series; measured_at and completed_date
+# spread over the last 5 years, 10% of defects critical, 20% of inspections
+# still planned
+SEED_SQL = [
+    """
+    INSERT INTO pipes (id, qr_code, current_status, created_at, updated_at)
+    SELECT gen_random_uuid(), 'PLAN-CHECK-' || n, 'active', now(), now()
+    FROM generate_series(1, :pipes) AS n
+    """,
+    """
+    INSERT INTO measurements (id, pipe_id, measurement_type, value, unit, measured_at)
+    SELECT gen_random_uuid(), p.id,
+           CASE WHEN n % 4 = 0 THEN 'pressure' ELSE 'wall_thickness' END,
+           10 + random(), 'mm', now() - random() * interval '5 years'
+    FROM pipes p, generate_series(1, :measurements) AS n
+    WHERE p.qr_code LIKE 'PLAN-CHECK-%'
+    """,
+    """
+    INSERT INTO inspections (id, pipe_id, inspection_type, status, completed_date,
+                             created_at, updated_at)
+    SELECT gen_random_uuid(), p.id, 'ultrasonic', 'completed',
+           CASE WHEN n % 5 = 0 THEN NULL ELSE now() - random() * interval '5 years' END,
+           now(), now()
+    FROM pipes p, generate_series(1, :inspections) AS n
+    WHERE p.qr_code LIKE 'PLAN-CHECK-%'
+    """,
+    """
+    INSERT INTO defects (id, pipe_id, defect_type, severity_level, ai_detected,
+                         created_at, updated_at)
+    SELECT gen_random_uuid(), p.id, 'corrosion',
+           CASE WHEN n % 10 = 0 THEN 4 + n % 2 ELSE 1 + n % 3 END, false, now(), now()
+    FROM pipes p, generate_series(1, :defects) AS n
+    WHERE p.qr_code LIKE 'PLAN-CHECK-%'
+    """,
+]
+
+
+def hot_queries(pipe_id: uuid.UUID, qr_code: str) -> List[tuple]:
+    """(name, statement) of every checked query"""
+    recent_date = datetime.utcnow() - timedelta(days=30)
+    return [
+        ("pipe by QR code", select(Pipe.id).where(Pipe.qr_code == qr_code)),
+        ("AI refresh measurement summary", pipe_service._measurement_summary_query(pipe_id)),
+        (
+            "critical defects count",
+            select(func.count(Defect.id)).where(Defect.severity_level >= 4),
+        ),
+        (
+            "critical defects of pipe",
+            select(Defect.id).where(Defect.pipe_id == pipe_id, Defect.severity_level >= 4),
+        ),
+        ("defects of pipe", select(Defect.id).where(Defect.pipe_id == pipe_id)),
+        (
+            "recent inspections count",
+            select(func.count(Inspection.id)).where(Inspection.completed_date >= recent_date),
+        ),
+        (
+            "latest inspection of pipe",
+            select(Inspection.id, Inspection.completed_date)
+            .where(Inspection.pipe_id == pipe_id)
+            .order_by(desc(Inspection.completed_date))
+            .limit(1),
+        ),
+    ]
+
+
+QUERY_NAMES = [name for name, _ in hot_queries(uuid.UUID(int=0), "")]
+
+
+def _plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    """
+    Connection with the seeded fleet in an open transaction.
+
+    Yields (explain, pipe_id, qr_code), where ``explain(statement)`` returns
+    the statement's root plan node. Rolled back after the session.
+    """
+    loop = asyncio.new_event_loop()
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+    conn = loop.run_until_complete(engine.connect())
+    transaction = loop.run_until_complete(conn.begin())
+
+    async def seed():
+        for sql in SEED_SQL:
+            await conn.execute(text(sql), {"pipes": SEED_PIPES, **SEED_PER_PIPE})
+        for table in sorted(CHECKED_TABLES):
+            await conn.execute(text(f"ANALYZE {table}"))
+        return (await conn.execute(
+            select(Pipe.id, Pipe.qr_code).where(Pipe.qr_code == "PLAN-CHECK-1")
+        )).one()
+
+    async def explain(statement: Select) -> dict:
+        compiled = statement.compile(
+            dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+        plan = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))).scalar()
+        return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+    try:
+        pipe_id, qr_code = loop.run_until_complete(seed())
+        yield (lambda statement: loop.run_until_complete(explain(statement))), pipe_id, qr_code
+    finally:
+        loop.run_until_complete(transaction.rollback())
+        loop.run_until_complete(conn.close())
+        loop.run_until_complete(engine.dispose())
+        loop.close()
+
+
+@pytest.mark.parametrize("name", QUERY_NAMES)
+def test_hot_query_avoids_sequential_scans(seeded_db, name):
+    explain, pipe_id, qr_code = seeded_db
+    statement = dict(hot_queries(pipe_id, qr_code))[name]
+
+    plan = explain(statement)
+
+    scans = sorted({
+        node["Relation Name"] for node in _plan_nodes(plan)
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES
+    })
+    assert not scans, (
+        f"{name} plans a sequential scan of {', '.join(scans)}:\n{json.dumps(plan, indent=2)}"
+    )
@@ -0,0 +1,6 @@
+-- Track when a pipe's AI prediction was computed, so QR scans can tell a
+-- stale prediction from a fresh one and refresh it in the background.
+-- Existing predictions have no timestamp and are treated as stale.
+-- Run with: psql -d tutas_ai -f infra/db/migrations/001_add_pipe_prediction_updated_at.sql
+
+ALTER TABLE pipes ADD COLUMN IF NOT EXISTS prediction_updated_at TIMESTAMP;
@@ -0,0 +1,34 @@
+-- Indexes for the hot read paths (names match the SQLAlchemy models):
+-- - AI refresh summary: one pipe's wall thickness history, newest first
+--   (covering, so the rate and history come from an index-only scan)
+-- - critical defect counts (severity_level >= 4) on /stats and chat
+-- - defects and inspections of one pipe
+-- - inspections completed in the last 30 days (chat context)
+-- Built CONCURRENTLY, so writes are not blocked; psql runs each statement
+-- in its own transaction, as CONCURRENTLY requires.
+-- Run with: psql -d tutas_ai -f infra/db/migrations/002_add_hot_query_indexes.sql
+-- Check with (from backend/): DATABASE_URL=... pytest tests/test_query_plans.py
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS measurements_pipe_id_measurement_type_measured_at_idx
+    ON measurements (pipe_id, measurement_type, measured_at DESC) INCLUDE (value, unit);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS defects_pipe_id_idx
+    ON defects (pipe_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS defects_critical_pipe_id_idx
+    ON defects (pipe_id) WHERE severity_level >= 4;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inspections_pipe_id_completed_date_idx
+    ON inspections (pipe_id, completed_date DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS inspections_completed_date_idx
+    ON inspections (completed_date) WHERE completed_date IS NOT NULL;
+
+-- Superseded by the indexes above (from scripts/create_tables_simple.sql)
+DROP INDEX CONCURRENTLY IF EXISTS idx_measurements_pipe_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_defects_pipe_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_inspections_pipe_id;
+
+ANALYZE measurements;
+ANALYZE defects;
+ANALYZE inspections;
@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS pipes (
     current_status VARCHAR(50) NOT NULL DEFAULT 'active',
     risk_score NUMERIC(3, 2),
     predicted_lifetime_years INTEGER,
+    prediction_updated_at TIMESTAMP,
     created_at TIMESTAMP NOT NULL DEFAULT NOW(),
     updated_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
@@ -36,7 +37,8 @@ CREATE TABLE IF NOT EXISTS inspections (
     updated_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_inspections_pipe_id ON inspections(pipe_id);
+CREATE INDEX IF NOT EXISTS inspections_pipe_id_completed_date_idx ON inspections(pipe_id, completed_date DESC);
+CREATE INDEX IF NOT EXISTS inspections_completed_date_idx ON inspections(completed_date) WHERE completed_date IS NOT NULL;
 
 CREATE TABLE IF NOT EXISTS defects (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -55,7 +57,8 @@ CREATE TABLE IF NOT EXISTS defects (
     updated_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_defects_pipe_id ON defects(pipe_id);
+CREATE INDEX IF NOT EXISTS defects_pipe_id_idx ON defects(pipe_id);
+CREATE INDEX IF NOT EXISTS defects_critical_pipe_id_idx ON defects(pipe_id) WHERE severity_level >= 4;
 CREATE INDEX IF NOT EXISTS idx_defects_inspection_id ON defects(inspection_id);
 
 CREATE TABLE IF NOT EXISTS measurements (
@@ -69,7 +72,8 @@ CREATE TABLE IF NOT EXISTS measurements (
     created_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_measurements_pipe_id ON measurements(pipe_id);
+CREATE INDEX IF NOT EXISTS measurements_pipe_id_measurement_type_measured_at_idx
+    ON measurements(pipe_id, measurement_type, measured_at DESC) INCLUDE (value, unit);
 CREATE INDEX IF NOT EXISTS idx_measurements_measured_at ON measurements(measured_at);
 
 -- Note: TimescaleDB hypertable creation skipped (requires extension)